@@ -3,10 +3,34 @@
 # pylint: disable=no-member,assignment-from-no-return
 
 import curses
+import sys
+from props.config import first_run
 from props.errors import ReturnError
 from props.cmps.main import Root
 from props.component import Component
 from props.data import ReturnType, Colors, status
+from props.frame import frame
+from props.render import Canvas
+from props.backup import backups
+from props.install_queue import downloads
+from props.logs import log_maintenance
+from props.paper import shutdown_prefetch
+from props.prepatch import prepatcher
+from props.process import supervisor
+from props.tasks import tasks
+
+TICK_MS = 100
+
+def draw(comp: Component, canvas: Canvas, stdscr: curses.window):
+    """Draw a frame of comp, through the canvas unless it draws over the last frame"""
+    frame.begin()
+    if not comp.should_clear:
+        canvas.invalidate()
+        return comp.draw(stdscr)
+    canvas.begin()
+    ret = comp.draw(canvas)
+    canvas.flush()
+    return ret
 
 def runner(stdscr: curses.window):
     """Run the app, must be wrapped"""
@@ -16,22 +40,34 @@ def runner(stdscr: curses.window):
         Colors.SELECTED, curses.COLOR_BLACK, curses.COLOR_YELLOW
     )  # Selected
     curses.init_pair(Colors.ACTIVE, curses.COLOR_GREEN, curses.COLOR_BLACK)  # Active
+    stdscr.timeout(TICK_MS)
+    canvas = Canvas(stdscr)
     stack: list[Component] = [Root()]
+    dirty = True
 
     while stack:
+        if tasks.process_events() or tasks.busy or downloads.busy:
+            dirty = True
         comp = stack[-1]
         if comp.should_init:
-            comp.init(stdscr)
+            comp.init(canvas)
 
-        if comp.should_clear:
-            stdscr.erase()
-        ret = comp.draw(stdscr)
-        if ret in (ReturnType.BACK, ReturnType.OK, ReturnType.ERR_BACK):
+        if dirty and draw(comp, canvas, stdscr) in (
+            ReturnType.BACK, ReturnType.OK, ReturnType.ERR_BACK
+        ):
             stack.pop()
             continue
 
         key = stdscr.getch()
-        result = comp.handle_key(key, stdscr)
+        dirty = key != -1  # -1 is a tick with nothing pressed
+        if key == curses.KEY_RESIZE:
+            curses.update_lines_cols()
+            frame.resize()
+            canvas.invalidate()
+            continue
+        if not dirty:
+            continue
+        result = comp.handle_key(key, canvas)
 
         if result == ReturnType.RETURN_TO_MAIN:
             while len(stack) != 1:
@@ -52,8 +88,24 @@ def runner(stdscr: curses.window):
 
 def main():
     """MC Server Manager (Paper)"""
+    if len(sys.argv) > 1:
+        from props.cli import main as cli_main  # pylint: disable=import-outside-toplevel
+        sys.exit(cli_main())
+    first_run()
+    downloads.start()
+    log_maintenance.start()
+    backups.start()
     # curses.wrapper(app)
-    curses.wrapper(runner)
+    try:
+        curses.wrapper(runner)
+    finally:
+        supervisor.shutdown()
+        downloads.shutdown()
+        log_maintenance.shutdown()
+        backups.shutdown()
+        prepatcher.shutdown()
+        tasks.shutdown()
+        shutdown_prefetch()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,337 @@
+"""Incremental, deduplicated profile snapshots"""
+
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from json import dumps, loads
+from pathlib import Path
+from threading import Event, Lock, Thread, get_ident
+from typing import Any, Callable, TypeVar
+
+from .config import get_paths, read_config
+from .data import status
+from .osutils import low_priority, scan_tree
+from .process import supervisor
+from .tasks import tasks
+from .typings import Config
+
+CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_WORKERS = 4
+DEFAULT_KEEP = 24
+DEFAULT_INTERVAL = 0
+DEFAULT_EXCLUDE = ["logs", "cache", "libraries", "versions", "session.lock"]
+
+T = TypeVar("T")
+FileEntry = dict[str, Any]
+Manifest = dict[str, Any]
+
+# Snapshots, restores and pruning of this process never overlap, so pruning can't
+# drop a chunk a snapshot in progress just decided to reuse
+_LOCK = Lock()
+
+
+def _exclusive(fn: Callable[..., T]) -> Callable[..., T]:
+    """Hold the backup lock while fn runs"""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs) -> T:
+        with _LOCK:
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def backup_root(config: Config | None = None) -> Path:
+    """Where chunks and manifests live, <server>/backups unless configured"""
+    config = config or read_config()
+    root = Path(config.get("backup_path") or get_paths().root / "backups").expanduser()
+    (root / "chunks").mkdir(parents=True, exist_ok=True)
+    (root / "snapshots").mkdir(exist_ok=True)
+    return root
+
+
+def chunk_path(root: Path, digest: str) -> Path:
+    """Chunks are fanned out by the first two hex digits"""
+    return root / "chunks" / digest[:2] / digest
+
+
+def _store_chunk(root: Path, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    path = chunk_path(root, digest)
+    if path.exists():
+        return digest
+    path.parent.mkdir(exist_ok=True)
+    temp = path.with_name(f"{digest}.{get_ident()}.tmp")
+    with open(temp, "wb") as file:
+        file.write(data)
+    os.replace(temp, path)
+    return digest
+
+
+def _store_file(root: Path, path: str) -> list[str]:
+    """Split a file into fixed size chunks and store the ones not seen yet"""
+    digests = []
+    with open(path, "rb") as file:
+        while data := file.read(CHUNK_SIZE):
+            digests.append(_store_chunk(root, data))
+    return digests
+
+
+def manifests(root: Path, profile: str) -> list[Path]:
+    """Snapshot manifests of a profile, oldest first"""
+    directory = root / "snapshots" / profile
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob("*.json"))
+
+
+def list_snapshots(profile: str) -> list[Manifest]:
+    """Snapshot summaries of a profile, newest first"""
+    summaries = []
+    for path in reversed(manifests(backup_root(), profile)):
+        manifest = loads(path.read_text(encoding="utf-8"))
+        manifest.pop("files")
+        summaries.append(manifest)
+    return summaries
+
+
+def _describe(entry: os.DirEntry) -> FileEntry:
+    """Manifest entry of a scanned path, files come without their chunks"""
+    if entry.is_symlink():
+        return {"type": "link", "target": os.readlink(entry.path)}
+    stat = entry.stat(follow_symlinks=False)
+    if entry.is_dir(follow_symlinks=False):
+        return {"type": "dir", "mode": stat.st_mode & 0o7777}
+    key = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+    return {"type": "file", "mode": stat.st_mode & 0o7777, "key": key}
+
+
+def _store_tree(
+    root: Path, base: Path, config: Config, old: dict[str, FileEntry]
+) -> tuple[dict[str, FileEntry], int]:
+    """Describe every file under base and store the chunks of the changed ones.
+
+    Return the manifest entries and how many files were read."""
+    exclude = set(config.get("backup_exclude", DEFAULT_EXCLUDE))
+    files: dict[str, FileEntry] = {}
+    changed: dict[str, Any] = {}
+    with ThreadPoolExecutor(config.get("backup_workers", DEFAULT_WORKERS)) as pool:
+        for name, entry in scan_tree(base, exclude):
+            files[name] = described = _describe(entry)
+            if described["type"] != "file":
+                continue
+            before = old.get(name)
+            if before is not None and before.get("key") == described["key"]:
+                described["chunks"] = before["chunks"]
+            else:
+                changed[name] = pool.submit(_store_file, root, entry.path)
+        for name, future in changed.items():
+            files[name]["chunks"] = future.result()
+    return files, len(changed)
+
+
+def _write_manifest(root: Path, manifest: Manifest):
+    """Save a manifest under a fresh id, bumping the id if a snapshot already took it"""
+    directory = root / "snapshots" / manifest["profile"]
+    directory.mkdir(exist_ok=True)
+    path = directory / f"{manifest['id']}.json"
+    if path.exists():
+        manifest["id"] += f"-{int(manifest['created'] * 1000) % 1000:03d}"
+        path = directory / f"{manifest['id']}.json"
+    temp = path.with_name(f"{path.name}.tmp")
+    temp.write_text(dumps(manifest), encoding="utf-8")
+    os.replace(temp, path)
+
+
+@_exclusive
+def snapshot(profile: str, config: Config | None = None) -> Manifest:
+    """Back up a profile, reusing chunks of files unchanged since the last snapshot.
+
+    A file is unchanged when its size, mtime and inode match the previous
+    manifest, only changed files are read and hashed, in parallel."""
+    config = config or read_config()
+    root = backup_root(config)
+    base = get_paths().profiles / profile
+    if not base.is_dir():
+        raise FileNotFoundError(f"Profile {profile} does not exist")
+    previous = manifests(root, profile)
+    old: dict[str, FileEntry] = (
+        loads(previous[-1].read_text(encoding="utf-8"))["files"] if previous else {}
+    )
+
+    started = time.monotonic()
+    server = supervisor.get(profile)
+    paused = server is not None and server.pause_saving()
+    try:
+        files, changed = _store_tree(root, base, config, old)
+    finally:
+        if paused and server is not None:
+            server.resume_saving()
+
+    created = time.time()
+    manifest: Manifest = {
+        "id": time.strftime("%Y%m%d-%H%M%S", time.localtime(created)),
+        "profile": profile,
+        "created": created,
+        "changed": changed,
+        "size": sum(entry["key"][0] for entry in files.values() if entry["type"] == "file"),
+        "seconds": round(time.monotonic() - started, 3),
+        "files": files,
+    }
+    _write_manifest(root, manifest)
+    manifest.pop("files")
+    return manifest
+
+
+def _restore_file(root: Path, target: Path, entry: FileEntry):
+    temp = target.with_name(f".{target.name}.restore")
+    with open(temp, "wb") as file:
+        for digest in entry["chunks"]:
+            with open(chunk_path(root, digest), "rb") as chunk:
+                shutil.copyfileobj(chunk, file)
+    os.chmod(temp, entry["mode"])
+    os.replace(temp, target)
+    mtime = entry["key"][1]
+    os.utime(target, ns=(mtime, mtime))
+
+
+def _kind(entry: os.DirEntry) -> str:
+    """Manifest type of a path on disk"""
+    if entry.is_symlink():
+        return "link"
+    return "dir" if entry.is_dir(follow_symlinks=False) else "file"
+
+
+def _remove(entry: os.DirEntry):
+    if _kind(entry) == "dir":
+        shutil.rmtree(entry.path)
+    elif os.path.lexists(entry.path):
+        os.unlink(entry.path)
+
+
+def _apply_entries(
+    base: Path, files: dict[str, FileEntry], current: dict[str, os.DirEntry]
+) -> list[tuple[Path, FileEntry]]:
+    """Create directories and links, return the files that need their contents back.
+
+    A path whose type differs from the snapshot's is removed first, so a directory
+    can come back where a file is now and the other way round."""
+    pending = []
+    for name, entry in sorted(files.items()):
+        target = base / name
+        existing = current.get(name)
+        if existing is not None and (_kind(existing) != entry["type"] or entry["type"] == "link"):
+            _remove(existing)
+            existing = None
+        if entry["type"] == "dir":
+            target.mkdir(exist_ok=True)
+            os.chmod(target, entry["mode"])
+        elif entry["type"] == "link":
+            os.symlink(entry["target"], target)
+        else:
+            stat = existing.stat(follow_symlinks=False) if existing is not None else None
+            if stat is None or [stat.st_size, stat.st_mtime_ns] != entry["key"][:2]:
+                pending.append((target, entry))
+    return pending
+
+
+@_exclusive
+def restore(profile: str, snapshot_id: str, config: Config | None = None) -> int:
+    """Put a profile back to a snapshot, return how many files were written.
+
+    Files whose size and mtime still match are left alone, files the snapshot
+    doesn't know are removed (excluded paths are never touched)."""
+    config = config or read_config()
+    server = supervisor.get(profile)
+    if server is not None and server.running:
+        raise OSError(f"Stop {profile} before restoring it")
+    root = backup_root(config)
+    path = root / "snapshots" / profile / f"{snapshot_id}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"Snapshot {snapshot_id} of {profile} does not exist")
+    files: dict[str, FileEntry] = loads(path.read_text(encoding="utf-8"))["files"]
+    base = get_paths().profiles / profile
+    base.mkdir(exist_ok=True)
+
+    current = dict(scan_tree(base, set(config.get("backup_exclude", DEFAULT_EXCLUDE))))
+    for name in sorted(set(current) - set(files), reverse=True):
+        _remove(current[name])
+
+    pending = _apply_entries(base, files, current)
+    with ThreadPoolExecutor(config.get("backup_workers", DEFAULT_WORKERS)) as pool:
+        for future in [pool.submit(_restore_file, root, *job) for job in pending]:
+            future.result()
+    return len(pending)
+
+
+@_exclusive
+def prune(profile: str | None = None, keep: int | None = None) -> dict[str, int]:
+    """Keep the newest snapshots of a profile (every profile by default), then drop
+    chunks no remaining snapshot refers to"""
+    config = read_config()
+    keep = config.get("backup_keep", DEFAULT_KEEP) if keep is None else keep
+    root = backup_root(config)
+    profiles = [profile] if profile else [
+        entry.name for entry in (root / "snapshots").iterdir() if entry.is_dir()
+    ]
+    removed = 0
+    for name in profiles:
+        old = manifests(root, name)
+        for path in old[:max(0, len(old) - keep)]:
+            path.unlink()
+            removed += 1
+
+    used: set[str] = set()
+    for path in (root / "snapshots").glob("*/*.json"):
+        for entry in loads(path.read_text(encoding="utf-8"))["files"].values():
+            used.update(entry.get("chunks", ()))
+    freed = 0
+    chunks = 0
+    for path in (root / "chunks").glob("*/*"):
+        if path.name not in used:
+            freed += path.stat().st_size
+            path.unlink()
+            chunks += 1
+    return {"snapshots": removed, "chunks": chunks, "freed": freed}
+
+
+class BackupScheduler:
+    """Snapshot every profile each backup_interval seconds (0 disables it), then prune"""
+
+    def __init__(self) -> None:
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def start(self):
+        """Start the schedule"""
+        if self._thread is not None:
+            return
+        self._thread = Thread(target=self._run, name="backups", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        low_priority()
+        while True:
+            interval = read_config().get("backup_interval", DEFAULT_INTERVAL)
+            if self._stop.wait(interval or 60):
+                return
+            if not interval:
+                continue
+            profiles = get_paths().profiles
+            try:
+                for entry in sorted(profiles.iterdir()):
+                    if entry.is_dir() and not self._stop.is_set():
+                        snapshot(entry.name)
+                prune()
+            except OSError as exc:
+                tasks.post(lambda exc=exc: status.set(f"Backup failed: {exc}"))
+
+    def shutdown(self):
+        """Stop the schedule, a running snapshot finishes first"""
+        self._stop.set()
+
+
+backups = BackupScheduler()
@@ -0,0 +1,180 @@
+"""Indexed metadata cache backed by sqlite"""
+
+import sqlite3
+import time
+from json import loads
+from os import remove
+from pathlib import Path
+from threading import Lock
+from typing import NamedTuple
+
+from .config import APP_CACHE_VAULT, read_config
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+CACHE_DB = APP_CACHE_VAULT / "metadata.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    name TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS builds (
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    build INTEGER NOT NULL,
+    PRIMARY KEY (version, build)
+);
+CREATE INDEX IF NOT EXISTS builds_name ON builds (name);
+"""
+
+
+class CacheEntry(NamedTuple):
+    """A cached response"""
+    body: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+
+class MetadataCache:
+    """Single-file metadata store with validators and LRU eviction"""
+
+    def __init__(self, path: Path, max_size: int | None = None) -> None:
+        self._max_size = max_size
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, name: str) -> CacheEntry | None:
+        """Return a cache entry and mark it as accessed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM entries WHERE name = ?",
+                (name,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE name = ?", (time.time(), name)
+            )
+        return CacheEntry(*row)
+
+    def fetched_at(self, name: str) -> float | None:
+        """Return when an entry was last fetched or revalidated"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM entries WHERE name = ?", (name,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def touch(self, name: str, fetched_at: float | None = None):
+        """Mark an entry as freshly revalidated"""
+        now = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE name = ?",
+                (now, now, name),
+            )
+
+    def put(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        name: str,
+        url: str,
+        body: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        fetched_at: float | None = None,
+    ):
+        """Store an entry, index its builds and evict to fit the size cap"""
+        now = time.time() if fetched_at is None else fetched_at
+        data = loads(body)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (name, url, body, etag, last_modified, now, now, len(body)),
+                )
+                if isinstance(data, dict) and "version" in data and "builds" in data:
+                    self._conn.execute("DELETE FROM builds WHERE version = ?", (data["version"],))
+                    self._conn.executemany(
+                        "INSERT INTO builds VALUES (?, ?, ?)",
+                        ((name, data["version"], build) for build in data["builds"]),
+                    )
+                self._evict(name)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, keep: str):
+        """Drop least recently used entries until the cache fits max_size"""
+        max_size = self._max_size
+        if max_size is None:
+            max_size = read_config().get("cache_max_size", DEFAULT_MAX_SIZE)
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= max_size:
+            return
+        rows = self._conn.execute(
+            "SELECT name, size FROM entries WHERE name != ? ORDER BY accessed_at", (keep,)
+        ).fetchall()
+        for name, size in rows:
+            if total <= max_size:
+                break
+            self._conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM builds WHERE name = ?", (name,))
+            total -= size
+
+    def builds(self) -> dict[str, list[int]]:
+        """Return every indexed build, grouped by version"""
+        with self._lock:
+            rows = self._conn.execute("SELECT version, build FROM builds").fetchall()
+        grouped: dict[str, list[int]] = {}
+        for version, build in rows:
+            grouped.setdefault(version, []).append(build)
+        return grouped
+
+    def latest_builds(self) -> dict[str, int]:
+        """Return the newest known build of every cached version"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, MAX(build) FROM builds GROUP BY version"
+            ).fetchall()
+        return dict(rows)
+
+    def migrate(self, directory: Path):
+        """Import loose *.cache files (and their .meta validators), then remove them"""
+        for cache in directory.glob("*.cache"):
+            meta = cache.with_name(f"{cache.name}.meta")
+            validators = {}
+            if meta.exists():
+                try:
+                    validators = loads(meta.read_text())
+                except ValueError:
+                    pass
+            try:
+                self.put(
+                    cache.name,
+                    "",
+                    cache.read_text(),
+                    validators.get("ETag"),
+                    validators.get("Last-Modified"),
+                    cache.stat().st_mtime,
+                )
+            except ValueError:
+                pass
+            remove(cache)
+            if meta.exists():
+                remove(meta)
+
+
+METADATA = MetadataCache(CACHE_DB)
+METADATA.migrate(APP_CACHE_VAULT)
@@ -0,0 +1,140 @@
+"""Dynamic AppCDS archives per profile, and startup times with and without them"""
+
+import os
+import shutil
+import time
+from hashlib import sha256
+from json import dumps, loads
+from pathlib import Path
+from statistics import median
+from threading import Lock
+
+from .config import APP_CACHE_VAULT, APP_DIR
+
+CDS_DIR = APP_CACHE_VAULT / "cds"
+TIMINGS_FILE = APP_DIR / "startup.json"
+TIMINGS_KEPT = 20
+DUMP_FLAG = "-XX:ArchiveClassesAtExit="
+USE_FLAG = "-XX:SharedArchiveFile="
+OFF, DUMP, USE = "off", "dump", "use"
+
+_TIMINGS_LOCK = Lock()
+
+
+def archive_path(profile: Path) -> Path:
+    """Where a profile's archive lives"""
+    return CDS_DIR / f"{profile.name}.jsa"
+
+
+def _key_path(profile: Path) -> Path:
+    return CDS_DIR / f"{profile.name}.key"
+
+
+def archive_key(profile: Path, args: list[str]) -> str:
+    """Fingerprint of everything an archive depends on: the jar, the java binary and the flags"""
+    jar = (profile / "server.jar").resolve()
+    java = shutil.which(args[0]) or args[0]
+    java = os.path.realpath(java)
+    parts: list = [args]
+    for path in (str(jar), java):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            parts.append([path])
+            continue
+        parts.append([path, stat.st_size, stat.st_mtime_ns])
+    return sha256(dumps(parts).encode()).hexdigest()
+
+
+def archive_ready(profile: Path, args: list[str]) -> bool:
+    """Whether the archive exists and was dumped for this jar, java and flags"""
+    archive = archive_path(profile)
+    key = _key_path(profile)
+    try:
+        if key.read_text(encoding="utf-8") != archive_key(profile, args):
+            return False
+        # Dumped at exit of the run that wrote the key, an older archive is stale
+        return archive.stat().st_mtime_ns >= key.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def cds_flags(profile: Path, args: list[str]) -> list[str]:
+    """Use the profile's archive when it's valid, otherwise dump a fresh one at exit.
+
+    args is the command line without these flags, a change to any of it invalidates
+    the archive."""
+    archive = archive_path(profile)
+    if archive_ready(profile, args):
+        return [f"{USE_FLAG}{archive}"]
+    return [f"{DUMP_FLAG}{archive}"]
+
+
+def prepare(profile: Path, args: list[str]):
+    """Before a launch that dumps an archive, drop the stale one and note what the new
+    one will be valid for"""
+    if mode_of(args) != DUMP:
+        return
+    plain = [arg for arg in args if not arg.startswith((DUMP_FLAG, USE_FLAG))]
+    CDS_DIR.mkdir(exist_ok=True)
+    archive_path(profile).unlink(missing_ok=True)
+    _key_path(profile).write_text(archive_key(profile, plain), encoding="utf-8")
+
+
+def mode_of(args: list[str]) -> str:
+    """Whether a command line uses, dumps or doesn't touch an archive"""
+    for arg in args:
+        if arg.startswith(USE_FLAG):
+            return USE
+        if arg.startswith(DUMP_FLAG):
+            return DUMP
+    return OFF
+
+
+def _load_timings() -> dict[str, list[dict]]:
+    try:
+        return loads(TIMINGS_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def record_startup(profile: str, mode: str, seconds: float):
+    """Remember how long a launch took to reach Done"""
+    with _TIMINGS_LOCK:
+        timings = _load_timings()
+        entries = timings.setdefault(profile, [])
+        entries.append({"time": time.time(), "mode": mode, "seconds": round(seconds, 3)})
+        del entries[:-TIMINGS_KEPT]
+        temp = TIMINGS_FILE.with_name(f"{TIMINGS_FILE.name}.tmp")
+        temp.write_text(dumps(timings), encoding="utf-8")
+        os.replace(temp, TIMINGS_FILE)
+
+
+def startup_report(profile: str) -> dict[str, float | None]:
+    """Median startup seconds of a profile without (off), with (use) and while dumping
+    (dump) the archive"""
+    with _TIMINGS_LOCK:
+        entries = _load_timings().get(profile, [])
+    report: dict[str, float | None] = {}
+    for mode in (OFF, USE, DUMP):
+        seconds = [entry["seconds"] for entry in entries if entry["mode"] == mode]
+        report[mode] = median(seconds) if seconds else None
+    return report
+
+
+def describe(report: dict[str, float | None]) -> str:
+    """One line summary of a startup report.
+
+    Dumping runs load every class the usual way, so they stand in for runs without
+    an archive when there are none."""
+    off, use = report[OFF] or report[DUMP], report[USE]
+    if off is None and use is None:
+        return "no startups recorded yet"
+    text = ", ".join(
+        f"{label} {value:.1f}s"
+        for label, value in (("without archive", off), ("with archive", use))
+        if value is not None
+    )
+    if off and use:
+        text += f" ({(off - use) / off:.0%} faster)"
+    return text
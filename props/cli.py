@@ -0,0 +1,440 @@
+"""Headless command line interface, one JSON object per command on stdout"""
+
+import sys
+from os import readlink
+from os.path import basename
+from argparse import ArgumentParser, Namespace, _SubParsersAction
+from concurrent.futures import wait
+from json import dumps
+from shlex import split
+from subprocess import DEVNULL, call
+from typing import TextIO, TypeAlias
+
+from requests import RequestException
+
+from .backup import list_snapshots, prune, restore, snapshot
+from .cache import METADATA
+from .cds import describe, prepare, startup_report
+from .clone import clone_profile, profile_name
+from .config import APP_CONFIG, config_service, first_run, get_paths, read_config
+from .data import ReturnInfo, ReturnType
+from .jars import collect, usage
+from .launcher import build_args, check_default_profile
+from .logs import log_maintenance
+from .osutils import get_active_version, list_versions, select_version
+from .paper import (
+    GENERIC_FILE,
+    REPOSITORY,
+    VERSION_REPO,
+    fetch_global,
+    fetch_minecraft,
+    fetch_version_info,
+    revalidate_in_background,
+    shutdown_prefetch,
+)
+from .plugins import installed, requested, set_requested, update
+from .prepatch import link_patched, prepatcher, sweep
+
+Subparsers: TypeAlias = _SubParsersAction
+
+
+def _ok(reason: str = "", data=None) -> ReturnInfo:
+    return ReturnInfo(ReturnType.OK, reason, data)
+
+
+def _err(reason: str, data=None) -> ReturnInfo:
+    return ReturnInfo(ReturnType.ERR, reason, data)
+
+
+def resolve_build(version: str, build: str) -> int:
+    """Turn a build argument ('latest' or a number) into a build number"""
+    builds = fetch_version_info(version)["builds"]
+    if build == "latest":
+        return builds[-1]
+    if int(build) not in builds:
+        raise ValueError(f"Build {build} does not exist for {version}")
+    return int(build)
+
+
+def cmd_install(args: Namespace) -> ReturnInfo:
+    """Install a version, optionally making it the default server"""
+    build = resolve_build(args.version, args.build)
+    fetch_minecraft(args.version, build, verbose=False)
+    jar = GENERIC_FILE.format(version=args.version, build=build)
+    data = {"version": args.version, "build": build, "jar": jar}
+    prepatcher.submit(jar)
+    if args.select:
+        selected = select_version(jar)
+        if selected.type == ReturnType.ERR:
+            return _err(selected.reason, data)
+    return _ok(f"Installed {jar}", data)
+
+
+def cmd_select(args: Namespace) -> ReturnInfo:
+    """Make an installed jar the default server"""
+    jar = args.target
+    if args.build is not None:
+        build = resolve_build(args.target, args.build)
+        jar = GENERIC_FILE.format(version=args.target, build=build)
+    selected = select_version(jar)
+    return ReturnInfo(selected.type, selected.reason, {"jar": jar})
+
+
+def cmd_run(args: Namespace) -> ReturnInfo:
+    """Run the default server in the foreground"""
+    check = check_default_profile()
+    if check.type == ReturnType.ERR:
+        return _err(check.reason)
+    built = build_args(read_config(), get_paths().default_profile)
+    if built.type == ReturnType.ERR:
+        return _err(built.reason)
+    data = {"args": built.additional_info, "cwd": str(get_paths().default_profile)}
+    if args.dry_run:
+        return _ok("", data)
+    jar = get_active_version() or ""
+    usage.record(jar, "run")
+    link_patched(get_paths().default_profile, jar)
+    prepare(get_paths().default_profile, built.additional_info)
+    # stdout carries one JSON object per line, and a batch may be reading stdin
+    data["returncode"] = call(
+        built.additional_info,
+        cwd=get_paths().default_profile,
+        stdin=DEVNULL,
+        stdout=sys.stderr,
+    )
+    if data["returncode"] != 0:
+        return _err(f"Server exited with {data['returncode']}", data)
+    return _ok("", data)
+
+
+def cmd_list(args: Namespace) -> ReturnInfo:
+    """List installed jars, and remote versions or builds on request"""
+    jars = list_versions(str(get_paths().bin))
+    if jars.type == ReturnType.ERR:
+        return jars
+    data = {"installed": jars.additional_info, "active": get_active_version()}
+    if args.remote:
+        data["versions"] = fetch_global()["versions"]
+    if args.builds:
+        data["builds"] = fetch_version_info(args.builds)["builds"]
+    return _ok("", data)
+
+
+def cmd_cache_refresh(_: Namespace) -> ReturnInfo:
+    """Revalidate the repository and every cached version in parallel"""
+    names = {"repo.cache": REPOSITORY}
+    for version in METADATA.builds():
+        names[f"v{version}.cache"] = VERSION_REPO.format(version=version)
+    futures = {
+        name: revalidate_in_background(url, name) for name, url in names.items()
+    }
+    wait(futures.values())
+    failed = {
+        name: str(future.exception())
+        for name, future in futures.items()
+        if future.exception() is not None
+    }
+    data = {"refreshed": len(futures) - len(failed), "failed": failed}
+    if failed:
+        return _err(f"{len(failed)} entries could not be refreshed", data)
+    return _ok("", data)
+
+
+def cmd_logs_rotate(args: Namespace) -> ReturnInfo:
+    """Rotate, compress and expire profile logs once"""
+    return _ok("", log_maintenance.run_once(args.profiles))
+
+
+def _profile(name: str | None) -> str:
+    """The given profile, or the one the default server points to"""
+    if name:
+        return name
+    check = check_default_profile()
+    if check.type == ReturnType.ERR:
+        raise ValueError(check.reason)
+    return basename(readlink(get_paths().default_profile))
+
+
+def cmd_backup_create(args: Namespace) -> ReturnInfo:
+    """Snapshot a profile"""
+    manifest = snapshot(_profile(args.profile))
+    return _ok(f"Created snapshot {manifest['id']}", manifest)
+
+
+def cmd_backup_list(args: Namespace) -> ReturnInfo:
+    """List snapshots of a profile"""
+    return _ok("", list_snapshots(_profile(args.profile)))
+
+
+def cmd_backup_restore(args: Namespace) -> ReturnInfo:
+    """Put a profile back to a snapshot"""
+    written = restore(args.profile, args.snapshot)
+    return _ok(f"Restored {args.profile} to {args.snapshot}", {"written": written})
+
+
+def cmd_backup_prune(args: Namespace) -> ReturnInfo:
+    """Drop old snapshots and unreferenced chunks"""
+    return _ok("", prune(args.profile, args.keep))
+
+
+def cmd_clone(args: Namespace) -> ReturnInfo:
+    """Seed a profile from another one"""
+    target = profile_name(args.target)
+    result = clone_profile(_profile(args.source and profile_name(args.source)), target)
+    if args.select:
+        selected = select_version(f"{target}.jar")
+        if selected.type == ReturnType.ERR:
+            return _err(selected.reason, result)
+    return _ok(f"Cloned {result['source']} into {target}", result)
+
+
+def cmd_gc(args: Namespace) -> ReturnInfo:
+    """Delete jars the retention policy doesn't keep"""
+    result = collect(args.dry_run, args.keep, args.days)
+    if not args.dry_run:
+        sweep()
+    verb = "Would remove" if args.dry_run else "Removed"
+    return _ok(f"{verb} {len(result['deleted'])} jars", result)
+
+
+def cmd_prepatch(args: Namespace) -> ReturnInfo:
+    """Run paperclip's patch step for an installed jar now"""
+    jar = args.jar or get_active_version()
+    if not jar:
+        return _err("No jar given and no version selected")
+    prepatcher.patch(jar)
+    return _ok(f"Pre-patched {jar}", {"jar": jar})
+
+
+def cmd_startup(args: Namespace) -> ReturnInfo:
+    """Median startup times of a profile with and without its class data archive"""
+    report = startup_report(_profile(args.profile))
+    return _ok(describe(report), report)
+
+
+def _plugin_result(results: dict[str, dict]) -> ReturnInfo:
+    failed = [profile for profile, result in results.items() if "error" in result]
+    if failed:
+        return _err(f"Plugins of {', '.join(failed)} could not be updated", results)
+    return _ok(f"Updated plugins of {len(results)} profiles", results)
+
+
+def cmd_plugins_list(args: Namespace) -> ReturnInfo:
+    """Requested projects and installed plugin jars of a profile"""
+    profile = _profile(args.profile)
+    return _ok("", {"requested": requested(profile), "installed": installed(profile)})
+
+
+def cmd_plugins_add(args: Namespace) -> ReturnInfo:
+    """Ask for more projects in a profile and install them"""
+    profile = _profile(args.profile)
+    set_requested(profile, requested(profile) + args.projects)
+    return _plugin_result(update([profile]))
+
+
+def cmd_plugins_remove(args: Namespace) -> ReturnInfo:
+    """Stop asking for projects in a profile and remove their jars"""
+    profile = _profile(args.profile)
+    set_requested(profile, [name for name in requested(profile) if name not in args.projects])
+    return _plugin_result(update([profile]))
+
+
+def cmd_plugins_update(args: Namespace) -> ReturnInfo:
+    """Update plugins of several profiles, sharing downloads between them"""
+    profiles = args.profiles
+    if not profiles:
+        profiles = [path.name for path in get_paths().profiles.iterdir() if path.is_dir()]
+        profiles = [profile for profile in profiles if requested(profile)]
+    return _plugin_result(update(profiles))
+
+
+def _run_batch(source: TextIO) -> ReturnInfo:
+    failed = 0
+    total = 0
+    for line in source:
+        argv = split(line, comments=True)
+        if not argv:
+            continue
+        total += 1
+        if argv[0] == "batch":
+            result = emit(line.strip(), _err("Nested batch is not supported"))
+        else:
+            result = execute(argv)
+        failed += result.type != ReturnType.OK
+    data = {"commands": total, "failed": failed}
+    if failed:
+        return _err(f"{failed} of {total} commands failed", data)
+    return _ok("", data)
+
+
+def cmd_batch(args: Namespace) -> ReturnInfo:
+    """Run one command per line from a file (or stdin) in this process"""
+    if args.file == "-":
+        return _run_batch(sys.stdin)
+    with open(args.file, encoding="utf-8") as file:
+        return _run_batch(file)
+
+
+def _add_jar_commands(commands: Subparsers):
+    install = commands.add_parser("install", help="download a version")
+    install.add_argument("version")
+    install.add_argument("build", nargs="?", default="latest")
+    install.add_argument("--select", action="store_true", help="also make it the default")
+    install.set_defaults(func=cmd_install)
+
+    select = commands.add_parser("select", help="make an installed jar the default")
+    select.add_argument("target", help="jar name, or a version when build is given")
+    select.add_argument("build", nargs="?")
+    select.set_defaults(func=cmd_select)
+
+    run = commands.add_parser("run", help="run the default server")
+    run.add_argument("--dry-run", action="store_true", help="only print the command line")
+    run.set_defaults(func=cmd_run)
+
+    listing = commands.add_parser("list", help="list installed jars")
+    listing.add_argument("--remote", action="store_true", help="include available versions")
+    listing.add_argument("--builds", metavar="VERSION", help="include builds of a version")
+    listing.set_defaults(func=cmd_list)
+
+
+def _add_maintenance_commands(commands: Subparsers):
+    cache = commands.add_parser("cache", help="metadata cache operations")
+    cache_commands = cache.add_subparsers(dest="action", required=True)
+    refresh = cache_commands.add_parser("refresh", help="revalidate all cached metadata")
+    refresh.set_defaults(func=cmd_cache_refresh)
+
+    gc = commands.add_parser("gc", help="delete jars nothing uses anymore")
+    gc.add_argument("--dry-run", action="store_true", help="only list what would be deleted")
+    gc.add_argument("--keep", type=int, help="newest builds kept per version")
+    gc.add_argument("--days", type=float, help="keep jars used within this many days")
+    gc.set_defaults(func=cmd_gc)
+
+    startup = commands.add_parser("startup", help="startup times with and without AppCDS")
+    startup.add_argument("profile", nargs="?", help="defaults to the selected one")
+    startup.set_defaults(func=cmd_startup)
+
+    prepatch = commands.add_parser("prepatch", help="run paperclip's patch step ahead of boot")
+    prepatch.add_argument("jar", nargs="?", help="defaults to the selected jar")
+    prepatch.set_defaults(func=cmd_prepatch)
+
+    clone = commands.add_parser("clone", help="seed a profile with another one's data")
+    clone.add_argument("target", help="profile (or jar) to create")
+    clone.add_argument("--from", dest="source", help="profile to copy, the selected one by default")
+    clone.add_argument("--select", action="store_true", help="also make the target the default")
+    clone.set_defaults(func=cmd_clone)
+
+    logs = commands.add_parser("logs", help="profile log maintenance")
+    logs_commands = logs.add_subparsers(dest="action", required=True)
+    rotate = logs_commands.add_parser("rotate", help="rotate, compress and expire logs now")
+    rotate.add_argument("profiles", nargs="*", help="profiles to maintain, all when omitted")
+    rotate.set_defaults(func=cmd_logs_rotate)
+
+
+def _add_backup_commands(commands: Subparsers):
+    backup = commands.add_parser("backup", help="incremental profile snapshots")
+    backup_commands = backup.add_subparsers(dest="action", required=True)
+    create = backup_commands.add_parser("create", help="snapshot a profile")
+    create.add_argument("profile", nargs="?", help="defaults to the selected one")
+    create.set_defaults(func=cmd_backup_create)
+    snapshots = backup_commands.add_parser("list", help="list snapshots of a profile")
+    snapshots.add_argument("profile", nargs="?", help="defaults to the selected one")
+    snapshots.set_defaults(func=cmd_backup_list)
+    restoring = backup_commands.add_parser("restore", help="put a profile back to a snapshot")
+    restoring.add_argument("profile")
+    restoring.add_argument("snapshot")
+    restoring.set_defaults(func=cmd_backup_restore)
+    pruning = backup_commands.add_parser("prune", help="keep only the newest snapshots")
+    pruning.add_argument("profile", nargs="?", help="every profile when omitted")
+    pruning.add_argument("--keep", type=int, help="snapshots to keep, backup_keep by default")
+    pruning.set_defaults(func=cmd_backup_prune)
+
+
+def _add_plugin_commands(commands: Subparsers):
+    plugins = commands.add_parser("plugins", help="plugins of a profile and their dependencies")
+    plugin_commands = plugins.add_subparsers(dest="action", required=True)
+    plugin_list = plugin_commands.add_parser("list", help="requested and installed plugins")
+    plugin_list.add_argument("profile", nargs="?", help="defaults to the selected one")
+    plugin_list.set_defaults(func=cmd_plugins_list)
+    plugin_add = plugin_commands.add_parser("add", help="install projects with dependencies")
+    plugin_add.add_argument("projects", nargs="+", help="project slugs or ids")
+    plugin_add.add_argument("--profile", help="defaults to the selected one")
+    plugin_add.set_defaults(func=cmd_plugins_add)
+    plugin_remove = plugin_commands.add_parser("remove", help="uninstall projects")
+    plugin_remove.add_argument("projects", nargs="+", help="project slugs or ids")
+    plugin_remove.add_argument("--profile", help="defaults to the selected one")
+    plugin_remove.set_defaults(func=cmd_plugins_remove)
+    plugin_update = plugin_commands.add_parser("update", help="update plugins to their newest")
+    plugin_update.add_argument("profiles", nargs="*", help="every profile with plugins if omitted")
+    plugin_update.set_defaults(func=cmd_plugins_update)
+
+
+def build_parser() -> ArgumentParser:
+    """Build the argument parser"""
+    parser = ArgumentParser(prog="main.py", description="Manage PaperMC servers headlessly")
+    parser.add_argument(
+        "--path", help="server directory, overrides the config (and creates it if missing)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    _add_jar_commands(commands)
+    _add_maintenance_commands(commands)
+    _add_backup_commands(commands)
+    _add_plugin_commands(commands)
+
+    batch = commands.add_parser("batch", help="run commands from a file, one per line")
+    batch.add_argument("file", nargs="?", default="-")
+    batch.set_defaults(func=cmd_batch)
+    return parser
+
+
+def emit(command: str, result: ReturnInfo) -> ReturnInfo:
+    """Write a command result as one JSON line"""
+    print(
+        dumps(
+            {
+                "command": command,
+                "ok": result.type == ReturnType.OK,
+                "reason": result.reason,
+                "data": result.additional_info,
+            }
+        ),
+        flush=True,
+    )
+    return result
+
+
+def execute(argv: list[str]) -> ReturnInfo:
+    """Parse and run a single command, reporting its result"""
+    command = " ".join(argv)
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit:
+        return emit(command, _err("Invalid command"))
+    # A batch line without --path runs against the directory the batch was given
+    outer = config_service.path_override
+    if args.path is not None:
+        config_service.override_path(args.path)
+    try:
+        result = args.func(args)
+    except (RequestException, ValueError, KeyError, OSError) as exc:
+        result = _err(f"{type(exc).__name__}: {exc!s}")
+    finally:
+        config_service.override_path(outer)
+    return emit(command, result)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point, returns the exit code"""
+    argv = sys.argv[1:] if argv is None else argv
+    args, _ = build_parser().parse_known_args(argv)
+    if not APP_CONFIG.exists():
+        if args.path is None:
+            emit(" ".join(argv), _err("No config yet, pass --path to create one"))
+            return 1
+        first_run(args.path)
+    try:
+        result = execute(argv)
+    finally:
+        shutdown_prefetch()
+        log_maintenance.shutdown()
+        prepatcher.shutdown(wait=True)
+    return 0 if result.type == ReturnType.OK else 1
@@ -0,0 +1,174 @@
+"""Seed a profile from another one without copying its data when the filesystem allows"""
+
+import errno
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fcntl import ioctl
+from pathlib import Path
+from threading import Lock
+
+from .config import get_paths, read_config
+from .osutils import scan_tree
+from .process import supervisor
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int)
+DEFAULT_WORKERS = 8
+DEFAULT_EXCLUDE = ["logs", "cache", "libraries", "versions", "session.lock", "server.jar"]
+# Never written in place, so a hardlink is as good as a copy
+IMMUTABLE_SUFFIXES = (".jar", ".zip", ".gz")
+# Errors meaning the filesystem (or the pair of them) can't do this at all
+UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS}
+COPY_CHUNK = 64 * 1024 * 1024
+
+
+class _Cloner:
+    """Copy files with the cheapest method that works, remembering which ones don't"""
+
+    def __init__(self) -> None:
+        self.reflink = True
+        self.copy_range = True
+        self.counts = {"reflinked": 0, "linked": 0, "copied": 0, "bytes_copied": 0}
+        self._lock = Lock()
+
+    def _count(self, key: str, size: int = 0):
+        with self._lock:
+            self.counts[key] += 1
+            self.counts["bytes_copied"] += size
+
+    def clone(self, source: str, target: str):
+        """Reflink, hardlink (immutable files) or copy source to target"""
+        if self.reflink and self._try_reflink(source, target):
+            self._count("reflinked")
+            return
+        if source.endswith(IMMUTABLE_SUFFIXES):
+            try:
+                os.link(source, target)
+                self._count("linked")
+                return
+            except OSError:
+                pass
+        self._count("copied", self._copy(source, target))
+        shutil.copystat(source, target)
+
+    def clone_tree(self, origin: Path, staging: Path, exclude: set[str], workers: int) -> int:
+        """Recreate directories and links of origin in staging, clone its files in
+        parallel, return how many files there were"""
+        with ThreadPoolExecutor(workers) as pool:
+            futures = []
+            for name, entry in scan_tree(origin, exclude):
+                path = staging / name
+                if entry.is_symlink():
+                    os.symlink(os.readlink(entry.path), path)
+                elif entry.is_dir(follow_symlinks=False):
+                    path.mkdir()
+                    shutil.copymode(entry.path, path)
+                else:
+                    futures.append(pool.submit(self.clone, entry.path, str(path)))
+            for future in futures:
+                future.result()
+        return len(futures)
+
+    def _try_reflink(self, source: str, target: str) -> bool:
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            try:
+                ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError as exc:
+                if exc.errno in UNSUPPORTED:
+                    self.reflink = False
+                os.unlink(target)
+                return False
+        shutil.copystat(source, target)
+        return True
+
+    def _copy(self, source: str, target: str) -> int:
+        """Copy in the kernel with copy_file_range when possible, return bytes copied"""
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            size = os.fstat(src.fileno()).st_size
+            if self.copy_range:
+                try:
+                    copied = 0
+                    while copied < size:
+                        done = os.copy_file_range(src.fileno(), dst.fileno(), COPY_CHUNK)
+                        if done == 0:
+                            break
+                        copied += done
+                    return copied
+                except OSError as exc:
+                    if exc.errno not in UNSUPPORTED:
+                        raise
+                    self.copy_range = False
+                    src.seek(0)
+                    dst.seek(0)
+                    dst.truncate()
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+            return size
+
+
+def _staging(destination: Path, exclude: set[str]) -> tuple[Path, list[Path]]:
+    """Empty directory to build the clone in, and what destination already holds"""
+    # A profile that was only selected holds its server.jar link and nothing else
+    kept = list(destination.iterdir()) if destination.exists() else []
+    if any(path.name not in exclude for path in kept):
+        raise FileExistsError(f"Profile {destination.name} already has data")
+    staging = destination.with_name(f".{destination.name}.clone")
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir()
+    return staging, kept
+
+
+def _swap_in(staging: Path, destination: Path, kept: list[Path]):
+    """Move what destination held into the finished clone and put it in place"""
+    if destination.exists():
+        for path in kept:
+            os.replace(path, staging / path.name)
+        destination.rmdir()
+    os.replace(staging, destination)
+
+
+def clone_profile(source: str, target: str) -> dict[str, int | float | str]:
+    """Copy profile source into a new (or empty) profile target.
+
+    Reflinks share every block until either side writes to it. Without them
+    immutable files are hardlinked and the rest copied in parallel. The clone
+    is built next to the target and renamed into place, so a failure leaves
+    no half-copied profile behind."""
+    config = read_config()
+    origin = get_paths().profiles / source
+    destination = get_paths().profiles / target
+    exclude = set(config.get("clone_exclude", DEFAULT_EXCLUDE))
+    if not origin.is_dir():
+        raise FileNotFoundError(f"Profile {source} does not exist")
+    staging, kept = _staging(destination, exclude)
+
+    started = time.monotonic()
+    server = supervisor.get(source)
+    paused = server is not None and server.pause_saving()
+    cloner = _Cloner()
+    try:
+        files = cloner.clone_tree(
+            origin, staging, exclude, config.get("clone_workers", DEFAULT_WORKERS)
+        )
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    finally:
+        if paused and server is not None:
+            server.resume_saving()
+
+    _swap_in(staging, destination, kept)
+    return {
+        "source": source,
+        "target": target,
+        "method": "reflink" if cloner.counts["reflinked"] else "hardlink and copy",
+        "files": files,
+        **cloner.counts,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def profile_name(name: str) -> str:
+    """Profiles are named after their jar without the extension"""
+    return Path(name).name.removesuffix(".jar")
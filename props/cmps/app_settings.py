@@ -2,7 +2,7 @@
 
 from curses import window
 import curses
-from props.data import ReturnType, status
+from props.data import ReturnType, status, KEY_ESC
 from props.typings import Config
 from props.config import read_config, write_config
 from ..component import Component
@@ -10,7 +10,6 @@ from ..component import Component
 SPECIAL_KEYS: list[int] = [
     value for key, value in curses.__dict__.items() if key.startswith("KEY")
 ]
-KEY_ESC = 27
 KEY_ENTER = 10
 KEY_BACKSPACE = 127
 
@@ -33,7 +32,7 @@ class Settings(Component):
             ("GUI", str(config.get("gui", False))),
             ("Additional args", " ".join(config.get("additional_args", []))),
             ("Java path", config.get("java_path", "java")),
-            # ("Auto-restart", str(config.get("auto_restart", False))),
+            ("Auto-restart", str(config.get("auto_restart", False))),
             # ("Log path", config.get("log_path", "./logs")),
             ("", ""),
             ("[Save]", ""),
@@ -167,7 +166,7 @@ class Settings(Component):
             config["gui"] = self._fields[3][1] == "True"
             config["additional_args"] = self._fields[4][1].split()
             config["java_path"] = self._fields[5][1]
-            # config["auto_restart"] = self.fields[7][1] == "True"
+            config["auto_restart"] = self._fields[6][1] == "True"
             # config["log_path"] = self.fields[8][1]
             status.set("Config saved successfully.")
             write_config(config)
@@ -0,0 +1,137 @@
+"""Snapshots of the default profile"""
+
+# pylint: disable=no-member
+
+import curses
+import time
+from curses import window
+from os import readlink
+from os.path import basename
+
+from props.backup import list_snapshots, prune, restore, snapshot
+from props.config import get_paths
+from props.launcher import check_default_profile
+from props.process import supervisor
+from props.utility import format_bytes
+from ..component import ListComponent
+from ..data import status, ReturnType, KEY_ESC
+from ..tasks import tasks
+
+
+class Backups(ListComponent):
+    """List snapshots of the default profile, take, restore or prune them"""
+
+    generic_height = 2
+    should_init = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._profile = ""
+        self._snapshots: list[dict] = []
+        # Snapshot waiting for y after R, restoring can't be undone
+        self._confirm: dict | None = None
+        self._key_events.update({
+            curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
+            ord('b'): self.create,
+            ord('R'): self.restore,
+            ord('p'): self.prune,
+        })
+
+    def init(self, stdscr: window):
+        if self._init:
+            return
+        self._init = True
+        check = check_default_profile()
+        if check.type == ReturnType.ERR:
+            status.set(check.reason)
+            return
+        self._profile = basename(readlink(get_paths().default_profile))
+        self.refresh()
+
+    def refresh(self):
+        """Reload the snapshot list"""
+        self._snapshots = list_snapshots(self._profile)
+
+    @property
+    def items(self):
+        return self._snapshots
+
+    def item_label(self, item: dict) -> str:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(item["created"]))
+        return (
+            f"-> {item['id']:<18} {when} {format_bytes(item['size']):>10}"
+            f" {item['changed']} changed in {item['seconds']}s"
+        )[:self.width - 1]
+
+    def create(self):
+        """Snapshot the profile in the background"""
+        tasks.submit(
+            snapshot,
+            self._profile,
+            description=f"Backing up {self._profile}",
+            on_done=self._created,
+        )
+        return ReturnType.CONTINUE
+
+    def _created(self, manifest: dict):
+        status.set(f"Snapshot {manifest['id']} took {manifest['seconds']}s")
+        self.refresh()
+
+    def restore(self):
+        """Ask before restoring the selected snapshot, the server must be stopped"""
+        item = self.selected
+        if item is None:
+            return ReturnType.CONTINUE
+        server = supervisor.get(self._profile)
+        if server is not None and server.running:
+            status.set(f"Stop {self._profile} before restoring it")
+            return ReturnType.CONTINUE
+        self._confirm = item
+        status.set(
+            f"Restore {item['id']}? Files changed or added since are lost, y to confirm"
+        )
+        return ReturnType.CONTINUE
+
+    def handle_key(self, key: int, stdscr: window):
+        if self._confirm is None:
+            return super().handle_key(key, stdscr)
+        item, self._confirm = self._confirm, None
+        if key != ord('y'):
+            status.set("Restore cancelled")
+            return ReturnType.CONTINUE
+        tasks.submit(
+            restore,
+            self._profile,
+            item["id"],
+            description=f"Restoring {item['id']}",
+            on_done=lambda written: status.set(f"Restored {item['id']}, {written} files written"),
+            on_error=lambda exc: status.set(f"Restore failed: {exc}"),
+        )
+        return ReturnType.CONTINUE
+
+    def prune(self):
+        """Keep the newest backup_keep snapshots"""
+        tasks.submit(
+            prune,
+            self._profile,
+            description="Pruning snapshots",
+            on_done=self._pruned,
+        )
+        return ReturnType.CONTINUE
+
+    def _pruned(self, result: dict):
+        status.set(f"Pruned {result['snapshots']} snapshots, freed {format_bytes(result['freed'])}")
+        self.refresh()
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        if not self._profile:
+            return ReturnType.ERR_BACK
+        stdscr.addstr(
+            0, 0, f"Snapshots of {self._profile} (b back up, R restore, p prune)"[:self.width - 1]
+        )
+        if not self._snapshots:
+            stdscr.addstr(self.generic_height, 0, "No snapshots yet")
+        self.show_status(stdscr)
+        self.draw_items(stdscr)
+        return None
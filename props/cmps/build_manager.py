@@ -2,93 +2,102 @@
 
 from curses import window
 import curses
-from props.component import Component
-from props.curseutil import clear_line_yield, hide_system
-from props.paper import fetch_minecraft, fetch_version_info
+from props.component import ListComponent
+from props.install_queue import downloads
+from props.paper import fetch_version_info
+from props.tasks import spinner, tasks
 from props.typings import VersionBuildRepo
-from props.utility import prepare_windowed, windowed
-from ..data import Colors, status, ReturnType, COMMON_TEXT
+from props.utility import ReversedView
+from ..data import status, ReturnType, COMMON_TEXT, KEY_ESC
 
 
-class BuildManager(Component):
+class BuildManager(ListComponent):
     """Version Build component"""
 
     should_init = True
     generic_height = 3
 
-    def __init__(self, version: str) -> None:
+    def __init__(self, version: str, build: int | None = None) -> None:
         super().__init__()
         status.reset()
         self._data: VersionBuildRepo = {}  # type: ignore
-        self._select = 0
+        self._builds: ReversedView[int] = ReversedView(())
         self._version = version
+        self._preselect = build
+        self._failed = False
 
-        self._key_events = {
-            curses.KEY_UP: self.move_up,
-            curses.KEY_DOWN: self.move_down,
+        self._key_events.update({
             curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
             curses.KEY_ENTER: self.syscall,
             10: self.syscall,
             curses.KEY_RIGHT: self.syscall,
-        }
+            ord(' '): self.toggle_mark,
+        })
+
+    @property
+    def items(self):
+        return self._builds
 
     def syscall(self, stdscr: window):
-        """Fetch PaperMC"""
-        builds = tuple(reversed(self._data["builds"]))
-        build = builds[self._select]
-        with hide_system(stdscr):
-            print(f"Installing: PaperMC {self._version}/{build}")
-            try:
-                fetch_minecraft(self._version, build)
-            except KeyboardInterrupt:
-                status.set("Download aborted")
-                return ReturnType.RETURN_TO_MAIN
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                status.set(f"{type(exc).__name__}: {exc!s}")
-                return ReturnType.ERR
-            status.set(f"Installed PaperMC {self._version}-{build}")
-        return ReturnType.RETURN_TO_MAIN
+        """Queue marked builds (or the selected one) for download"""
+        builds = self.marked or [self.selected]
+        if builds[0] is None:
+            return ReturnType.CONTINUE
+        queued = sum(downloads.add(self._version, build) for build in builds)
+        self._marked.clear()
+        status.set(f"Queued {queued} build(s) of {self._version}, see Downloads")
+        return ReturnType.CONTINUE
 
     def draw(self, stdscr: window) -> None | ReturnType:
+        if self._failed:
+            return ReturnType.ERR_BACK
         self.show_status(stdscr)
         stdscr.addstr(0, 0, COMMON_TEXT)
-        builds = tuple(reversed(self._data["builds"]))
-        build = builds[self._select]
+        if not self._data:
+            stdscr.addstr(
+                self.generic_height, 0, f"{spinner()} Fetching build list (Esc to cancel)"
+            )
+            return None
         stdscr.addstr(
             1,
             0,
             (
-                f"Selected: {self._version} / {build}. "
+                f"Selected: {self._version} / {self.selected}. Space to mark, Enter to queue. "
                 "I recommend installing with newest build (usually with higher number)"
             ),
         )
 
-        minln, maxln = prepare_windowed(self._select, self.unreserved_lines)
-        for idx, (rel_index, build_info) in enumerate(windowed(builds, minln, maxln)):
-            style = 0
-            if rel_index == self._select:
-                style = curses.color_pair(Colors.SELECTED)
-            stdscr.addstr(self.generic_height + idx, 0, f"-> {build_info}", style)
+        self.draw_items(stdscr)
+        return None
 
-    def move_up(self):
-        """Move UP"""
-        if self._select > 0:
-            self._select -= 1
-        return ReturnType.CONTINUE
+    def _loaded(self, data: VersionBuildRepo):
+        """Receive fetched data"""
+        self._data = data
+        self._builds = ReversedView(data["builds"])
+        if self._preselect in data["builds"]:
+            self._move_to(len(data["builds"]) - 1 - data["builds"].index(self._preselect))
+            self._preselect = None
 
-    def move_down(self):
-        """Move DOWN"""
-        if self._select < len(self._data["builds"]) - 1:
-            self._select += 1
-        return ReturnType.CONTINUE
+    def _refresh(self, data: VersionBuildRepo):
+        """Swap in revalidated data on the UI thread"""
+        tasks.post(lambda: self._loaded(data))
+
+    def _fail(self, exc: BaseException):
+        """Report fetch failure and leave"""
+        status.set(f"{type(exc).__name__}: {exc!s}")
+        self._failed = True
 
     def init(self, stdscr: window):
         if self._init:
             return
 
-        with clear_line_yield(stdscr, self.height - 1):
-            stdscr.addstr(self.height - 1, 0, "Fetching repository list")
-            stdscr.refresh()
-            self._data = fetch_version_info(self._version)
-
+        self.run_task(
+            fetch_version_info,
+            self._version,
+            self._refresh,
+            description=f"Fetching builds of {self._version}",
+            on_done=self._loaded,
+            on_error=self._fail,
+        )
         self._init = True
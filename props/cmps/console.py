@@ -0,0 +1,104 @@
+"""Server console"""
+
+# pylint: disable=no-member
+
+import curses
+from curses import window
+
+from props.process import ServerProcess, supervisor
+from ..component import Component
+from ..data import status, ReturnType, KEY_ESC
+from .dashboard import Dashboard
+
+KEY_BACKSPACE = 127
+KEY_TAB = 9
+
+
+class Console(Component):
+    """Tail a server's output and send it commands"""
+
+    reserved_lines = 3
+
+    def __init__(self, server: ServerProcess | None = None, title: str = "") -> None:
+        super().__init__()
+        self._server = server
+        self._title = title
+        self._buffer = ""
+        self._scroll = 0
+        self._key_events = {
+            KEY_ESC: self.leave,
+            curses.KEY_ENTER: self.submit,
+            10: self.submit,
+            curses.KEY_BACKSPACE: self.erase,
+            KEY_BACKSPACE: self.erase,
+            curses.KEY_PPAGE: self.page_up,
+            curses.KEY_NPAGE: self.page_down,
+            curses.KEY_END: self.follow,
+            KEY_TAB: self.dashboard,
+        }
+
+    def handle_key(self, key: int, stdscr: window) -> "ReturnType | Component":
+        if key not in self._key_events and 32 <= key < 127:
+            self._buffer += chr(key)
+            return ReturnType.CONTINUE
+        fn = self._key_events.get(key, None)
+        if callable(fn):
+            return fn()  # type: ignore
+        return ReturnType.CONTINUE
+
+    def submit(self):
+        """Send the typed command to the server"""
+        if self._server is None or not self._buffer:
+            return ReturnType.CONTINUE
+        if not self._server.send(self._buffer):
+            status.set("Server is not running")
+        self._buffer = ""
+        self._scroll = 0
+        return ReturnType.CONTINUE
+
+    def erase(self):
+        """Remove the last typed character"""
+        self._buffer = self._buffer[:-1]
+        return ReturnType.CONTINUE
+
+    def page_up(self):
+        """Scroll back one page"""
+        if self._server is not None:
+            limit = max(0, self._server.buffered - self.unreserved_lines)
+            self._scroll = min(limit, self._scroll + self.unreserved_lines)
+        return ReturnType.CONTINUE
+
+    def page_down(self):
+        """Scroll forward one page"""
+        self._scroll = max(0, self._scroll - self.unreserved_lines)
+        return ReturnType.CONTINUE
+
+    def dashboard(self) -> "ReturnType | Component":
+        """Open the resource dashboard of this server"""
+        if self._server is None:
+            return ReturnType.CONTINUE
+        return Dashboard(self._server, self._title)
+
+    def follow(self):
+        """Jump back to the newest output"""
+        self._scroll = 0
+        return ReturnType.CONTINUE
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        server = self._server
+        if server is None:
+            return ReturnType.ERR_BACK
+        restarted = supervisor.get(self._title)
+        if restarted is not None and restarted is not server:
+            server = self._server = restarted  # the watchdog restarted it
+        state = "running" if server.running else f"exited ({server.returncode})"
+        header = f"Console: {self._title} [pid {server.pid}, {state}] Tab for resources"
+        if self._scroll:
+            header += f" scrolled back {self._scroll} lines, End to follow"
+        stdscr.addstr(0, 0, header[:self.width - 1])
+        width = self.width - 1
+        for row, line in enumerate(server.tail(self.unreserved_lines, self._scroll)):
+            stdscr.addstr(1 + row, 0, line[:width])
+        stdscr.addstr(self.height - 2, 0, f"> {self._buffer}"[-width:])
+        self.show_status(stdscr)
+        return None
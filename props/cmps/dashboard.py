@@ -0,0 +1,81 @@
+"""Server resource dashboard"""
+
+# pylint: disable=no-member
+
+import curses
+from curses import window
+
+from props.metrics import TimeSeries, Usage, max_heap, sparkline
+from props.process import ServerProcess, supervisor
+from props.utility import format_bytes
+from ..component import Component
+from ..data import ReturnType, KEY_ESC
+
+
+class Dashboard(Component):
+    """Live CPU, memory, disk and thread usage of a server"""
+
+    def __init__(self, server: ServerProcess, title: str = "") -> None:
+        super().__init__()
+        self._server = server
+        self._title = title
+        self._history = False
+        self._heap = max_heap(server.args)
+        self._key_events = {
+            KEY_ESC: self.leave,
+            curses.KEY_LEFT: self.leave,
+            ord('h'): self.toggle_window,
+        }
+
+    def toggle_window(self):
+        """Switch between the recent and the long window"""
+        self._history = not self._history
+        return ReturnType.CONTINUE
+
+    def _values(self, series: TimeSeries) -> list[float]:
+        return (series.history if self._history else series.recent).values()
+
+    def _header(self, stdscr: window, usage: Usage):
+        width = self.width - 1
+        seconds = usage.span(self._history)
+        state = "running" if self._server.running else f"exited ({self._server.returncode})"
+        stdscr.addstr(0, 0, f"Dashboard: {self._title} [pid {self._server.pid}, {state}]"[:width])
+        stdscr.addstr(
+            1, 0, f"Last {seconds / 60:.1f} min (h to switch window, Esc to go back)"[:width]
+        )
+
+    def _rows(self, usage: Usage) -> list[tuple[str, list[float], int | None]]:
+        """Label, values and sparkline maximum of every row"""
+        rss = usage.rss.last()
+        memory = format_bytes(rss)
+        if self._heap:
+            memory += f" / -Xmx {format_bytes(self._heap)} ({rss * 100 / self._heap:.0f}%)"
+        io = (
+            f"read {format_bytes(usage.read_rate.last())}/s, "
+            f"write {format_bytes(usage.write_rate.last())}/s"
+        )
+        reads = self._values(usage.read_rate)
+        disk = [read + write for read, write in zip(reads, self._values(usage.write_rate))]
+        return [
+            (f"CPU      {usage.cpu.last():.1f}%", self._values(usage.cpu), None),
+            (f"Memory   {memory}", self._values(usage.rss), self._heap),
+            (f"Disk     {io}", disk, None),
+            (f"Threads  {usage.threads.last():.0f}", self._values(usage.threads), None),
+        ]
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        restarted = supervisor.get(self._title)
+        if restarted is not None and restarted is not self._server:
+            self._server = restarted
+            self._heap = max_heap(restarted.args)
+        metrics = self._server.metrics
+        if metrics is None:
+            return ReturnType.ERR_BACK
+        self._header(stdscr, metrics.usage)
+        width = self.width - 1
+        for index, (label, values, maximum) in enumerate(self._rows(metrics.usage)):
+            line = self.generic_height + index * 3
+            stdscr.addstr(line, 0, label[:width])
+            stdscr.addstr(line + 1, 0, sparkline(values, width, maximum))
+        self.show_status(stdscr)
+        return None
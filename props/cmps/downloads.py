@@ -0,0 +1,58 @@
+"""Download queue viewer"""
+
+from curses import window
+import curses
+from props.install_queue import FAILED, QueueItem, downloads
+from ..component import ListComponent
+from ..data import status, ReturnType, KEY_ESC
+
+
+class Downloads(ListComponent):
+    """Show queued downloads, retry or remove them"""
+
+    generic_height = 3
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._items: list[QueueItem] = []
+        self._key_events.update({
+            curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
+            ord('r'): self.retry,
+            ord('x'): self.remove,
+            curses.KEY_DC: self.remove,
+        })
+
+    @property
+    def items(self):
+        return self._items
+
+    def retry(self):
+        """Retry the selected download if it failed"""
+        item = self.selected
+        if item is not None and downloads.retry(item):
+            status.set(f"Retrying {item.label}")
+        return ReturnType.CONTINUE
+
+    def remove(self):
+        """Remove the selected download unless it's running"""
+        item = self.selected
+        if item is not None and not downloads.remove(item):
+            status.set(f"{item.label} is downloading, it can't be removed now")
+        return ReturnType.CONTINUE
+
+    def item_label(self, item: QueueItem) -> str:
+        text = f"-> {item.label:<20} {item.state:<8}"
+        if item.total:
+            text += f" {item.percent:>3}%"
+        if item.state == FAILED:
+            text += f" {item.error}"
+        return text[:self.width - 1]
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        self._items = downloads.items()
+        stdscr.addstr(0, 0, "Downloads (r to retry, x to remove, Esc to go back)")
+        if not self._items:
+            stdscr.addstr(self.generic_height, 0, "Nothing queued")
+        self.show_status(stdscr)
+        self.draw_items(stdscr)
@@ -0,0 +1,40 @@
+"""Restart history"""
+
+# pylint: disable=no-member
+
+import curses
+import time
+from curses import window
+
+from props.watchdog import history
+from ..component import ListComponent
+from ..data import ReturnType, KEY_ESC
+
+
+class RestartHistory(ListComponent):
+    """Show what the watchdog did, newest first"""
+
+    generic_height = 2
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._entries = history()
+        self._key_events.update({
+            curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
+        })
+
+    @property
+    def items(self):
+        return self._entries
+
+    def item_label(self, item: dict) -> str:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(item["time"]))
+        return f"-> {when} {item['profile']} {item['event']}: {item['reason']}"[:self.width - 1]
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        stdscr.addstr(0, 0, "Restart history (Esc to go back)")
+        if not self._entries:
+            stdscr.addstr(self.generic_height, 0, "No restarts recorded")
+        self.show_status(stdscr)
+        self.draw_items(stdscr)
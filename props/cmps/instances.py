@@ -0,0 +1,110 @@
+"""Instance manager"""
+
+# pylint: disable=no-member
+
+import curses
+from curses import window
+
+from props.instances import format_cpus, list_profiles, start_instance, watchdogs
+from props.process import supervisor
+from ..component import ListComponent
+from ..data import status, ReturnType, Colors, KEY_ESC
+from .console import Console
+from .dashboard import Dashboard
+from .history import RestartHistory
+
+KEY_TAB = 9
+
+
+class Instances(ListComponent):
+    """Start, stop and attach to servers of any profile"""
+
+    generic_height = 3
+
+    def __init__(self) -> None:
+        super().__init__()
+        status.reset()
+        self._profiles = list_profiles()
+        self._key_events.update({
+            curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
+            curses.KEY_ENTER: self.call,
+            10: self.call,
+            curses.KEY_RIGHT: self.call,
+            ord('x'): self.stop,
+            KEY_TAB: self.dashboard,
+            ord('h'): RestartHistory,
+        })
+
+    @property
+    def items(self):
+        return self._profiles
+
+    def item_label(self, item: str) -> str:
+        server = supervisor.get(item)
+        watchdog = watchdogs.get(item)
+        if server is None or not server.running:
+            state = watchdog.state if watchdog is not None and watchdog.active else "stopped"
+            return f"-> {item:<28} {state}"
+        return (
+            f"-> {item:<28} running  pid {server.pid:<8} "
+            f"port {server.port}  CPUs {format_cpus(server.cpus)}"
+        )
+
+    def item_style(self, index: int, item: str) -> int:
+        server = supervisor.get(item)
+        if index != self._select and server is not None and server.running:
+            return curses.color_pair(Colors.ACTIVE)
+        return super().item_style(index, item)
+
+    def call(self) -> Console | ReturnType:
+        """Start the selected profile, or open its console"""
+        name = self.selected
+        if name is None:
+            return ReturnType.CONTINUE
+        try:
+            started = start_instance(name)
+        except OSError as exc:
+            status.set(f"Failed to run {name}: {exc}")
+            return ReturnType.CONTINUE
+        status.set(started.reason)
+        if started.type == ReturnType.ERR or started.additional_info is None:
+            return ReturnType.CONTINUE
+        return Console(started.additional_info, name)
+
+    def stop(self):
+        """Stop the selected instance in the background"""
+        name = self.selected
+        server = supervisor.get(name) if name is not None else None
+        if server is None or not server.running:
+            return ReturnType.CONTINUE
+        self.run_task(
+            server.stop,
+            description=f"Stopping {name}",
+            on_done=lambda _: status.set(f"{name} stopped ({server.returncode})"),
+        )
+        return ReturnType.CONTINUE
+
+    def dashboard(self) -> Dashboard | ReturnType:
+        """Open the resource dashboard of the selected instance"""
+        name = self.selected
+        server = supervisor.get(name) if name is not None else None
+        if server is None:
+            return ReturnType.CONTINUE
+        return Dashboard(server, name)
+
+    def leave(self):
+        # Stopping continues after leaving this screen
+        self._tasks.clear()
+        return ReturnType.BACK
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        stdscr.addstr(
+            0,
+            0,
+            "Instances (Enter to start or attach, x to stop, Tab for resources, h for restarts)",
+        )
+        running = len(supervisor.running())
+        stdscr.addstr(1, 0, f"{running} running of {len(self._profiles)} profiles")
+        self.show_status(stdscr)
+        self.draw_items(stdscr)
@@ -0,0 +1,110 @@
+"""Per-profile JVM settings"""
+
+# pylint: disable=no-member
+
+import curses
+from curses import window
+from os import readlink
+from os.path import basename
+from textwrap import wrap
+
+from props.cds import archive_ready, describe, startup_report
+from props.config import get_paths, read_config
+from props.jvm import LARGE_PAGE_MODES, MEMORY_MODES, PRESETS, load_settings, save_settings
+from props.launcher import check_default_profile, command_line
+from props.typings import ProfileSettings
+from ..component import ListComponent
+from ..data import status, ReturnType, KEY_ESC
+
+FIELDS = (
+    ("Preset", "preset", tuple(PRESETS)),
+    ("Heap", "memory", MEMORY_MODES),
+    ("Always pre-touch", "pretouch", (False, True)),
+    ("Large pages", "large_pages", LARGE_PAGE_MODES),
+    ("Class data sharing", "appcds", (False, True)),
+)
+
+
+class JvmSettings(ListComponent):
+    """Edit launch settings of the default profile, with a dry run of the command line"""
+
+    should_init = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._settings: ProfileSettings | None = None
+        self._profile = ""
+        self._key_events.update({
+            curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
+            curses.KEY_ENTER: self.cycle,
+            10: self.cycle,
+            curses.KEY_RIGHT: self.cycle,
+            ord(' '): self.cycle,
+            ord('s'): self.save,
+        })
+
+    def init(self, stdscr: window):
+        if self._init:
+            return
+        self._init = True
+        check = check_default_profile()
+        if check.type == ReturnType.ERR:
+            status.set(check.reason)
+            return
+        self._profile = basename(readlink(get_paths().default_profile))
+        self._settings = load_settings(get_paths().default_profile)
+
+    @property
+    def items(self):
+        return FIELDS
+
+    def item_label(self, item: tuple) -> str:
+        label, key, _ = item
+        assert self._settings is not None
+        value = self._settings[key]
+        if isinstance(value, dict):
+            value = f"{value['min']}G-{value['max']}G"
+        elif isinstance(value, bool):
+            value = "on" if value else "off"
+        return f"-> {label:<18} {value}"
+
+    def cycle(self):
+        """Switch the selected field to its next value"""
+        _, key, choices = self.selected
+        assert self._settings is not None
+        current = self._settings[key]
+        index = choices.index(current) + 1 if current in choices else 0
+        self._settings[key] = choices[index % len(choices)]  # type: ignore
+        return ReturnType.CONTINUE
+
+    def save(self):
+        """Save settings into the profile"""
+        if self._settings is not None:
+            save_settings(get_paths().default_profile, self._settings)
+            status.set(f"Saved launch settings of {self._profile}")
+        return ReturnType.CONTINUE
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        if self._settings is None:
+            return ReturnType.ERR_BACK
+        width = self.width - 1
+        stdscr.addstr(0, 0, f"JVM settings of {self._profile} (Enter to change, s to save)"[:width])
+        self.draw_items(stdscr)
+
+        line = self.generic_height + len(FIELDS) + 1
+        extra = " ".join(self._settings["additional_args"]) or "none"
+        stdscr.addstr(line, 0, f"Extra args (in sheetstack.yaml): {extra}"[:width])
+        built = command_line(read_config(), self._settings)
+        if self._settings["appcds"] and built.type == ReturnType.OK:
+            ready = archive_ready(get_paths().default_profile, built.additional_info)
+            archive = "ready" if ready else "dumped when the server next stops"
+            stdscr.addstr(line + 1, 0, f"Class data archive: {archive}"[:width])
+        startup = describe(startup_report(self._profile))
+        stdscr.addstr(line + 2, 0, f"Startup: {startup}"[:width])
+        stdscr.addstr(line + 4, 0, "Command line (before class data flags):")
+        text = " ".join(built.additional_info) if built.type == ReturnType.OK else built.reason
+        for row, part in enumerate(wrap(text, width)[:self.height - line - 6]):
+            stdscr.addstr(line + 5 + row, 0, part)
+        self.show_status(stdscr)
+        return None
@@ -6,25 +6,38 @@ import curses
 from curses import window
 from typing import Type
 
+from ..install_queue import downloads
 from ..osutils import get_active_version
 from ..data import ReturnType, status, Colors
 from ..component import Component, MenuComponent
 
 from .version_group import VersionGroupManager
+from .search import Search
+from .downloads import Downloads
 from .manager import Manager
 from .server import Server
+from .instances import Instances
+from .backups import Backups
+from .plugins import Plugins
 from .shell import Shell
 # from .halt5s import Halt5s
 from .app_settings import Settings
+from .jvm_settings import JvmSettings
 from .help import Help
 from .app_exit import Exit
 
 ENTRIES: list[tuple[str, Type[Component]]] = [
     ("Install new version", VersionGroupManager),
+    ("Search builds", Search),
+    ("Downloads", Downloads),
     ("Select version", Manager),
     ("Run", Server),
+    ("Instances", Instances),
+    ("Backups", Backups),
+    ("Plugins", Plugins),
     ("Shell", Shell),
     ("App Settings", Settings),
+    ("JVM Settings", JvmSettings),
     ("Help", Help),
     # ("Halt 5s", Halt5s),
     ("Exit", Exit),
@@ -60,7 +73,9 @@ class Root(MenuComponent):
                 0,
                 f"Current server version: {version.replace('.jar', '').replace('paper-', '')}",
             )
-        stdscr.addstr(self.height - 1, 0, status.get())
+        stdscr.addstr(
+            self.height - 1, 0, f"{downloads.summary()} {status.get()}".strip()[:self.width - 1]
+        )
 
         for idx, (label, _) in enumerate(ENTRIES):
             style = 0
@@ -2,20 +2,18 @@
 
 import curses
 from curses import window
-from props.config import DEFAULT_PROFILE, DEFAULT_SYMLINK, PROFILE_DIR, SERVER_BIN
+from props.clone import clone_profile, profile_name
+from props.config import get_paths
 from props.errors import ReturnError
-from props.osutils import (
-    create_profile,
-    create_symlink,
-    get_active_version,
-    list_versions,
-)
-from props.utility import prepare_windowed, windowed
-from ..component import Component
+from props.jars import collect
+from props.osutils import get_active_version, list_versions, select_version
+from props.prepatch import sweep
+from props.utility import format_bytes
+from ..component import ListComponent
 from ..data import Colors, ReturnType, status
 
 
-class Manager(Component):
+class Manager(ListComponent):
     """Manage active version"""
 
     generic_height = 3
@@ -23,48 +21,76 @@ class Manager(Component):
     def __init__(self) -> None:
         super().__init__()
         status.reset()
-        self._metadata = list_versions(str(SERVER_BIN))
+        self._metadata = list_versions(str(get_paths().bin))
         if self._metadata.type == ReturnType.ERR:
             raise ReturnError(self._metadata.reason)
         self._installed: list[str] = self._metadata.additional_info  # type: ignore
         self._current = get_active_version()
-        self._select = 0
 
-        self._key_events = {
-            curses.KEY_UP: self.move_up,
-            curses.KEY_DOWN: self.move_down,
+        self._key_events.update({
             curses.KEY_LEFT: self.leave,
             curses.KEY_ENTER: self.select,
             10: self.select,
             curses.KEY_RIGHT: self.select,
-        }
+            ord('c'): self.clone,
+            ord('g'): self.collect,
+        })
+
+    @property
+    def items(self):
+        return self._installed
 
     def select(self):
         """Select active function"""
-        ver = self._installed[self._select]
-        create_profile(ver)
-        create_symlink(str(PROFILE_DIR / ver.replace(".jar", "")), str(DEFAULT_PROFILE))
-        rt = create_symlink(str(SERVER_BIN / ver), str(DEFAULT_SYMLINK))
+        ver = self.selected
+        if ver is None:
+            return ReturnType.CONTINUE
+        rt = select_version(ver)
         status.set(rt.reason)
         if rt.type == ReturnType.OK:
             return ReturnType.BACK
         return rt.type
 
-    def move_up(self):
-        """Move selection UP"""
-        if self._select > 0:
-            self._select -= 1
+    def clone(self):
+        """Seed the selected version's profile with the current one's data, then select it"""
+        ver = self.selected
+        if ver is None or self._current is None or ver == self._current:
+            status.set("Select a version other than the current one to clone into")
+            return ReturnType.CONTINUE
+        self.run_task(
+            clone_profile,
+            profile_name(self._current),
+            profile_name(ver),
+            description=f"Cloning into {profile_name(ver)}",
+            on_done=lambda result: self._cloned(ver, result),
+        )
         return ReturnType.CONTINUE
 
-    def move_down(self):
-        """Move selection DOWN"""
-        if self._select < len(self._installed) - 1:
-            self._select += 1
+    def _cloned(self, ver: str, result: dict):
+        selected = select_version(ver)
+        if selected.type == ReturnType.ERR:
+            status.set(selected.reason)
+            return
+        self._current = ver
+        status.set(
+            f"Cloned {result['source']} into {result['target']} in {result['seconds']}s"
+            f" ({result['method']}), now selected"
+        )
+
+    def collect(self):
+        """Delete jars the retention policy doesn't keep"""
+        self.run_task(collect, description="Removing unused jars", on_done=self._collected)
         return ReturnType.CONTINUE
 
+    def _collected(self, result: dict):
+        sweep()
+        removed = set(result["deleted"])
+        self._installed = [jar for jar in self._installed if jar not in removed]
+        status.set(f"Removed {len(removed)} jars, freed {format_bytes(result['freed'])}")
+
     def draw(self, stdscr: window) -> None | ReturnType:
         version = get_active_version()
-        stdscr.addstr("Select PaperMC version to chose")
+        stdscr.addstr("Select PaperMC version to chose (c clones the current profile, g cleans up)")
         if version:
             stdscr.addstr(
                 1,
@@ -73,12 +99,9 @@ class Manager(Component):
             )
         self.show_status(stdscr)
 
-        minln, maxln = prepare_windowed(self._select, self.unreserved_lines)
-        for idx, (rel_index, ver) in enumerate(windowed(self._installed, minln, maxln)):
-            style = 0
-            if ver == self._current:
-                style = curses.color_pair(Colors.ACTIVE)
-            if rel_index == self._select:
-                style = curses.color_pair(Colors.SELECTED)
+        self.draw_items(stdscr)
 
-            stdscr.addstr(self.generic_height + idx, 0, f"-> {ver}", style)
+    def item_style(self, index: int, item: str) -> int:
+        if index != self._select and item == self._current:
+            return curses.color_pair(Colors.ACTIVE)
+        return super().item_style(index, item)
@@ -0,0 +1,144 @@
+"""Plugins of the default profile"""
+
+# pylint: disable=no-member
+
+import curses
+from curses import window
+from os import readlink
+from os.path import basename
+
+from props.config import get_paths
+from props.launcher import check_default_profile
+from props.plugins import installed, requested, set_requested, update
+from ..component import ListComponent
+from ..data import status, ReturnType, KEY_ESC
+from ..tasks import tasks
+
+KEY_BACKSPACE = 127
+
+
+class Plugins(ListComponent):
+    """List the projects the default profile asks for, add, remove and update them"""
+
+    generic_height = 3
+    should_init = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._profile = ""
+        self._requested: list[str] = []
+        self._installed: list[str] = []
+        # Project being typed after pressing a, None when not adding
+        self._adding: str | None = None
+        self._key_events.update({
+            curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
+            ord('a'): self.add,
+            ord('x'): self.remove,
+            ord('u'): self.update,
+            ord('U'): self.update_all,
+        })
+
+    def init(self, stdscr: window):
+        if self._init:
+            return
+        self._init = True
+        check = check_default_profile()
+        if check.type == ReturnType.ERR:
+            status.set(check.reason)
+            return
+        self._profile = basename(readlink(get_paths().default_profile))
+        self.refresh()
+
+    def refresh(self):
+        """Reload requested projects and installed jars"""
+        self._requested = requested(self._profile)
+        self._installed = sorted(installed(self._profile))
+
+    @property
+    def items(self):
+        return self._requested
+
+    def item_label(self, item: str) -> str:
+        return f"-> {item}"[:self.width - 1]
+
+    def handle_key(self, key: int, stdscr: window):
+        if self._adding is None:
+            return super().handle_key(key, stdscr)
+        if key == KEY_ESC:
+            self._adding = None
+        elif key in (curses.KEY_ENTER, 10):
+            project, self._adding = self._adding.strip(), None
+            if project:
+                set_requested(self._profile, [*self._requested, project])
+                self.refresh()
+                self.update()
+        elif key in (curses.KEY_BACKSPACE, KEY_BACKSPACE):
+            self._adding = self._adding[:-1]
+        elif 32 <= key < 127:
+            self._adding += chr(key)
+        return ReturnType.CONTINUE
+
+    def add(self):
+        """Start typing a project slug or id"""
+        self._adding = ""
+        return ReturnType.CONTINUE
+
+    def remove(self):
+        """Stop asking for the selected project and update"""
+        item = self.selected
+        if item is None:
+            return ReturnType.CONTINUE
+        set_requested(self._profile, [name for name in self._requested if name != item])
+        self.refresh()
+        self.move_home()
+        return self.update()
+
+    def update(self):
+        """Resolve and install the plugins of this profile in the background"""
+        self._submit([self._profile])
+        return ReturnType.CONTINUE
+
+    def update_all(self):
+        """Update every profile that has plugins, sharing downloads between them"""
+        profiles = [path.name for path in get_paths().profiles.iterdir() if path.is_dir()]
+        self._submit([profile for profile in profiles if requested(profile)])
+        return ReturnType.CONTINUE
+
+    def _submit(self, profiles: list[str]):
+        tasks.submit(
+            update,
+            profiles,
+            description=f"Updating plugins of {len(profiles)} profiles",
+            on_done=self._updated,
+            on_error=lambda exc: status.set(f"Plugin update failed: {exc}"),
+        )
+
+    def _updated(self, results: dict[str, dict]):
+        failed = {profile: result for profile, result in results.items() if "error" in result}
+        if failed:
+            profile, result = next(iter(failed.items()))
+            status.set(f"{len(failed)} profiles failed, {profile}: {result['error']}")
+        else:
+            conflicts = sum(len(result["conflicts"]) for result in results.values())
+            note = f", {conflicts} jars left alone as they weren't ours" if conflicts else ""
+            status.set(f"Updated plugins of {len(results)} profiles{note}")
+        self.refresh()
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        if not self._profile:
+            return ReturnType.ERR_BACK
+        stdscr.addstr(
+            0, 0,
+            f"Plugins of {self._profile} (a add, x remove, u update, U update all)"[:self.width - 1]
+        )
+        if self._adding is not None:
+            line = f"Add project: {self._adding}_ (Enter to add, Esc to cancel)"
+        else:
+            line = f"Installed: {', '.join(self._installed) or 'nothing yet'}"
+        stdscr.addstr(1, 0, line[:self.width - 1])
+        if not self._requested:
+            stdscr.addstr(self.generic_height, 0, "No plugins requested yet")
+        self.show_status(stdscr)
+        self.draw_items(stdscr)
+        return None
@@ -0,0 +1,69 @@
+"""Search component"""
+
+# pylint: disable=no-member
+
+import curses
+from curses import window
+
+from props.search import SearchIndex, SearchEntry
+from ..component import Component, ListComponent
+from ..data import status, ReturnType, KEY_ESC
+from .build_manager import BuildManager
+
+KEY_BACKSPACE = 127
+
+
+class Search(ListComponent):
+    """Type to filter cached versions and builds"""
+
+    generic_height = 3
+
+    def __init__(self) -> None:
+        super().__init__()
+        status.reset()
+        self._index = SearchIndex.from_cache()
+        self._query = ""
+        self._results = self._index.search("")
+        self._key_events.update({
+            curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
+            curses.KEY_ENTER: self.call,
+            10: self.call,
+            curses.KEY_RIGHT: self.call,
+            curses.KEY_BACKSPACE: self.erase,
+            KEY_BACKSPACE: self.erase,
+        })
+        if not self._index:
+            status.set("Nothing cached yet, browse 'Install new version' first")
+
+    @property
+    def items(self):
+        return self._results
+
+    def item_label(self, item: SearchEntry) -> str:
+        return f"-> {item.label}"
+
+    def erase(self):
+        """Remove the last character of the query"""
+        self._query = self._query[:-1]
+        self._results = self._index.search(self._query)
+        return self.move_home()
+
+    def handle_key(self, key: int, stdscr: window) -> "ReturnType | Component":
+        if key != ord("q") and key not in self._key_events and 32 <= key < 127:
+            self._query += chr(key)
+            self._results = self._index.search(self._query)
+            return self.move_home()
+        return super().handle_key(key, stdscr)
+
+    def call(self) -> Component | ReturnType:
+        entry = self.selected
+        if entry is None:
+            return ReturnType.CONTINUE
+        return BuildManager(entry.version, entry.build)
+
+    def draw(self, stdscr: window) -> None | ReturnType:
+        stdscr.addstr(0, 0, "Search versions and builds (type to filter, Enter to open)")
+        stdscr.addstr(1, 0, f"Query: {self._query}_ ({len(self._results)} matches)")
+        self.show_status(stdscr)
+        self.draw_items(stdscr)
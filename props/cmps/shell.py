@@ -7,7 +7,7 @@ from subprocess import call as subprocess
 
 from props.curseutil import hide_system
 from props.data import ReturnType
-from props.config import SERVER_PATH
+from props.config import get_paths
 from ..component import Component
 
 class Shell(Component):
@@ -16,7 +16,7 @@ class Shell(Component):
 
     def draw(self, stdscr: window) -> None | ReturnType:
         with hide_system(stdscr):
-            chdir(SERVER_PATH)
+            chdir(get_paths().root)
             returncode = subprocess(environ.get("SHELL", "/bin/sh"))
             input(f"\n[Return code {returncode}] Press enter to return to app... ")
         return ReturnType.OK
@@ -3,16 +3,15 @@
 from curses import window
 import curses
 from props.component import Component
-from props.curseutil import clear_line_yield
 from props.paper import fetch_global
+from props.tasks import spinner, tasks
 from props.typings import GlobalRepo
-from props.utility import prepare_windowed, windowed
-from ..component import MenuComponent
-from ..data import Colors, status, ReturnType, COMMON_TEXT
+from ..component import ListComponent
+from ..data import status, ReturnType, COMMON_TEXT, KEY_ESC
 from .version_manager import VersionManager
 
 
-class VersionGroupManager(MenuComponent):
+class VersionGroupManager(ListComponent):
     """Version group component"""
 
     should_init = True
@@ -20,49 +19,61 @@ class VersionGroupManager(MenuComponent):
     def __init__(self) -> None:
         super().__init__()
         self._data: GlobalRepo = {}  # type: ignore
+        self._failed = False
         status.reset()
 
-        self._key_events = {
-            curses.KEY_UP: self.move_up,
-            curses.KEY_DOWN: self.move_down,
+        self._key_events.update({
             curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
             curses.KEY_ENTER: self.call,
             10: self.call,
             curses.KEY_RIGHT: self.call,
-        }
+        })
+
+    @property
+    def items(self):
+        return self._data.get("version_groups", ())
 
     def draw(self, stdscr: window) -> None | ReturnType:
+        if self._failed:
+            return ReturnType.ERR_BACK
         stdscr.addstr(0, 0, COMMON_TEXT)
+        if not self._data:
+            stdscr.addstr(
+                self.generic_height, 0, f"{spinner()} Fetching repository list (Esc to cancel)"
+            )
+            return None
 
-        minln, maxln = prepare_windowed(self._select, self.unreserved_lines)
-        for idx, (rel_index, version) in enumerate(
-            windowed(self._data["version_groups"], minln, maxln)
-        ):
-            style = 0
-            if rel_index == self._select:
-                style = curses.color_pair(Colors.SELECTED)
-            stdscr.addstr(self.generic_height + idx, 0, f"-> {version}", style)
+        self.draw_items(stdscr)
+        return None
 
-    def move_up(self):
-        if self._select > 0:
-            self._select -= 1
-        return ReturnType.CONTINUE
+    def call(self) -> Component | ReturnType:
+        if not self._data:
+            return ReturnType.CONTINUE
+        return VersionManager(self.selected, self._data)
 
-    def move_down(self):
-        if self._select < len(self._data["version_groups"]) - 1:
-            self._select += 1
-        return ReturnType.CONTINUE
+    def _loaded(self, data: GlobalRepo):
+        """Receive fetched data"""
+        self._data = data
 
-    def call(self) -> Component | ReturnType:
-        return VersionManager(self._data["version_groups"][self._select], self._data)
+    def _refresh(self, data: GlobalRepo):
+        """Swap in revalidated data on the UI thread"""
+        tasks.post(lambda: self._loaded(data))
+
+    def _fail(self, exc: BaseException):
+        """Report fetch failure and leave"""
+        status.set(f"{type(exc).__name__}: {exc!s}")
+        self._failed = True
 
     def init(self, stdscr: window):
         if self._init:
             return
 
-        with clear_line_yield(stdscr, self.height - 1):
-            stdscr.addstr(self.height - 1, 0, "Fetching repository list")
-            stdscr.refresh()
-            self._data = fetch_global()
-
+        self.run_task(
+            fetch_global,
+            self._refresh,
+            description="Fetching repository list",
+            on_done=self._loaded,
+            on_error=self._fail,
+        )
         self._init = True
@@ -2,13 +2,14 @@
 
 from curses import window
 import curses
+from props.install_queue import downloads
+from props.paper import prefetch_version_info
 from props.typings import GlobalRepo
-from props.utility import prepare_windowed, windowed
-from ..component import Component, MenuComponent
-from ..data import Colors, status, ReturnType, COMMON_TEXT
+from ..component import Component, ListComponent
+from ..data import status, ReturnType, COMMON_TEXT, KEY_ESC
 from .build_manager import BuildManager
 
-class VersionManager(MenuComponent):
+class VersionManager(ListComponent):
     """Version manager"""
 
     should_init = False
@@ -21,38 +22,36 @@ class VersionManager(MenuComponent):
             filter(lambda ver: ver.startswith(selected), data["versions"])
         )
         self._selected = selected
+        prefetch_version_info(reversed(self._verlist))
         status.reset()
-        self._key_events = {
-            curses.KEY_UP: self.move_up,
-            curses.KEY_DOWN: self.move_down,
+        self._key_events.update({
             curses.KEY_LEFT: self.leave,
+            KEY_ESC: self.leave,
             curses.KEY_ENTER: self.call,
             10: self.call,
             curses.KEY_RIGHT: self.call,
-        }
+            ord(' '): self.toggle_mark,
+        })
+
+    @property
+    def items(self):
+        return self._verlist
 
     def draw(self, stdscr: window) -> None | ReturnType:
         stdscr.addstr(0, 0, COMMON_TEXT)
-        stdscr.addstr(1, 0, f"Selected: {self._selected}")
-
-        minln, maxln = prepare_windowed(self._select, self.unreserved_lines)
-        for idx, (rel_index, version) in enumerate(
-            windowed(self._verlist, minln, maxln)
-        ):
-            style = 0
-            if rel_index == self._select:
-                style = curses.color_pair(Colors.SELECTED)
-            stdscr.addstr(self.generic_height + idx, 0, f"-> {version}", style)
-
-    def move_up(self):
-        if self._select > 0:
-            self._select -= 1
-        return ReturnType.CONTINUE
-
-    def move_down(self):
-        if self._select < len(self._verlist) - 1:
-            self._select += 1
-        return ReturnType.CONTINUE
+        stdscr.addstr(
+            1, 0, f"Selected: {self._selected} (Space to mark, Enter queues latest of marked)"
+        )
+        self.show_status(stdscr)
+
+        self.draw_items(stdscr)
 
     def call(self) -> Component | ReturnType:
-        return BuildManager(self._verlist[self._select])
+        if self.selected is None:
+            return ReturnType.CONTINUE
+        if self._marked:
+            queued = sum(downloads.add(version) for version in self.marked)
+            self._marked.clear()
+            status.set(f"Queued latest build of {queued} version(s), see Downloads")
+            return ReturnType.CONTINUE
+        return BuildManager(self.selected)
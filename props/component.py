@@ -2,12 +2,14 @@
 # pylint: disable=no-member,unused-import,unused-argument
 from inspect import signature
 import curses
-from os import get_terminal_size
-from typing import Callable, TypeAlias, TypeIs
+from typing import Any, Callable, Iterator, Sequence, TypeAlias, TypeIs
 
 from props.curseutil import clear_line
 
-from .data import ReturnType, status
+from .data import ReturnType, Colors, status
+from .frame import frame
+from .install_queue import downloads
+from .tasks import Task, tasks, spinner
 
 DefaultCallback: TypeAlias = "Callable[[], ReturnType | Component]"
 WinCallback: TypeAlias = "Callable[[curses.window], ReturnType]"
@@ -28,6 +30,7 @@ class Component:
     def __init__(self) -> None:
         self._key_events: "dict[int, DefaultCallback | WinCallback]" = {}
         self._init = False
+        self._tasks: list[Task] = []
 
     def draw(self, stdscr: curses.window) -> None | ReturnType:
         """Draw this component"""
@@ -48,14 +51,39 @@ class Component:
         """Show statuses"""
         height = self.height
         clear_line(stdscr, height - 1)
-        stdscr.addstr(height -1, 0, status.get())
+        text = status.get()
+        running = tasks.active()
+        if running:
+            text = f"{spinner()} {running[-1].description} {text}"
+        queue = downloads.summary()
+        if queue:
+            text = f"{queue} {text}"
+        stdscr.addstr(height -1, 0, text[:self.width - 1])
+
+    def run_task(
+        self,
+        fn: Callable,
+        *args,
+        description: str = "",
+        on_done: Callable | None = None,
+        on_error: Callable | None = None,
+    ) -> Task:
+        """Run fn in background, cancelled when leaving this component"""
+        task = tasks.submit(
+            fn, *args, description=description, on_done=on_done, on_error=on_error
+        )
+        self._tasks.append(task)
+        return task
 
     def syscall(self, stdscr: curses.window) -> ReturnType:
         """Do whatever you want."""
         return ReturnType.OK
 
     def leave(self):
-        """Leave this component"""
+        """Leave this component, cancelling its background tasks"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
         return ReturnType.BACK
 
     def init(self, stdscr: curses.window):
@@ -64,8 +92,8 @@ class Component:
 
     @property
     def term_size(self):
-        """Return terminal size"""
-        return get_terminal_size()
+        """Return terminal size, cached until the terminal is resized"""
+        return frame.size
 
     @property
     def height(self):
@@ -99,3 +127,110 @@ class MenuComponent(Component):
     def move_down(self):
         """Move the selection DOWN"""
         raise NotImplementedError
+
+class ListComponent(MenuComponent):
+    """Menu over a sequence that only touches the visible rows.
+
+    The sequence is never copied, the viewport follows the selection and
+    PgUp/PgDn/Home/End are bound by default."""
+    def __init__(self) -> None:
+        super().__init__()
+        self._top = 0
+        self._marked: set[Any] = set()
+        self._key_events = {
+            curses.KEY_UP: self.move_up,
+            curses.KEY_DOWN: self.move_down,
+            curses.KEY_PPAGE: self.page_up,
+            curses.KEY_NPAGE: self.page_down,
+            curses.KEY_HOME: self.move_home,
+            curses.KEY_END: self.move_end,
+        }
+
+    @property
+    def items(self) -> Sequence[Any]:
+        """Sequence to display"""
+        raise NotImplementedError
+
+    def call(self) -> "Component | ReturnType":
+        """Act on the selected item, lists without an action ignore Enter"""
+        return ReturnType.CONTINUE
+
+    @property
+    def selected(self) -> Any:
+        """Currently selected item, None if empty"""
+        items = self.items
+        if not items:
+            return None
+        return items[min(self._select, len(items) - 1)]
+
+    def _move_to(self, index: int):
+        """Select index, clamped, scrolling the viewport as needed"""
+        count = len(self.items)
+        rows = max(1, self.unreserved_lines)
+        self._select = max(0, min(index, count - 1))
+        if self._select < self._top:
+            self._top = self._select
+        elif self._select >= self._top + rows:
+            self._top = self._select - rows + 1
+        self._top = max(0, min(self._top, count - rows))
+        return ReturnType.CONTINUE
+
+    def move_up(self):
+        """Move the selection UP"""
+        return self._move_to(self._select - 1)
+
+    def move_down(self):
+        """Move the selection DOWN"""
+        return self._move_to(self._select + 1)
+
+    def page_up(self):
+        """Move the selection one page UP"""
+        return self._move_to(self._select - max(1, self.unreserved_lines))
+
+    def page_down(self):
+        """Move the selection one page DOWN"""
+        return self._move_to(self._select + max(1, self.unreserved_lines))
+
+    def move_home(self):
+        """Select the first item"""
+        return self._move_to(0)
+
+    def move_end(self):
+        """Select the last item"""
+        return self._move_to(len(self.items) - 1)
+
+    def visible(self) -> Iterator[tuple[int, Any]]:
+        """Yield (index, item) for rows inside the viewport"""
+        items = self.items
+        self._move_to(self._select)
+        for index in range(self._top, min(self._top + self.unreserved_lines, len(items))):
+            yield index, items[index]
+
+    def toggle_mark(self):
+        """Mark or unmark the selected item and move on"""
+        item = self.selected
+        if item is not None:
+            self._marked ^= {item}
+        return self.move_down()
+
+    @property
+    def marked(self) -> list[Any]:
+        """Marked items, in list order"""
+        return [item for item in self.items if item in self._marked]
+
+    def item_label(self, item: Any) -> str:
+        """Text of a row"""
+        return f"{'*' if item in self._marked else '-'}> {item}"
+
+    def item_style(self, index: int, item: Any) -> int:
+        """Attributes of a row"""
+        if index == self._select:
+            return curses.color_pair(Colors.SELECTED)
+        return 0
+
+    def draw_items(self, stdscr: curses.window):
+        """Draw visible rows below the header"""
+        for row, (index, item) in enumerate(self.visible()):
+            stdscr.addstr(
+                self.generic_height + row, 0, self.item_label(item), self.item_style(index, item)
+            )
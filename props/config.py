@@ -1,7 +1,16 @@
 """General config"""
 
+from copy import deepcopy
+from os import replace, fsync
 from pathlib import Path
-from yaml import load, dump, SafeLoader
+from threading import RLock
+from typing import Callable, NamedTuple
+from yaml import load, dump
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # libyaml is not available
+    from yaml import SafeLoader, SafeDumper  # type: ignore
 
 from .typings import Config
 
@@ -10,43 +19,177 @@ CONFIG_DUMMY: Config = {
     "memory": {'min': 2, 'max': 4},
     'gui': False,
     'additional_args': [],
-    'java_path': 'java'
+    'java_path': 'java',
+    'pool_size': 4,
+    'download_workers': 4,
+    'cache_max_stale': 7 * 24 * 3600,
+    'cache_max_size': 64 * 1024 * 1024,
+    'max_concurrent_downloads': 2,
+    'console_lines': 2000,
+    'metrics_interval': 1.0,
+    'base_port': 25565,
+    'cpus_per_instance': 2,
+    'auto_restart': False,
+    'restart_backoff': 5,
+    'restart_backoff_max': 300,
+    'crash_loop_count': 5,
+    'crash_loop_window': 600,
+    'hang_timeout': 120,
+    'liveness_command': 'list',
+    'log_max_size': 64 * 1024 * 1024,
+    'log_max_age': 24 * 3600,
+    'log_retention_size': 1024 * 1024 * 1024,
+    'log_retention_days': 30,
+    'log_maintenance_interval': 3600,
+    'log_compress_workers': 2,
+    'backup_path': '',
+    'backup_interval': 0,
+    'backup_keep': 24,
+    'backup_workers': 4,
+    'backup_exclude': ['logs', 'cache', 'libraries', 'versions', 'session.lock'],
+    'clone_workers': 8,
+    'clone_exclude': ['logs', 'cache', 'libraries', 'versions', 'session.lock', 'server.jar'],
+    'jar_keep_builds': 3,
+    'jar_keep_days': 14,
+    'jar_gc_auto': False,
+    'prepatch': True,
+    'plugin_repository': 'https://api.modrinth.com/v2',
+    'plugin_loaders': ['paper', 'spigot', 'bukkit'],
+    'plugin_workers': 8
 }
 
 
-CONFIG: Config
 APP_DIR = Path("~/.sheetstack").expanduser()
 APP_CACHE_VAULT = APP_DIR / "cache"
 APP_CONFIG = APP_DIR / "config.yaml"
 APP_DIR.mkdir(exist_ok=True)
 APP_CACHE_VAULT.mkdir(exist_ok=True)
 
+
+class ServerPaths(NamedTuple):
+    """Paths derived from the configured server directory"""
+    root: Path
+    bin: Path
+    profiles: Path
+    default_profile: Path
+    default_symlink: Path
+
+    @classmethod
+    def from_root(cls, root: Path) -> "ServerPaths":
+        """Derive paths from a server directory and make sure they exist"""
+        paths = cls(
+            root,
+            root / "bin",
+            root / "profiles",
+            root / "default",
+            root / "default" / "server.jar",
+        )
+        paths.root.mkdir(parents=True, exist_ok=True)
+        paths.bin.mkdir(exist_ok=True)
+        paths.profiles.mkdir(exist_ok=True)
+        return paths
+
+
+class _ConfigService:
+    """Config cached by file mtime, with change subscribers"""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = RLock()
+        self._key: tuple[int, int] | None = None
+        self._config: Config | None = None
+        self._paths: ServerPaths | None = None
+        self._path_override: str | None = None
+        self._subscribers: list[Callable[[Config], None]] = []
+
+    def _stat_key(self):
+        stat = self._path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> Config:
+        """Reload config if the file changed, notify subscribers"""
+        with self._lock:
+            key = self._stat_key()
+            if key == self._key and self._config is not None:
+                return self._config
+            with open(self._path, encoding='utf-8') as sysfile:
+                config: Config = load(sysfile, SafeLoader)
+            changed = self._config is not None and config != self._config
+            self._key = key
+            self._config = config
+        if changed:
+            for callback in tuple(self._subscribers):
+                callback(deepcopy(config))
+        return config
+
+    def read(self) -> Config:
+        """Return a copy of the current config"""
+        return deepcopy(self._load())
+
+    def write(self, config: Config):
+        """Write config atomically"""
+        temp = self._path.with_name(f"{self._path.name}.tmp")
+        with self._lock:
+            with open(temp, 'w', encoding='utf-8') as sysfile:
+                dump(config, sysfile, SafeDumper)
+                sysfile.flush()
+                fsync(sysfile.fileno())
+            replace(temp, self._path)
+        if self._config is not None:
+            self._load()
+
+    def paths(self) -> ServerPaths:
+        """Return paths derived from the current config (or the path override)"""
+        config = self._load()
+        root = Path(self._path_override or config["path"]).absolute()
+        with self._lock:
+            if self._paths is None or self._paths.root != root:
+                self._paths = ServerPaths.from_root(root)
+            return self._paths
+
+    @property
+    def path_override(self) -> str | None:
+        """Server directory used instead of the configured one, if any"""
+        return self._path_override
+
+    def override_path(self, path: str | None):
+        """Use another server directory in this process without saving it"""
+        self._path_override = path
+
+    def subscribe(self, callback: Callable[[Config], None]):
+        """Call callback with the new config whenever it changes"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Config], None]):
+        """Stop notifying callback"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+
+config_service = _ConfigService(APP_CONFIG)
+
+
 def read_config() -> Config:
     """Read system config"""
-    with open(APP_CONFIG, encoding='utf-8') as sysfile:
-        return load(sysfile, SafeLoader)
+    return config_service.read()
 
 def write_config(config: Config):
     """Write config"""
-    with open(APP_CONFIG, 'w', encoding='utf-8') as sysfile:
-        dump(config, sysfile)
+    config_service.write(config)
+
+def get_paths() -> ServerPaths:
+    """Return server paths derived from the current config"""
+    return config_service.paths()
 
-if not (APP_CONFIG).exists():
-    read_path = input("Please type your designated server directory\n-> ")
-    CONFIG_DUMMY["path"] = str(Path(read_path).resolve(True))
-    print(f"Server directory: {read_path}")
+def first_run(path: str | None = None):
+    """Create the config if missing, prompting for the server directory unless given"""
+    if APP_CONFIG.exists():
+        return
+    read_path = path
+    if read_path is None:
+        read_path = input("Please type your designated server directory\n-> ")
+        print(f"Server directory: {read_path}")
+    directory = Path(read_path).expanduser()
+    directory.mkdir(parents=True, exist_ok=True)
+    CONFIG_DUMMY["path"] = str(directory.resolve(True))
     write_config(CONFIG_DUMMY)
-    CONFIG = CONFIG_DUMMY
-else:
-    CONFIG = read_config()
-    read_path = CONFIG['path']
-
-SERVER_PATH = Path(read_path).absolute()
-SERVER_BIN = SERVER_PATH / "bin"
-PROFILE_DIR = SERVER_PATH / "profiles"
-DEFAULT_SYMLINK = SERVER_PATH / "default" / "server.jar"
-DEFAULT_PROFILE = SERVER_PATH / "default"
-
-SERVER_PATH.mkdir(exist_ok=True)
-SERVER_BIN.mkdir(exist_ok=True)
-PROFILE_DIR.mkdir(exist_ok=True)
@@ -2,10 +2,11 @@
 
 # pylint: disable=no-member
 
-from os import get_terminal_size
 import curses
 from contextlib import contextmanager
 
+from .frame import frame
+
 @contextmanager
 def hide_system(stdscr: curses.window):
     """Hide the app UI to parent TTY"""
@@ -18,7 +19,7 @@ def hide_system(stdscr: curses.window):
 
 def clear_line(stdscr: curses.window, line: int):
     """Clear a line"""
-    stdscr.addstr(line, 0, " " * (get_terminal_size().columns - 1))
+    stdscr.addstr(line, 0, " " * (frame.size.columns - 1))
 
 @contextmanager
 def clear_line_yield(stdscr: curses.window, line: int):
@@ -1,10 +1,13 @@
 """Data-related information"""
 
 from enum import IntEnum
+from threading import Lock
 from typing import NamedTuple, Generic, TypeVar
 
 T = TypeVar("T")
 
+KEY_ESC = 27
+
 COMMON_TEXT = (
     "Please install which version you wish to install"
     "(↑↓ to navigate, Enter to select, Left/Right to undo/select)"
@@ -39,17 +42,21 @@ class ReturnInfo(Generic[T], NamedTuple):
 class _StatusInfo:
     def __init__(self) -> None:
         self._data = " "
+        self._lock = Lock()
 
     def get(self) -> str:
         """Get current status info"""
-        return self._data
+        with self._lock:
+            return self._data
 
     def set(self, value: str):
-        """Set status info"""
-        self._data = value
+        """Set status info, safe to call from any thread"""
+        with self._lock:
+            self._data = value
 
     def reset(self):
         """Reset status info"""
-        self._data = " "
+        with self._lock:
+            self._data = " "
 
 status = _StatusInfo()
@@ -0,0 +1,228 @@
+"""Ranged, resumable downloader"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from json import loads, dumps
+from os import replace, remove
+from os.path import exists
+from pathlib import Path
+from threading import Event, Lock
+from typing import Any, Callable
+
+from requests import Session
+from tqdm import tqdm
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+DEFAULT_TIMEOUT = 5
+DEFAULT_WORKERS = 4
+MIN_SEGMENT_SIZE = 1024 * 1024
+
+# A segment is [start, end, done], end is inclusive and done counts written bytes
+Segment = list[int]
+# Called with (new bytes, total size) as a download advances
+ProgressCallback = Callable[[int, int], Any]
+
+
+class DownloadStopped(Exception):
+    """Raised when a download is cancelled from outside, its progress is kept"""
+
+
+def plan_segments(total_size: int, workers: int) -> list[Segment]:
+    """Split total_size bytes into at most `workers` byte ranges"""
+    count = max(1, min(workers, total_size // MIN_SEGMENT_SIZE))
+    size = -(-total_size // count)
+    return [
+        [start, min(start + size, total_size) - 1, 0]
+        for start in range(0, total_size, size)
+    ]
+
+
+def part_paths(destination: Path):
+    """Return .part and .part.state paths for a destination"""
+    part = destination.with_name(f"{destination.name}.part")
+    return part, part.with_name(f"{part.name}.state")
+
+
+def load_state(state: Path, url: str, total_size: int) -> list[Segment] | None:
+    """Load resumable state, None if it does not match this download"""
+    if not state.exists():
+        return None
+    try:
+        data = loads(state.read_text())
+    except ValueError:
+        return None
+    if data.get("url") != url or data.get("size") != total_size:
+        return None
+    return data["segments"]
+
+
+def save_state(state: Path, url: str, total_size: int, segments: list[Segment]):
+    """Persist resumable state"""
+    state.write_text(dumps({"url": url, "size": total_size, "segments": segments}))
+
+
+def _fetch_segment(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    session: Session,
+    url: str,
+    part: Path,
+    segment: Segment,
+    stop: Event,
+    lock: Lock,
+    advance: Callable[[int], Any],
+):
+    """Fetch a single byte range into its place in the .part file"""
+    start, end, done = segment
+    if start + done > end:
+        return
+    headers = {"Range": f"bytes={start + done}-{end}"}
+    with session.get(
+        url, headers=headers, stream=True, timeout=DEFAULT_TIMEOUT
+    ) as stream, open(part, "r+b") as file:
+        stream.raise_for_status()
+        if stream.status_code != 206:
+            raise ValueError(f"Server ignored range request ({stream.status_code})")
+        file.seek(start + done)
+        for chunk in stream.iter_content(DEFAULT_CHUNK_SIZE):
+            if stop.is_set():
+                return
+            if not chunk:
+                continue
+            chunk = chunk[: end - start + 1 - segment[2]]
+            file.write(chunk)
+            # The hasher and the saved state trust the counter, so the bytes go first
+            file.flush()
+            with lock:
+                segment[2] += len(chunk)
+                advance(len(chunk))
+            if start + segment[2] > end:
+                return
+
+
+def _fetch_single(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    session: Session,
+    url: str,
+    part: Path,
+    digest: Any,
+    advance: Callable[[int], Any],
+    cancel: Event | None,
+):
+    """Fetch over a single stream, used when ranges are not supported"""
+    with session.get(url, stream=True, timeout=DEFAULT_TIMEOUT) as stream, open(
+        part, "wb"
+    ) as file:
+        stream.raise_for_status()
+        for chunk in stream.iter_content(DEFAULT_CHUNK_SIZE):
+            if cancel is not None and cancel.is_set():
+                raise DownloadStopped(url)
+            if chunk:
+                file.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                advance(len(chunk))
+
+
+def _contiguous(segments: list[Segment]) -> int:
+    """Return how many leading bytes of the file are fully written"""
+    for start, end, done in segments:
+        if start + done <= end:
+            return start + done
+    return segments[-1][1] + 1
+
+
+class _PrefixHasher:  # pylint: disable=too-few-public-methods
+    """Hash a .part file incrementally as its written prefix grows"""
+
+    def __init__(self, part: Path, digest: Any) -> None:
+        self._part = part
+        self._digest = digest
+        self._offset = 0
+
+    def advance(self, upto: int):
+        """Feed bytes up to offset `upto` into the digest"""
+        if self._digest is None or upto <= self._offset:
+            return
+        with open(self._part, "rb") as file:
+            file.seek(self._offset)
+            while self._offset < upto:
+                chunk = file.read(min(DEFAULT_CHUNK_SIZE * 64, upto - self._offset))
+                if not chunk:
+                    break
+                self._digest.update(chunk)
+                self._offset += len(chunk)
+
+
+def download(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    session: Session,
+    url: str,
+    destination: Path,
+    workers: int = DEFAULT_WORKERS,
+    digest: Any = None,
+    progress_bar: bool = True,
+    on_progress: ProgressCallback | None = None,
+    cancel: Event | None = None,
+):
+    """Download url into destination using parallel ranged requests.
+
+    Work happens in `<destination>.part`, which is renamed into place only once
+    complete. An interrupted download leaves the .part file and its state behind
+    so the next call resumes where it stopped. If digest (a hashlib object) is
+    given, it's fed the content while ranges land, in file order. Setting cancel
+    stops the download with DownloadStopped, keeping its progress."""
+    part, state = part_paths(destination)
+    header = session.head(url, timeout=DEFAULT_TIMEOUT, allow_redirects=True)
+    header.raise_for_status()
+    total_size = int(header.headers.get("content-length", 0))
+    ranged = header.headers.get("accept-ranges", "").lower() == "bytes"
+
+    progress = tqdm(
+        total=total_size, unit="B", unit_scale=True, desc="Downloading", disable=not progress_bar
+    )
+
+    def advance(size: int):
+        progress.update(size)
+        if on_progress is not None:
+            on_progress(size, total_size)
+
+    if not ranged or total_size <= 0:
+        with progress:
+            _fetch_single(session, url, part, digest, advance, cancel)
+        replace(part, destination)
+        return
+
+    segments = load_state(state, url, total_size) if exists(part) else None
+    if segments is None:
+        segments = plan_segments(total_size, workers)
+        with open(part, "wb") as file:
+            file.truncate(total_size)
+        save_state(state, url, total_size, segments)
+
+    stop = Event()
+    lock = Lock()
+    hasher = _PrefixHasher(part, digest)
+    advance(sum(segment[2] for segment in segments))
+    with progress, ThreadPoolExecutor(len(segments)) as pool:
+        futures = [
+            pool.submit(_fetch_segment, session, url, part, segment, stop, lock, advance)
+            for segment in segments
+        ]
+        try:
+            pending = futures
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    future.result()
+                if cancel is not None and cancel.is_set():
+                    raise DownloadStopped(url)
+                with lock:
+                    upto = _contiguous(segments)
+                hasher.advance(upto)
+        except BaseException:
+            stop.set()
+            try:
+                pool.shutdown(wait=True, cancel_futures=True)
+            finally:
+                with lock:
+                    save_state(state, url, total_size, segments)
+            raise
+
+    replace(part, destination)
+    remove(state)
@@ -0,0 +1,46 @@
+"""Per-frame cached terminal state"""
+
+from os import get_terminal_size, terminal_size
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class _FrameInfo:
+    """Values computed at most once per frame.
+
+    Terminal size is kept until the terminal is resized, other values are
+    dropped when a new frame begins."""
+
+    def __init__(self) -> None:
+        self._size: terminal_size | None = None
+        self._memo: dict[str, Any] = {}
+
+    def begin(self):
+        """Start a new frame"""
+        self._memo.clear()
+
+    def resize(self):
+        """Forget terminal geometry, used on KEY_RESIZE/SIGWINCH"""
+        self._size = None
+        self._memo.clear()
+
+    @property
+    def size(self) -> terminal_size:
+        """Terminal size"""
+        if self._size is None:
+            self._size = get_terminal_size()
+        return self._size
+
+    def memo(self, key: str, fn: Callable[[], T]) -> T:
+        """Compute fn once for this frame"""
+        if key not in self._memo:
+            self._memo[key] = fn()
+        return self._memo[key]
+
+    def forget(self, key: str):
+        """Drop a memoized value before the frame ends"""
+        self._memo.pop(key, None)
+
+
+frame = _FrameInfo()
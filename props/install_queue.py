@@ -0,0 +1,244 @@
+"""Persistent background download queue"""
+
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from threading import Event, Lock
+
+from .config import APP_DIR, read_config
+from .data import status
+from .download import DownloadStopped
+from .jars import collect
+from .paper import GENERIC_FILE, fetch_minecraft, fetch_version_info
+from .prepatch import prepatcher, sweep
+from .tasks import tasks
+
+QUEUE_FILE = APP_DIR / "queue.json"
+DEFAULT_CONCURRENCY = 2
+
+QUEUED = "queued"
+ACTIVE = "active"
+FAILED = "failed"
+DONE = "done"
+
+
+class QueueItem:
+    """A build waiting for, or going through, download"""
+
+    def __init__(
+        self, version: str, build: int | None = None, state: str = QUEUED, error: str = ""
+    ) -> None:
+        self.version = version
+        self.build = build
+        self.state = state
+        self.error = error
+        self.done = 0
+        self.total = 0
+
+    @property
+    def label(self):
+        """Human readable name"""
+        return f"{self.version}/{'latest' if self.build is None else self.build}"
+
+    @property
+    def percent(self):
+        """Download progress in percent"""
+        return self.done * 100 // self.total if self.total else 0
+
+    def to_dict(self):
+        """Serializable form, active downloads are stored as queued"""
+        state = QUEUED if self.state == ACTIVE else self.state
+        return {"version": self.version, "build": self.build, "state": state, "error": self.error}
+
+
+class DownloadQueue:
+    """Queue of builds downloaded concurrently in the background.
+
+    The queue is saved on every change so pending downloads survive a restart,
+    partially downloaded jars resume from their .part files."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._items: list[QueueItem] = []
+        self._lock = Lock()
+        self._cancel = Event()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def _load(self):
+        if not self._path.exists():
+            return
+        try:
+            self._items = [QueueItem(**entry) for entry in loads(self._path.read_text())]
+        except (ValueError, TypeError):
+            return
+
+    def _save(self):
+        """Write the queue atomically, finished items are dropped"""
+        temp = self._path.with_name(f"{self._path.name}.tmp")
+        with self._lock:
+            data = [item.to_dict() for item in self._items if item.state != DONE]
+            temp.write_text(dumps(data))
+            replace(temp, self._path)
+
+    def start(self):
+        """Load the saved queue and resume pending downloads"""
+        if self._pool is not None:
+            return
+        self._load()
+        workers = read_config().get("max_concurrent_downloads", DEFAULT_CONCURRENCY)
+        self._pool = ThreadPoolExecutor(max(1, workers), thread_name_prefix="download")
+        for item in self.items():
+            if item.state == QUEUED:
+                self._pool.submit(self._run, item)
+
+    def items(self) -> list[QueueItem]:
+        """Return a snapshot of queued items"""
+        with self._lock:
+            return list(self._items)
+
+    def add(self, version: str, build: int | None = None) -> bool:
+        """Queue a build (None for the latest one), False if already pending"""
+        with self._lock:
+            for item in self._items:
+                if (item.version, item.build) == (version, build) and item.state != DONE:
+                    return False
+            item = QueueItem(version, build)
+            self._items.append(item)
+        self._save()
+        if self._pool is not None:
+            self._pool.submit(self._run, item)
+        return True
+
+    def remove(self, item: QueueItem) -> bool:
+        """Drop an item that is not downloading right now"""
+        with self._lock:
+            if item.state == ACTIVE or item not in self._items:
+                return False
+            self._items.remove(item)
+        self._save()
+        return True
+
+    def retry(self, item: QueueItem) -> bool:
+        """Queue a failed item again"""
+        with self._lock:
+            if item.state != FAILED:
+                return False
+            item.state = QUEUED
+            item.error = ""
+        self._save()
+        if self._pool is not None:
+            self._pool.submit(self._run, item)
+        return True
+
+    def _progress(self, item: QueueItem):
+        def update(size: int, total: int):
+            item.total = total
+            item.done += size
+        return update
+
+    def _claim(self, item: QueueItem) -> bool:
+        """Whether item may download, called with the lock held.
+
+        "latest" and an explicit build can resolve to the same jar, which would then
+        be written through the same .part file twice. The later item is dropped."""
+        if item.build is None:
+            return True
+        for other in self._items:
+            if other is not item and other.state == ACTIVE and (
+                (other.version, other.build) == (item.version, item.build)
+            ):
+                self._items.remove(item)
+                return False
+        return True
+
+    def _dropped(self, item: QueueItem):
+        self._save()
+        jar = GENERIC_FILE.format(version=item.version, build=item.build)
+        tasks.post(lambda: status.set(f"{jar} is already downloading"))
+
+    def _run(self, item: QueueItem):
+        with self._lock:
+            if item.state != QUEUED or item not in self._items or self._cancel.is_set():
+                return
+            claimed = self._claim(item)
+            if claimed:
+                item.state = ACTIVE
+                item.done = 0
+        if not claimed:
+            self._dropped(item)
+            return
+        try:
+            if item.build is None:
+                build = fetch_version_info(item.version)["builds"][-1]
+                with self._lock:
+                    item.build = build
+                    claimed = self._claim(item)
+                if not claimed:
+                    self._dropped(item)
+                    return
+                self._save()
+            fetch_minecraft(
+                item.version, item.build, False, self._progress(item), self._cancel
+            )
+        except DownloadStopped:
+            item.state = QUEUED
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            item.state = FAILED
+            item.error = f"{type(exc).__name__}: {exc!s}"
+            tasks.post(lambda: status.set(f"Download of {item.label} failed: {item.error}"))
+        else:
+            item.state = DONE
+            jar = GENERIC_FILE.format(version=item.version, build=item.build)
+            tasks.post(lambda: status.set(f"Installed {jar}"))
+            prepatcher.submit(jar)
+            if read_config().get("jar_gc_auto", False):
+                self._collect()
+        self._save()
+
+    def _collect(self):
+        """Apply the jar retention policy after an install"""
+        try:
+            removed = collect()["deleted"]
+            sweep()
+        except OSError as exc:
+            tasks.post(lambda exc=exc: status.set(f"Jar cleanup failed: {exc}"))
+            return
+        if removed:
+            tasks.post(lambda: status.set(f"Removed {len(removed)} old jars"))
+
+    def progress(self) -> tuple[int, int]:
+        """Return (downloaded, total) bytes across active downloads"""
+        done = total = 0
+        for item in self.items():
+            if item.state == ACTIVE:
+                done += item.done
+                total += item.total
+        return done, total
+
+    def summary(self) -> str:
+        """Short description for the status line, empty when idle"""
+        states = [item.state for item in self.items()]
+        active = states.count(ACTIVE)
+        queued = states.count(QUEUED)
+        if not active and not queued:
+            return ""
+        done, total = self.progress()
+        percent = done * 100 // total if total else 0
+        return f"[{active} downloading {percent}%, {queued} queued]"
+
+    @property
+    def busy(self):
+        """Whether anything is downloading or waiting to"""
+        return any(item.state in (ACTIVE, QUEUED) for item in self.items())
+
+    def shutdown(self):
+        """Pause downloads (keeping their progress) and save the queue"""
+        if self._pool is None:
+            return
+        self._cancel.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._save()
+
+
+downloads = DownloadQueue(QUEUE_FILE)
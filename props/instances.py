@@ -0,0 +1,177 @@
+"""Run several profiles side by side, each on its own port and CPU set"""
+
+import os
+import socket
+from pathlib import Path
+
+from .cds import mode_of, prepare, record_startup
+from .config import get_paths, read_config
+from .data import ReturnInfo, ReturnType, status
+from .jars import usage
+from .launcher import build_args
+from .metrics import DEFAULT_INTERVAL
+from .osutils import create_profile, create_symlink
+from .prepatch import link_patched
+from .process import DEFAULT_CONSOLE_LINES, ServerProcess, supervisor
+from .tasks import tasks
+from .watchdog import Watchdog
+
+DEFAULT_BASE_PORT = 25565
+DEFAULT_CPUS_PER_INSTANCE = 2
+PROPERTIES = "server.properties"
+PORT_KEY = "server-port"
+
+watchdogs: dict[str, Watchdog] = {}
+
+
+def list_profiles() -> list[str]:
+    """Return every profile name, including installed jars without a profile yet"""
+    paths = get_paths()
+    names = {entry.name for entry in paths.profiles.iterdir() if entry.is_dir()}
+    names |= {jar.name.removesuffix(".jar") for jar in paths.bin.glob("paper*.jar")}
+    return sorted(names)
+
+
+def read_properties(profile: Path) -> dict[str, str]:
+    """Parse server.properties of a profile"""
+    path = profile / PROPERTIES
+    if not path.exists():
+        return {}
+    properties = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        properties[key.strip()] = value.strip()
+    return properties
+
+
+def write_property(profile: Path, key: str, value: str):
+    """Set one key in server.properties, keeping everything else as is"""
+    path = profile / PROPERTIES
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    for index, line in enumerate(lines):
+        if not line.startswith("#") and line.partition("=")[0].strip() == key:
+            lines[index] = f"{key}={value}"
+            break
+    else:
+        lines.append(f"{key}={value}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def port_free(port: int) -> bool:
+    """Check if nothing listens on a TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        try:
+            probe.bind(("0.0.0.0", port))
+        except OSError:
+            return False
+    return True
+
+
+def allocate_port(profile: Path, base: int = DEFAULT_BASE_PORT) -> int:
+    """Keep the profile's port if it's free, otherwise pick the next free one"""
+    taken = {server.port for server in supervisor.running().values()}
+    current = read_properties(profile).get(PORT_KEY)
+    candidates = [int(current)] if current and current.isdigit() else []
+    candidates += range(base, 65536)
+    for port in candidates:
+        if port not in taken and port_free(port):
+            if str(port) != current:
+                write_property(profile, PORT_KEY, str(port))
+            return port
+    raise OSError("No free port left")
+
+
+def allocate_cpus(count: int) -> set[int] | None:
+    """Pick count CPUs no running instance is pinned to, None if there aren't enough"""
+    if count <= 0:
+        return None
+    taken: set[int] = set()
+    for server in supervisor.running().values():
+        taken |= server.cpus or set()
+    free = sorted(os.sched_getaffinity(0) - taken)
+    if len(free) < count:
+        return None
+    return set(free[:count])
+
+
+def start_instance(name: str) -> ReturnInfo[ServerProcess | None]:
+    """Launch a profile in the background on a free port and CPU set.
+
+    With auto_restart enabled, a watchdog restarts it when it crashes or hangs."""
+    started = _launch(name)
+    server = started.additional_info
+    if started.type == ReturnType.ERR or server is None:
+        return started
+    config = read_config()
+    watchdog = watchdogs.get(name)
+    if config.get("auto_restart", False) and (watchdog is None or not watchdog.active):
+        watchdog = Watchdog(name, server, lambda: _relaunch(name), config)
+        watchdogs[name] = watchdog
+        watchdog.start()
+    return started
+
+
+def _relaunch(name: str) -> ServerProcess:
+    """Launch a profile again for its watchdog"""
+    started = _launch(name)
+    if started.type == ReturnType.ERR or started.additional_info is None:
+        raise OSError(started.reason)
+    return started.additional_info
+
+
+def _launch(name: str) -> ReturnInfo[ServerProcess | None]:
+    paths = get_paths()
+    profile = paths.profiles / name
+    jar = paths.bin / f"{name}.jar"
+    if not jar.exists():
+        return ReturnInfo(ReturnType.ERR, f"'{jar.name}' is not installed", None)
+    running = supervisor.get(name)
+    if running is not None and running.running:
+        return ReturnInfo(ReturnType.OK, f"{name} is already running", running)
+
+    create_profile(jar.name)
+    create_symlink(str(jar), str(profile / "server.jar"))
+    link_patched(profile, jar.name)
+    config = read_config()
+    built = build_args(config, profile)
+    if built.type == ReturnType.ERR:
+        return ReturnInfo(ReturnType.ERR, built.reason, None)
+    prepare(profile, built.additional_info)
+    port = allocate_port(profile, config.get("base_port", DEFAULT_BASE_PORT))
+    cpus = allocate_cpus(config.get("cpus_per_instance", DEFAULT_CPUS_PER_INSTANCE))
+    server = supervisor.launch(
+        name,
+        built.additional_info,
+        profile,
+        config.get("console_lines", DEFAULT_CONSOLE_LINES),
+        config.get("metrics_interval", DEFAULT_INTERVAL),
+        cpus,
+    )
+    server.port = port
+    mode = mode_of(built.additional_info)
+    server.on_ready = lambda seconds: _started(name, mode, seconds)
+    usage.record(jar.name, "run")
+    pinned = f"CPUs {format_cpus(cpus)}" if cpus else "no CPU pinning (not enough free CPUs)"
+    return ReturnInfo(ReturnType.OK, f"Started {name} on port {port}, {pinned}", server)
+
+
+def _started(name: str, mode: str, seconds: float):
+    """Record a launch's startup time and say how long it took"""
+    record_startup(name, mode, seconds)
+    archive = {"use": ", with class data archive", "dump": ", dumping a class data archive"}
+    tasks.post(lambda: status.set(f"{name} started in {seconds:.1f}s{archive.get(mode, '')}"))
+
+
+def format_cpus(cpus: set[int] | None) -> str:
+    """Format a CPU set like 0-3,8"""
+    if not cpus:
+        return "-"
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
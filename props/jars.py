@@ -0,0 +1,159 @@
+"""Track when installed jars are used and remove the ones nothing needs"""
+
+import os
+import re
+import time
+from json import dumps, loads
+from pathlib import Path
+from threading import Lock
+
+from .config import APP_DIR, get_paths, read_config
+from .process import supervisor
+from .store import sha256_file, store_path
+
+USAGE_FILE = APP_DIR / "usage.json"
+JAR_PATTERN = re.compile(r"^paper-(?P<version>.+)-(?P<build>\d+)\.jar$")
+DEFAULT_KEEP_BUILDS = 3
+DEFAULT_KEEP_DAYS = 14
+
+
+class _UsageLog:
+    """Last time each jar was selected or run, kept in a small JSON file.
+
+    The file is read on every access since the TUI and CLI may both write it."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = Lock()
+
+    def _load(self) -> dict[str, dict[str, float]]:
+        try:
+            return loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, entries: dict[str, dict[str, float]]):
+        temp = self._path.with_name(f"{self._path.name}.tmp")
+        temp.write_text(dumps(entries), encoding="utf-8")
+        os.replace(temp, self._path)
+
+    def record(self, jar: str, event: str):
+        """Note that jar was just selected or run"""
+        with self._lock:
+            entries = self._load()
+            entries.setdefault(jar, {})[event] = time.time()
+            self._save(entries)
+
+    def last_used(self) -> dict[str, float]:
+        """Most recent use of every jar that was ever used"""
+        with self._lock:
+            return {jar: max(events.values()) for jar, events in self._load().items() if events}
+
+    def forget(self, jars: list[str]):
+        """Drop entries of deleted jars"""
+        with self._lock:
+            entries = self._load()
+            for jar in jars:
+                entries.pop(jar, None)
+            self._save(entries)
+
+
+usage = _UsageLog(USAGE_FILE)
+
+
+def parse_jar(name: str) -> tuple[str, int] | None:
+    """Split paper-<version>-<build>.jar, None for anything else"""
+    match = JAR_PATTERN.match(name)
+    if match is None:
+        return None
+    return match["version"], int(match["build"])
+
+
+def in_use() -> dict[str, str]:
+    """Jars referenced by the default symlink, a profile or a running server, with why"""
+    paths = get_paths()
+    used: dict[str, str] = {}
+    for name in supervisor.running():
+        used[f"{name}.jar"] = "running"
+    if paths.default_symlink.is_symlink():
+        used.setdefault(os.path.basename(os.readlink(paths.default_symlink)), "default")
+    with os.scandir(paths.profiles) as profiles:
+        for profile in profiles:
+            link = os.path.join(profile.path, "server.jar")
+            if profile.is_dir() and os.path.islink(link):
+                used.setdefault(os.path.basename(os.readlink(link)), f"profile {profile.name}")
+    return used
+
+
+def plan(keep_builds: int, keep_days: float) -> tuple[dict[str, str], list[str]]:
+    """Decide which jars stay (with the reason) and which go.
+
+    Kept are the newest keep_builds builds of every version, jars in use,
+    jars used within keep_days, and anything not named like a Paper jar."""
+    with os.scandir(get_paths().bin) as entries:
+        jars = [entry.name for entry in entries if entry.name.endswith(".jar")]
+    keep = {jar: reason for jar, reason in in_use().items() if jar in jars}
+    builds: dict[str, list[tuple[int, str]]] = {}
+    for jar in jars:
+        parsed = parse_jar(jar)
+        if parsed is None:
+            keep.setdefault(jar, "not a Paper jar")
+            continue
+        builds.setdefault(parsed[0], []).append((parsed[1], jar))
+    for version_builds in builds.values():
+        for _, jar in sorted(version_builds, reverse=True)[:keep_builds]:
+            keep.setdefault(jar, "newest")
+    cutoff = time.time() - keep_days * 24 * 3600
+    for jar, last in usage.last_used().items():
+        if jar in jars and jar not in keep and last >= cutoff:
+            keep[jar] = "recently used"
+    return keep, sorted(jar for jar in jars if jar not in keep)
+
+
+def _stored_copy(path: Path, links: int) -> Path | None:
+    """The store artifact a jar is hardlinked to, if any"""
+    if links < 2:
+        return None
+    stored = store_path(sha256_file(path))
+    try:
+        return stored if os.path.samefile(stored, path) else None
+    except OSError:
+        return None
+
+
+def _release(path: Path, dry_run: bool) -> int:
+    """Delete a jar, and its store artifact when nothing else links it.
+
+    Returns the bytes that actually come back, zero while another link keeps the
+    data alive."""
+    stat = path.stat()
+    links = stat.st_nlink
+    stored = _stored_copy(path, links)
+    if stored is not None and links == 2:
+        if not dry_run:
+            stored.unlink()
+        links -= 1
+    if not dry_run:
+        path.unlink()
+    return stat.st_size if links == 1 else 0
+
+
+def collect(
+    dry_run: bool = False, keep_builds: int | None = None, keep_days: float | None = None
+) -> dict:
+    """Delete every jar the retention policy doesn't keep, in one pass"""
+    config = read_config()
+    if keep_builds is None:
+        keep_builds = config.get("jar_keep_builds", DEFAULT_KEEP_BUILDS)
+    if keep_days is None:
+        keep_days = config.get("jar_keep_days", DEFAULT_KEEP_DAYS)
+    kept, doomed = plan(keep_builds, keep_days)
+    freed = 0
+    deleted = []
+    binary = get_paths().bin
+    for jar in doomed:
+        freed += _release(binary / jar, dry_run)
+        deleted.append(jar)
+    if not dry_run:
+        usage.forget(deleted)
+    return {"deleted": deleted, "kept": kept, "freed": freed, "dry_run": dry_run}
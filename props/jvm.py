@@ -0,0 +1,237 @@
+"""Per-profile JVM settings, flag presets and host-aware heap sizing"""
+
+import os
+import re
+import shutil
+from pathlib import Path
+from subprocess import DEVNULL, SubprocessError, run
+
+from yaml import load, dump
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # libyaml is not available
+    from yaml import SafeLoader, SafeDumper  # type: ignore
+
+from .typings import Config, Memory, ProfileSettings
+
+SETTINGS_FILE = "sheetstack.yaml"
+MEMINFO = Path("/proc/meminfo")
+CGROUP = Path("/proc/self/cgroup")
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+THP_ENABLED = Path("/sys/kernel/mm/transparent_hugepage/enabled")
+UNLIMITED = 1 << 60
+MIB = 1024 * 1024
+GIB = 1024 * MIB
+MIN_RESERVE = 1 * GIB
+RESERVE_RATIO = 0.2
+MIN_HEAP = 512 * MIB
+LARGE_HEAP = 12 * GIB
+# Generational ZGC is opt-in on 21 to 23, the flag is obsolete from 24 on
+ZGC_GENERATIONAL = "-XX:+ZGenerational"
+ZGC_GENERATIONAL_OPT_IN = range(21, 24)
+VERSION_PATTERN = re.compile(r'version "(\d+)(?:\.(\d+))?')
+
+PRESETS: dict[str, list[str]] = {
+    "none": [],
+    # https://docs.papermc.io/paper/aikars-flags, AlwaysPreTouch is a separate toggle
+    "aikar": [
+        "-XX:+UseG1GC",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:MaxGCPauseMillis=200",
+        "-XX:+UnlockExperimentalVMOptions",
+        "-XX:+DisableExplicitGC",
+        "-XX:G1NewSizePercent=30",
+        "-XX:G1MaxNewSizePercent=40",
+        "-XX:G1HeapRegionSize=8M",
+        "-XX:G1ReservePercent=20",
+        "-XX:G1HeapWastePercent=5",
+        "-XX:G1MixedGCCountTarget=4",
+        "-XX:InitiatingHeapOccupancyPercent=15",
+        "-XX:G1MixedGCLiveThresholdPercent=90",
+        "-XX:G1RSetUpdatingPauseTimePercent=5",
+        "-XX:SurvivorRatio=32",
+        "-XX:+PerfDisableSharedMem",
+        "-XX:MaxTenuringThreshold=1",
+        "-Dusing.aikars.flags=https://mcflags.emc.gs",
+        "-Daikars.new.flags=true",
+    ],
+    "zgc": [
+        "-XX:+UseZGC",
+        "-XX:+DisableExplicitGC",
+        "-XX:+PerfDisableSharedMem",
+    ],
+}
+# Aikar's adjustments for heaps above 12G
+AIKAR_LARGE = {
+    "-XX:G1NewSizePercent=30": "-XX:G1NewSizePercent=40",
+    "-XX:G1MaxNewSizePercent=40": "-XX:G1MaxNewSizePercent=50",
+    "-XX:G1HeapRegionSize=8M": "-XX:G1HeapRegionSize=16M",
+    "-XX:G1ReservePercent=20": "-XX:G1ReservePercent=15",
+    "-XX:InitiatingHeapOccupancyPercent=15": "-XX:InitiatingHeapOccupancyPercent=20",
+}
+MEMORY_MODES = ("config", "auto")
+LARGE_PAGE_MODES = ("auto", "on", "off")
+
+SETTINGS_DUMMY: ProfileSettings = {
+    "preset": "none",
+    "memory": "config",
+    "pretouch": False,
+    "large_pages": "off",
+    "appcds": False,
+    "additional_args": [],
+    "plugins": [],
+}
+
+
+def settings_path(profile: Path) -> Path:
+    """Where a profile's launch settings live"""
+    return profile / SETTINGS_FILE
+
+
+def load_settings(profile: Path) -> ProfileSettings:
+    """Read a profile's launch settings, defaults for anything missing"""
+    settings = dict(SETTINGS_DUMMY)
+    path = settings_path(profile)
+    if path.exists():
+        with open(path, encoding="utf-8") as file:
+            settings.update(load(file, SafeLoader) or {})
+    return settings  # type: ignore
+
+
+def save_settings(profile: Path, settings: ProfileSettings):
+    """Write a profile's launch settings"""
+    with open(settings_path(profile), "w", encoding="utf-8") as file:
+        dump(dict(settings), file, SafeDumper)
+
+
+def meminfo() -> dict[str, int]:
+    """Parse /proc/meminfo into bytes (counts for HugePages_* fields)"""
+    info = {}
+    for line in MEMINFO.read_text(encoding="ascii").splitlines():
+        name, _, value = line.partition(":")
+        parts = value.split()
+        if parts:
+            info[name] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+    return info
+
+
+def cgroup_limit() -> int | None:
+    """Memory limit of this process' cgroup (v2 or v1), None if unlimited"""
+    candidates = []
+    try:
+        lines = CGROUP.read_text(encoding="ascii").splitlines()
+    except OSError:
+        lines = []
+    for line in lines:
+        _, controllers, path = line.split(":", 2)
+        path = path.lstrip("/")
+        if controllers == "":
+            candidates += [CGROUP_ROOT / path / "memory.max", CGROUP_ROOT / "memory.max"]
+        elif "memory" in controllers.split(","):
+            candidates += [
+                CGROUP_ROOT / "memory" / path / "memory.limit_in_bytes",
+                CGROUP_ROOT / "memory" / "memory.limit_in_bytes",
+            ]
+    for candidate in candidates:
+        try:
+            value = candidate.read_text(encoding="ascii").strip()
+        except OSError:
+            continue
+        if value == "max" or int(value) >= UNLIMITED:
+            return None
+        return int(value)
+    return None
+
+
+def auto_heap() -> int:
+    """Heap size that leaves room for the OS and JVM overhead, in bytes"""
+    limit = meminfo().get("MemTotal", 0)
+    cgroup = cgroup_limit()
+    if cgroup is not None:
+        limit = min(limit, cgroup) if limit else cgroup
+    reserve = max(MIN_RESERVE, int(limit * RESERVE_RATIO))
+    heap = (limit - reserve) // (256 * MIB) * (256 * MIB)
+    return max(MIN_HEAP, heap)
+
+
+def large_page_flags(mode: str) -> list[str]:
+    """Large page flags the host can back, per the large_pages setting"""
+    if mode == "off":
+        return []
+    if meminfo().get("HugePages_Total", 0) > 0:
+        return ["-XX:+UseLargePages"]
+    try:
+        thp = THP_ENABLED.read_text(encoding="ascii")
+    except OSError:
+        thp = ""
+    if "[always]" in thp or "[madvise]" in thp:
+        return ["-XX:+UseTransparentHugePages"]
+    return ["-XX:+UseLargePages"] if mode == "on" else []
+
+
+def heap_flags(settings: ProfileSettings, config: Config) -> tuple[list[str], int]:
+    """Return -Xms/-Xmx flags and the max heap in bytes"""
+    memory = settings["memory"]
+    if memory == "auto":
+        heap = auto_heap()
+        return [f"-Xms{heap // MIB}M", f"-Xmx{heap // MIB}M"], heap
+    explicit: Memory = config["memory"] if memory == "config" else memory  # type: ignore
+    if not all(isinstance(value, int) for value in explicit.values()):
+        raise ValueError("Invalid argument for memory. Please check your configuration")
+    return [f"-Xms{explicit['min']}G", f"-Xmx{explicit['max']}G"], explicit["max"] * GIB
+
+
+_JAVA_VERSIONS: dict[tuple[str, int], int | None] = {}
+
+
+def _probe_java(java: str) -> int | None:
+    try:
+        result = run(
+            [java, "-version"],
+            stdin=DEVNULL,
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=False,
+        )
+    except (OSError, SubprocessError):
+        return None
+    match = VERSION_PATTERN.search(result.stderr + result.stdout)
+    if match is None:
+        return None
+    # 1.8.0_402 is Java 8
+    if match[1] == "1" and match[2]:
+        return int(match[2])
+    return int(match[1])
+
+
+def java_version(java: str) -> int | None:
+    """Feature release of a java binary (17, 21...), None when it can't be told.
+
+    Cached per binary and mtime, so updating Java in place is noticed."""
+    path = shutil.which(java) or java
+    try:
+        key = (os.path.realpath(path), os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+    if key not in _JAVA_VERSIONS:
+        _JAVA_VERSIONS[key] = _probe_java(path)
+    return _JAVA_VERSIONS[key]
+
+
+def jvm_flags(settings: ProfileSettings, config: Config) -> list[str]:
+    """All JVM flags for a profile, before -jar"""
+    heap, size = heap_flags(settings, config)
+    preset = PRESETS.get(settings["preset"])
+    if preset is None:
+        raise ValueError(f"Unknown preset {settings['preset']!r}")
+    if settings["preset"] == "aikar" and size > LARGE_HEAP:
+        preset = [AIKAR_LARGE.get(flag, flag) for flag in preset]
+    if settings["preset"] == "zgc" and java_version(config["java_path"]) in ZGC_GENERATIONAL_OPT_IN:
+        preset = [*preset[:1], ZGC_GENERATIONAL, *preset[1:]]
+    flags = [*heap, *preset]
+    if settings["pretouch"]:
+        flags.append("-XX:+AlwaysPreTouch")
+    flags += large_page_flags(settings["large_pages"])
+    return [*flags, *config["additional_args"], *settings["additional_args"]]
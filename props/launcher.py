@@ -0,0 +1,47 @@
+"""Server launch helpers shared by the TUI and the headless CLI"""
+
+from os import readlink
+from os.path import basename
+from pathlib import Path
+
+from .cds import cds_flags
+from .config import get_paths
+from .data import ReturnInfo, ReturnType
+from .jvm import SETTINGS_DUMMY, jvm_flags, load_settings
+from .typings import Config, ProfileSettings
+
+
+def check_default_profile() -> ReturnInfo[None]:
+    """Check that the default profile and server.jar point at the same version"""
+    paths = get_paths()
+    try:
+        link_name = basename(readlink(paths.default_profile))
+        server_name = basename(readlink(paths.default_symlink)).replace('.jar', '')
+    except OSError:
+        return ReturnInfo(ReturnType.ERR, "No version selected, please manage your server~", None)
+    if not link_name == server_name:
+        return ReturnInfo(ReturnType.ERR, "Server mismatch, please manage your server~", None)
+    return ReturnInfo(ReturnType.OK, "", None)
+
+
+def build_args(config: Config, profile: Path | None = None) -> ReturnInfo[list[str]]:
+    """Build the java command line from config and the profile's launch settings"""
+    settings = SETTINGS_DUMMY if profile is None else load_settings(profile)
+    built = command_line(config, settings)
+    if profile is None or built.type == ReturnType.ERR or not settings["appcds"]:
+        return built
+    args = built.additional_info
+    jar = args.index("-jar")
+    return ReturnInfo(ReturnType.OK, "", [*args[:jar], *cds_flags(profile, args), *args[jar:]])
+
+
+def command_line(config: Config, settings: ProfileSettings) -> ReturnInfo[list[str]]:
+    """Build the java command line from config and launch settings"""
+    try:
+        flags = jvm_flags(settings, config)
+    except (ValueError, KeyError) as exc:
+        return ReturnInfo(ReturnType.ERR, str(exc), [])
+
+    gui = "--gui" if config["gui"] else "--nogui"
+    args = [config["java_path"], *flags, "-jar", "./server.jar", gui]
+    return ReturnInfo(ReturnType.OK, "", args)
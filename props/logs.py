@@ -0,0 +1,202 @@
+"""Rotate, compress and expire profile logs in the background"""
+
+import gzip
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from multiprocessing import get_context
+from pathlib import Path
+from threading import Event, Lock, Thread
+
+from .config import get_paths, read_config
+from .data import status
+from .osutils import low_priority
+from .process import supervisor
+from .tasks import tasks
+from .typings import Config
+
+LOGS_DIR = "logs"
+ACTIVE_LOG = "latest.log"
+MIB = 1024 * 1024
+DEFAULT_MAX_SIZE = 64 * MIB
+DEFAULT_MAX_AGE = 24 * 3600
+DEFAULT_RETENTION_SIZE = 1024 * MIB
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_INTERVAL = 3600
+DEFAULT_WORKERS = 2
+COPY_CHUNK = 1024 * 1024
+
+
+def archives(logs: Path) -> list[Path]:
+    """Rotated logs of a profile, oldest first"""
+    found = [
+        path for path in logs.glob("*.log*")
+        if path.name != ACTIVE_LOG and path.suffix in (".log", ".gz") and path.is_file()
+    ]
+    return sorted(found, key=lambda path: path.stat().st_mtime)
+
+
+def _rotated_name(logs: Path) -> Path:
+    """Next free name in Paper's own scheme, YYYY-MM-DD-N.log"""
+    today = date.today().isoformat()
+    number = 1
+    while (logs / f"{today}-{number}.log").exists() or (logs / f"{today}-{number}.log.gz").exists():
+        number += 1
+    return logs / f"{today}-{number}.log"
+
+
+def rotate(logs: Path, running: bool, max_size: int, max_age: float) -> Path | None:
+    """Rotate latest.log once it's too big, or older than max_age since the last rotation.
+
+    A running server's latest.log is left to Paper's own rollover. log4j writes it at
+    its own offset rather than appending, so truncating it under the server would only
+    leave a sparse file of NUL bytes behind. It's rotated on the first pass after the
+    server stops."""
+    if running:
+        return None
+    active = logs / ACTIVE_LOG
+    try:
+        size = active.stat().st_size
+    except FileNotFoundError:
+        return None
+    if size == 0:
+        return None
+    previous = archives(logs)
+    since = previous[-1].stat().st_mtime if previous else None
+    aged = since is not None and time.time() - since >= max_age
+    if size < max_size and not aged:
+        return None
+
+    target = _rotated_name(logs)
+    os.replace(active, target)
+    return target
+
+
+def compress(source: str) -> tuple[str, int, int]:
+    """Gzip a rotated log next to itself and drop the original, runs in a worker process"""
+    path = Path(source)
+    target = path.with_name(f"{path.name}.gz")
+    temp = path.with_name(f"{target.name}.tmp")
+    stat = path.stat()
+    with open(path, "rb") as plain, gzip.open(temp, "wb") as packed:
+        shutil.copyfileobj(plain, packed, COPY_CHUNK)
+    os.utime(temp, (stat.st_atime, stat.st_mtime))
+    os.replace(temp, target)
+    path.unlink()
+    return source, stat.st_size, target.stat().st_size
+
+
+def expire(logs: Path, budget: int, days: float) -> list[Path]:
+    """Delete archives older than days, then the oldest ones until they fit in budget"""
+    removed = []
+    cutoff = time.time() - days * 24 * 3600
+    kept = []
+    for path in archives(logs):
+        if days and path.stat().st_mtime < cutoff:
+            path.unlink()
+            removed.append(path)
+        else:
+            kept.append(path)
+    total = sum(path.stat().st_size for path in kept)
+    while budget and kept and total > budget:
+        oldest = kept.pop(0)
+        total -= oldest.stat().st_size
+        oldest.unlink()
+        removed.append(oldest)
+    return removed
+
+
+class LogMaintenance:
+    """Periodic rotation, compression and retention of every profile's logs.
+
+    Runs on its own thread at idle I/O priority, compression happens in a
+    process pool whose workers are lowered the same way."""
+
+    def __init__(self) -> None:
+        self._stop = Event()
+        self._lock = Lock()
+        self._thread: Thread | None = None
+        self._pool: ProcessPoolExecutor | None = None
+
+    def start(self):
+        """Start maintaining logs every log_maintenance_interval seconds"""
+        if self._thread is not None:
+            return
+        self._thread = Thread(target=self._run, name="log-maintenance", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        low_priority()
+        while not self._stop.is_set():
+            config = read_config()
+            try:
+                summary = self.run_once(config=config)
+            except OSError as exc:
+                tasks.post(lambda exc=exc: status.set(f"Log maintenance failed: {exc}"))
+            else:
+                if any(summary.values()):
+                    message = (
+                        f"Logs: rotated {summary['rotated']}, compressed {summary['compressed']}"
+                        f", removed {summary['removed']}"
+                    )
+                    tasks.post(lambda message=message: status.set(message))
+            self._stop.wait(config.get("log_maintenance_interval", DEFAULT_INTERVAL))
+
+    def _executor(self, workers: int) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # forkserver, forking a threaded process is unsafe
+            self._pool = ProcessPoolExecutor(
+                workers, mp_context=get_context("forkserver"), initializer=low_priority
+            )
+        return self._pool
+
+    def run_once(
+        self, profiles: list[str] | None = None, config: Config | None = None
+    ) -> dict[str, int]:
+        """Maintain the given profiles (all by default) once, return what was done"""
+        config = config or read_config()
+        root = get_paths().profiles
+        names = profiles or sorted(entry.name for entry in root.iterdir() if entry.is_dir())
+        summary = {"rotated": 0, "compressed": 0, "removed": 0, "saved": 0}
+        with self._lock:
+            pending = []
+            for name in names:
+                logs = root / name / LOGS_DIR
+                if not logs.is_dir():
+                    continue
+                server = supervisor.get(name)
+                rotated = rotate(
+                    logs,
+                    server is not None and server.running,
+                    config.get("log_max_size", DEFAULT_MAX_SIZE),
+                    config.get("log_max_age", DEFAULT_MAX_AGE),
+                )
+                summary["rotated"] += rotated is not None
+                pending += [str(path) for path in archives(logs) if path.suffix == ".log"]
+
+            if pending and not self._stop.is_set():
+                pool = self._executor(config.get("log_compress_workers", DEFAULT_WORKERS))
+                for _, before, after in pool.map(compress, pending):
+                    summary["compressed"] += 1
+                    summary["saved"] += before - after
+
+            for name in names:
+                logs = root / name / LOGS_DIR
+                if logs.is_dir():
+                    summary["removed"] += len(expire(
+                        logs,
+                        config.get("log_retention_size", DEFAULT_RETENTION_SIZE),
+                        config.get("log_retention_days", DEFAULT_RETENTION_DAYS),
+                    ))
+        return summary
+
+    def shutdown(self):
+        """Stop the schedule, a file being compressed is finished or left untouched"""
+        self._stop.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+log_maintenance = LogMaintenance()
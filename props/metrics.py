@@ -0,0 +1,246 @@
+"""Resource sampling of running servers through /proc"""
+
+import os
+import time
+from array import array
+from threading import Event, Thread
+from typing import Callable, NamedTuple, Sequence
+
+DEFAULT_INTERVAL = 1.0
+RECENT_SAMPLES = 300
+HISTORY_SAMPLES = 720
+HISTORY_FACTOR = 10
+SPARKS = "▁▂▃▄▅▆▇█"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PROC_READ_SIZE = 4096
+
+
+class RingBuffer:
+    """Fixed-capacity series of floats stored in an array"""
+
+    def __init__(self, capacity: int) -> None:
+        self._data = array("d", bytes(8 * capacity))
+        self._capacity = capacity
+        self._start = 0
+        self._count = 0
+
+    def append(self, value: float):
+        """Add a value, overwriting the oldest one when full"""
+        index = (self._start + self._count) % self._capacity
+        self._data[index] = value
+        if self._count < self._capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self._capacity
+
+    def values(self) -> list[float]:
+        """Return values oldest first"""
+        end = self._start + self._count
+        if end <= self._capacity:
+            return self._data[self._start:end].tolist()
+        return (self._data[self._start:] + self._data[:end - self._capacity]).tolist()
+
+    def last(self) -> float:
+        """Return the newest value, 0 when empty"""
+        if not self._count:
+            return 0.0
+        return self._data[(self._start + self._count - 1) % self._capacity]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class TimeSeries:
+    """Recent samples at full resolution, older ones averaged HISTORY_FACTOR to one"""
+
+    def __init__(
+        self,
+        recent: int = RECENT_SAMPLES,
+        history: int = HISTORY_SAMPLES,
+        factor: int = HISTORY_FACTOR,
+    ) -> None:
+        self.recent = RingBuffer(recent)
+        self.history = RingBuffer(history)
+        self._factor = factor
+        self._sum = 0.0
+        self._pending = 0
+
+    def append(self, value: float):
+        """Record a sample"""
+        self.recent.append(value)
+        self._sum += value
+        self._pending += 1
+        if self._pending == self._factor:
+            self.history.append(self._sum / self._factor)
+            self._sum = 0.0
+            self._pending = 0
+
+    def last(self) -> float:
+        """Return the newest sample"""
+        return self.recent.last()
+
+
+def downsample(values: Sequence[float], width: int) -> list[float]:
+    """Average values into at most width buckets"""
+    if len(values) <= width:
+        return list(values)
+    step = len(values) / width
+    buckets = []
+    for bucket in range(width):
+        chunk = values[int(bucket * step):int((bucket + 1) * step)] or values[-1:]
+        buckets.append(sum(chunk) / len(chunk))
+    return buckets
+
+
+def sparkline(values: Sequence[float], width: int, maximum: float | None = None) -> str:
+    """Render values as a sparkline of at most width characters"""
+    points = downsample(values, width)
+    if not points:
+        return ""
+    top = maximum or max(points) or 1.0
+    last = len(SPARKS) - 1
+    return "".join(SPARKS[min(last, int(point / top * last))] for point in points)
+
+
+def parse_memory(value: str) -> int:
+    """Parse a JVM memory size such as 4G or 512m into bytes"""
+    units = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+    unit = units.get(value[-1:].lower())
+    if unit is None:
+        return int(value)
+    return int(value[:-1]) * unit
+
+
+def max_heap(args: Sequence[str]) -> int | None:
+    """Return -Xmx from a java command line in bytes"""
+    for arg in reversed(args):
+        if arg.startswith("-Xmx"):
+            try:
+                return parse_memory(arg[4:])
+            except ValueError:
+                return None
+    return None
+
+
+class Counters(NamedTuple):
+    """Cumulative counters of a process at one point in time"""
+
+    time: float
+    ticks: int
+    rss: int
+    threads: int
+    read: int
+    write: int
+
+
+def _fields(data: bytes, names: dict[bytes, int], values: list[int]) -> list[int]:
+    """Fill values[names[key]] from the "key: value ..." lines of a /proc file"""
+    for line in data.splitlines():
+        key, _, rest = line.partition(b":")
+        index = names.get(key)
+        if index is not None:
+            values[index] = int(rest.split()[0])
+    return values
+
+
+def read_counters(stat_fd: int, status_fd: int, io_fd: int | None) -> Counters:
+    """Read a process's counters from already opened /proc files"""
+    now = time.monotonic()
+    stat = os.pread(stat_fd, PROC_READ_SIZE, 0)
+    fields = stat[stat.rindex(b")") + 2:].split()
+    ticks = int(fields[11]) + int(fields[12])  # utime + stime
+    rss, threads = _fields(
+        os.pread(status_fd, PROC_READ_SIZE, 0), {b"VmRSS": 0, b"Threads": 1}, [0, 0]
+    )
+    read = write = 0
+    if io_fd is not None:
+        read, write = _fields(
+            os.pread(io_fd, PROC_READ_SIZE, 0), {b"read_bytes": 0, b"write_bytes": 1}, [0, 0]
+        )
+    return Counters(now, ticks, rss * 1024, threads, read, write)
+
+
+class Usage:
+    """CPU, memory, disk and thread series of one process"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+        self.cpu = TimeSeries()
+        self.rss = TimeSeries()
+        self.read_rate = TimeSeries()
+        self.write_rate = TimeSeries()
+        self.threads = TimeSeries()
+
+    def record(self, before: Counters, after: Counters):
+        """Append the usage between two readings"""
+        elapsed = max(after.time - before.time, 1e-6)
+        self.cpu.append((after.ticks - before.ticks) / CLOCK_TICKS / elapsed * 100)
+        self.read_rate.append((after.read - before.read) / elapsed)
+        self.write_rate.append((after.write - before.write) / elapsed)
+        self.rss.append(after.rss)
+        self.threads.append(after.threads)
+
+    def span(self, history: bool = False) -> float:
+        """Seconds covered by the recent or the long window"""
+        if history:
+            return self.interval * HISTORY_FACTOR * len(self.cpu.history)
+        return self.interval * len(self.cpu.recent)
+
+
+class Sampler:
+    """Sample the usage of a process on a background thread.
+
+    /proc files are opened once and re-read with pread, each sample costs
+    three small reads and no allocation beyond the parsed values."""
+
+    def __init__(
+        self,
+        pid: int,
+        interval: float = DEFAULT_INTERVAL,
+        on_sample: Callable[[], None] | None = None,
+    ) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.usage = Usage(interval)
+        self._on_sample = on_sample
+        self._stop = Event()
+        self._previous: Counters | None = None
+
+    def start(self):
+        """Start sampling until the process exits or stop is called"""
+        Thread(target=self._run, name=f"sampler-{self.pid}", daemon=True).start()
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop.set()
+
+    def _open(self, name: str) -> int | None:
+        try:
+            return os.open(f"/proc/{self.pid}/{name}", os.O_RDONLY)
+        except OSError:
+            return None
+
+    def _run(self):
+        fds = [self._open("stat"), self._open("status"), self._open("io")]
+        try:
+            if fds[0] is None or fds[1] is None:
+                return
+            while not self._stop.is_set():
+                try:
+                    self.sample(*fds)
+                except (OSError, ValueError, IndexError):
+                    return  # the process is gone
+                if self._on_sample is not None:
+                    self._on_sample()
+                self._stop.wait(self.interval)
+        finally:
+            for fd in fds:
+                if fd is not None:
+                    os.close(fd)
+
+    def sample(self, stat_fd: int, status_fd: int, io_fd: int | None):
+        """Take one sample from already opened /proc files"""
+        counters = read_counters(stat_fd, status_fd, io_fd)
+        if self._previous is not None:
+            self.usage.record(self._previous, counters)
+        self._previous = counters
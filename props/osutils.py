@@ -1,7 +1,73 @@
 """OS utilities"""
+import ctypes
 import os
-from .config import DEFAULT_SYMLINK, PROFILE_DIR
+import platform
+import shutil
+from typing import Collection
+from .config import get_paths
 from .data import ReturnInfo, ReturnType
+from .frame import frame
+from .jars import usage
+
+# ioprio_set has no libc wrapper, these are its syscall numbers
+IOPRIO_SET = {"x86_64": 251, "i686": 289, "aarch64": 30, "riscv64": 30, "armv7l": 314}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+LOWEST_NICE = 19
+
+def low_priority():
+    """
+    Lower the CPU and I/O priority of the calling thread (best effort),
+    so maintenance work yields to running servers.
+    """
+    try:
+        # On Linux both calls only affect the calling thread
+        os.setpriority(os.PRIO_PROCESS, 0, LOWEST_NICE)
+    except OSError:
+        pass
+    number = IOPRIO_SET.get(platform.machine())
+    if number is None:
+        return
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.syscall(number, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT)
+    except (OSError, AttributeError):
+        pass
+
+
+def low_priority_command(args: list[str]) -> list[str]:
+    """
+    Prefix a command with nice and ionice (those available) so it starts at the lowest
+    CPU and idle I/O priority, without running Python in the forked child.
+    """
+    prefix = []
+    nice = shutil.which("nice")
+    if nice is not None:
+        prefix += [nice, "-n", str(LOWEST_NICE)]
+    ionice = shutil.which("ionice")
+    if ionice is not None:
+        prefix += [ionice, "-c", str(IOPRIO_CLASS_IDLE)]
+    return [*prefix, *args]
+
+
+def scan_tree(base: str | os.PathLike, exclude: Collection[str] = ()):
+    """
+    Yield (relative path, DirEntry) for every file, directory and symlink under base,
+    skipping names or relative paths in exclude. Symlinks are not followed.
+    """
+    pending = [""]
+    while pending:
+        relative = pending.pop()
+        with os.scandir(os.path.join(base, relative)) as entries:
+            for entry in entries:
+                name = f"{relative}/{entry.name}" if relative else entry.name
+                if entry.name in exclude or name in exclude:
+                    continue
+                yield name, entry
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(name)
+
 
 def list_versions(directory: str):
     """
@@ -20,9 +86,15 @@ def list_versions(directory: str):
 def get_active_version():
     """
     Determine which version is currently active based on the server.jar symlink.
+    Resolved at most once per frame.
     """
-    if os.path.islink(DEFAULT_SYMLINK):
-        target = os.readlink(DEFAULT_SYMLINK)
+    return frame.memo("active_version", _read_active_version)
+
+
+def _read_active_version():
+    default_symlink = get_paths().default_symlink
+    if os.path.islink(default_symlink):
+        target = os.readlink(default_symlink)
         return os.path.basename(target)
     return None
 
@@ -31,12 +103,27 @@ def create_profile(version: str) -> ReturnInfo[str]:
     """
     Ensure that an isolated profile directory exists for the selected version.
     """
-    profile_path = os.path.join(PROFILE_DIR, version.replace(".jar", ""))
+    profile_path = os.path.join(get_paths().profiles, version.replace(".jar", ""))
     if not os.path.exists(profile_path):
         os.makedirs(profile_path)
     return ReturnInfo(ReturnType.OK, f"Created profile directory: {profile_path}", profile_path)
 
 
+def select_version(jar: str) -> ReturnInfo[None]:
+    """
+    Make an installed jar the default server, creating its profile if needed.
+    """
+    paths = get_paths()
+    if not (paths.bin / jar).exists():
+        return ReturnInfo(ReturnType.ERR, f"'{jar}' is not installed", None)
+    create_profile(jar)
+    create_symlink(
+        str(paths.profiles / jar.replace(".jar", "")), str(paths.default_profile)
+    )
+    usage.record(jar, "selected")
+    return create_symlink(str(paths.bin / jar), str(paths.default_symlink))
+
+
 def create_symlink(source: str, destination: str) -> ReturnInfo[None]:
     """
     Create or update the symlink for the default server.jar.
@@ -44,4 +131,5 @@ def create_symlink(source: str, destination: str) -> ReturnInfo[None]:
     if os.path.islink(destination) or os.path.exists(destination):
         os.remove(destination)
     os.symlink(os.path.abspath(source), destination)
+    frame.forget("active_version")
     return ReturnInfo(ReturnType.OK, f"Symlink updated from {destination} -> {source}", None)
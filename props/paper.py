@@ -3,34 +3,81 @@
 from os import remove
 from os.path import exists
 from json import loads
+from hashlib import sha256
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Event, RLock
+from typing import Any, Callable, Iterable
 import time
 
-from tqdm import tqdm
-from requests import get, head
+from requests import RequestException, Session
+from requests.adapters import HTTPAdapter
 
-from props.typings import GlobalRepo, VersionBuildRepo
-from .config import APP_CACHE_VAULT, SERVER_BIN
+from props.typings import BuildInfo, GlobalRepo, VersionBuildRepo
+from .cache import METADATA
+from .config import config_service, get_paths, read_config
+from .download import download, DEFAULT_WORKERS, ProgressCallback
+from .store import STORE_TMP, add_artifact, has_artifact, materialize
 
 REPOSITORY = "https://api.papermc.io/v2/projects/paper"
 VERSION_REPO = "https://api.papermc.io/v2/projects/paper/versions/{version}"
+BUILD_INFO_REPO = "https://api.papermc.io/v2/projects/paper/versions/{version}/builds/{build}"
 BUILDS_REPO = ("https://api.papermc.io/v2/projects/paper/versions/{version}"
               "/builds/{build}/downloads/paper-{version}-{build}.jar")
 GENERIC_FILE = "paper-{version}-{build}.jar"
 ERR = {}
 
-DEFAULT_CHUNK_SIZE = 16 * 1024
-
 DEFAULT_TIMEOUT = 5
+DEFAULT_POOL_SIZE = 4
 CACHE_TTL = 1 * (24 * 3600)
+MAX_STALE = 7 * (24 * 3600)
+PREFETCH_WORKERS = 4
+
+_SESSION: Session | None = None
+_SESSION_POOL = DEFAULT_POOL_SIZE
+_PREFETCH_POOL = ThreadPoolExecutor(PREFETCH_WORKERS, thread_name_prefix="prefetch")
+_IN_FLIGHT: dict[str, Future] = {}
+_IN_FLIGHT_LOCK = RLock()
+
+
+def _reset_session(config):
+    """Drop the pooled session when its pool size is reconfigured"""
+    global _SESSION  # pylint: disable=global-statement
+    if _SESSION is not None and config.get("pool_size", DEFAULT_POOL_SIZE) != _SESSION_POOL:
+        _SESSION = None
+
+
+def get_session() -> Session:
+    """Return the shared, pooled HTTP session"""
+    global _SESSION, _SESSION_POOL  # pylint: disable=global-statement
+    if _SESSION is None:
+        pool_size = read_config().get("pool_size", DEFAULT_POOL_SIZE)
+        _SESSION_POOL = pool_size
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        _SESSION = Session()
+        _SESSION.mount("https://", adapter)
+        _SESSION.mount("http://", adapter)
+    return _SESSION
+
 
+def is_fresh(name: str) -> bool:
+    """Check if a cache entry exists and is younger than CACHE_TTL"""
+    fetched_at = METADATA.fetched_at(name)
+    return fetched_at is not None and fetched_at >= (time.time() - CACHE_TTL)
 
-def fetch(url: str, name: str, force: bool = False):
-    """Fetch current content and store to cache fault"""
-    cache = APP_CACHE_VAULT / name
-    if cache.exists() and force is False:
-        if cache.stat().st_mtime >= (time.time() - CACHE_TTL):
-            return loads(cache.read_text())
-    data = get(url, timeout=5)
+
+def revalidate(url: str, name: str):
+    """Fetch url, conditionally if there's a cached copy, and update the cache"""
+    cached = METADATA.get(name)
+    request_headers = {}
+    if cached is not None:
+        if cached.etag:
+            request_headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            request_headers["If-Modified-Since"] = cached.last_modified
+    data = get_session().get(url, headers=request_headers, timeout=DEFAULT_TIMEOUT)
+    if data.status_code == 304 and cached is not None:
+        METADATA.touch(name)
+        return loads(cached.body)
     if not data.ok:
         exc = ValueError(data.reason)
         err_store = f"cache_fault/{name}"
@@ -38,37 +85,140 @@ def fetch(url: str, name: str, force: bool = False):
         ERR[err_store] = data
         raise exc
 
-    (APP_CACHE_VAULT / name).write_text(data.content.decode())
+    METADATA.put(
+        name,
+        url,
+        data.content.decode(),
+        data.headers.get("ETag"),
+        data.headers.get("Last-Modified"),
+    )
     return data.json()
 
 
-def fetch_global() -> GlobalRepo:
+def _forget(name: str, future: Future):
+    with _IN_FLIGHT_LOCK:
+        if _IN_FLIGHT.get(name) is future:
+            del _IN_FLIGHT[name]
+
+
+def _notify(future: Future, on_refresh: Callable[[Any], None]):
+    if future.cancelled() or future.exception() is not None:
+        return
+    on_refresh(future.result())
+
+
+def revalidate_in_background(url: str, name: str) -> Future:
+    """Revalidate a cache entry on the prefetch pool, joining one in flight"""
+    with _IN_FLIGHT_LOCK:
+        future = _IN_FLIGHT.get(name)
+        if future is None:
+            future = _PREFETCH_POOL.submit(revalidate, url, name)
+            _IN_FLIGHT[name] = future
+            future.add_done_callback(lambda done: _forget(name, done))
+    return future
+
+
+def fetch(
+    url: str,
+    name: str,
+    force: bool = False,
+    on_refresh: Callable[[Any], None] | None = None,
+):
+    """Fetch current content and store it in the metadata cache.
+
+    A cache entry older than CACHE_TTL but within max stale age is returned as
+    is while it's revalidated in the background; on_refresh receives the new
+    data once it lands. On network errors, and error responses from the API, any
+    cached copy is used instead."""
+    cached = METADATA.get(name)
+    if cached is not None and force is False:
+        age = time.time() - cached.fetched_at
+        if age < CACHE_TTL:
+            return loads(cached.body)
+        if age < read_config().get("cache_max_stale", MAX_STALE):
+            future = revalidate_in_background(url, name)
+            if on_refresh is not None:
+                future.add_done_callback(lambda done: _notify(done, on_refresh))
+            return loads(cached.body)
+
+    with _IN_FLIGHT_LOCK:
+        future = _IN_FLIGHT.get(name)
+    try:
+        if future is not None and not future.cancelled():
+            return future.result()
+        return revalidate(url, name)
+    except (RequestException, ValueError):
+        # revalidate() turns error responses (a 5xx while the API is down) into ValueError
+        if cached is None:
+            raise
+        return loads(cached.body)
+
+
+def fetch_global(on_refresh: Callable[[GlobalRepo], None] | None = None) -> GlobalRepo:
     """Fetch global repository metadata"""
-    return fetch(REPOSITORY, "repo.cache")
+    return fetch(REPOSITORY, "repo.cache", on_refresh=on_refresh)
+
+
+def prefetch_version_info(versions: Iterable[str]):
+    """Warm version caches in the background, in the given order.
+    Versions already cached or in flight are skipped."""
+    for version in versions:
+        if not is_fresh(f"v{version}.cache"):
+            revalidate_in_background(VERSION_REPO.format(version=version), f"v{version}.cache")
+
 
+def shutdown_prefetch():
+    """Drop queued prefetches, used when the app exits"""
+    _PREFETCH_POOL.shutdown(wait=False, cancel_futures=True)
 
-def fetch_version_info(version: str) -> VersionBuildRepo:
+
+def fetch_version_info(
+    version: str, on_refresh: Callable[[VersionBuildRepo], None] | None = None
+) -> VersionBuildRepo:
     """Fetch version info"""
-    return fetch(VERSION_REPO.format(version=version), f"v{version}.cache")
+    return fetch(
+        VERSION_REPO.format(version=version), f"v{version}.cache", on_refresh=on_refresh
+    )
+
+
+def fetch_build_info(version: str, build: int) -> BuildInfo:
+    """Fetch build info, including published checksums"""
+    return fetch(
+        BUILD_INFO_REPO.format(version=version, build=build), f"v{version}-{build}.cache"
+    )
 
 
-def fetch_minecraft(version: str, build: int):
-    """Fetch server jar"""
+def fetch_minecraft(
+    version: str,
+    build: int,
+    verbose: bool = True,
+    on_progress: ProgressCallback | None = None,
+    cancel: Event | None = None,
+):
+    """Fetch server jar, verify it and link it into SERVER_BIN from the jar store"""
     url = BUILDS_REPO.format(version=version, build=build)
-    filename = SERVER_BIN / GENERIC_FILE.format(version=version, build=build)
-    header = head(url, timeout=DEFAULT_TIMEOUT)
-    total_size = int(header.headers.get("content-length", 0))
-    if exists(filename):
+    jar_name = GENERIC_FILE.format(version=version, build=build)
+    filename = get_paths().bin / jar_name
+    expected = fetch_build_info(version, build)["downloads"]["application"]["sha256"]
+    if exists(filename) and verbose:
         print("This download will overwrite existing file")
-        remove(filename)
-    with get(url, stream=True, timeout=DEFAULT_TIMEOUT) as stream, open(
-        filename, "wb"
-    ) as file:
-        stream.raise_for_status()
-        with tqdm(
-            total=total_size, unit="B", unit_scale=True, desc="Downloading"
-        ) as progress:
-            for chunk in stream.iter_content(DEFAULT_CHUNK_SIZE):
-                if chunk:
-                    file.write(chunk)
-                    progress.update(len(chunk))
+    if has_artifact(expected):
+        if verbose:
+            print("Found in jar store, linking")
+        materialize(expected, filename)
+        return
+
+    workers = read_config().get("download_workers", DEFAULT_WORKERS)
+    digest = sha256()
+    temp = STORE_TMP / jar_name
+    download(get_session(), url, temp, workers, digest, verbose, on_progress, cancel)
+    if digest.hexdigest() != expected:
+        remove(temp)
+        raise ValueError(
+            f"Checksum mismatch for {jar_name}: expected {expected}, got {digest.hexdigest()}"
+        )
+    add_artifact(temp, expected)
+    materialize(expected, filename)
+
+
+config_service.subscribe(_reset_session)
@@ -0,0 +1,241 @@
+"""Resolve, fetch and link plugins from a Modrinth style repository API"""
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from hashlib import sha512
+from json import dumps, loads
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable
+
+from requests import RequestException
+
+from .config import get_paths, read_config
+from .jars import parse_jar
+from .jvm import load_settings, save_settings
+from .paper import DEFAULT_TIMEOUT, get_session
+from .store import STORE_TMP, add_artifact, has_artifact, materialize
+
+DEFAULT_REPOSITORY = "https://api.modrinth.com/v2"
+DEFAULT_LOADERS = ["paper", "spigot", "bukkit"]
+DEFAULT_WORKERS = 8
+PLUGINS_DIR = "plugins"
+# Which files in plugins/ SheetStack put there, anything else is left alone
+MANIFEST = ".sheetstack-plugins.json"
+USER_AGENT = "RimuEirnarn/SheetStack (plugin manager)"
+
+Version = dict[str, Any]
+
+
+class Repository:
+    """Repository client that asks for every project or version at most once per instance"""
+
+    def __init__(self, base: str, loaders: list[str], pool: ThreadPoolExecutor) -> None:
+        self._base = base.rstrip("/")
+        self._loaders = loaders
+        self._pool = pool
+        self._lock = Lock()
+        self._requests: dict[tuple, Future] = {}
+
+    def _once(self, key: tuple, fn: Callable[[], Any]) -> Future:
+        with self._lock:
+            future = self._requests.get(key)
+            if future is None:
+                future = self._requests[key] = self._pool.submit(fn)
+            return future
+
+    def _get(self, path: str, **params) -> Any:
+        response = get_session().get(
+            f"{self._base}{path}",
+            params=params,
+            headers={"User-Agent": USER_AGENT},
+            timeout=DEFAULT_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def latest(self, project: str, mc_version: str) -> Future:
+        """Newest version of a project that runs on mc_version"""
+
+        def fetch() -> Version:
+            versions = self._get(
+                f"/project/{project}/version",
+                loaders=dumps(self._loaders),
+                game_versions=dumps([mc_version]),
+            )
+            if not versions:
+                raise ValueError(f"{project} has no version for {mc_version}")
+            return max(versions, key=lambda version: version["date_published"])
+
+        return self._once(("latest", project, mc_version), fetch)
+
+    def version(self, version_id: str) -> Future:
+        """A specific version, as pinned by a dependency"""
+        return self._once(("version", version_id), lambda: self._get(f"/version/{version_id}"))
+
+    def artifact(self, version: Version) -> Future:
+        """Download a version's primary jar into the store, once per digest"""
+        file = _primary(version)
+        digest = file["hashes"]["sha512"]
+        return self._once(("artifact", digest), lambda: _fetch_artifact(file["url"], digest))
+
+
+def _primary(version: Version) -> dict[str, Any]:
+    files = version["files"]
+    return next((file for file in files if file.get("primary")), files[0])
+
+
+def _fetch_artifact(url: str, digest: str) -> str:
+    """Download and verify a file into the shared store, return its digest"""
+    if has_artifact(digest):
+        return digest
+    temp = STORE_TMP / f"{digest[:32]}.plugin"
+    hasher = sha512()
+    with get_session().get(url, stream=True, timeout=DEFAULT_TIMEOUT) as response:
+        response.raise_for_status()
+        with open(temp, "wb") as file:
+            for chunk in response.iter_content(64 * 1024):
+                hasher.update(chunk)
+                file.write(chunk)
+    if hasher.hexdigest() != digest:
+        temp.unlink()
+        raise ValueError(f"Checksum mismatch for {url}")
+    add_artifact(temp, digest)
+    return digest
+
+
+def game_version(profile: str) -> str:
+    """Minecraft version a profile runs, from its jar name"""
+    parsed = parse_jar(f"{profile}.jar")
+    if parsed is None:
+        raise ValueError(f"Can't tell the Minecraft version of {profile}")
+    return parsed[0]
+
+
+def resolve(repository: Repository, projects: list[str], version: str) -> dict[str, Version]:
+    """Pick a version of every project and, recursively, of their required dependencies.
+
+    The dependency graph is walked a level at a time with the whole level fetched
+    concurrently. A project keeps the first level's pick, and within a level an exact
+    version pin beats the newest version, so the result doesn't depend on timing."""
+    resolved: dict[str, Version] = {}
+    # (pinned, future) pairs, requested projects count as pinned
+    level = [(True, repository.latest(project, version)) for project in projects]
+    while level:
+        wait([future for _, future in level])
+        picks: dict[str, tuple[bool, Version]] = {}
+        for pinned, future in level:
+            picked: Version = future.result()
+            project = picked["project_id"]
+            if project not in resolved and (project not in picks or pinned > picks[project][0]):
+                picks[project] = (pinned, picked)
+        resolved.update((project, picked) for project, (_, picked) in picks.items())
+        queued = set()
+        level = []
+        for _, picked in picks.values():
+            for dependency in picked.get("dependencies", []):
+                pin, project = dependency.get("version_id"), dependency.get("project_id")
+                if dependency.get("dependency_type") != "required" or project in resolved:
+                    continue
+                if pin and pin not in queued:
+                    level.append((True, repository.version(pin)))
+                elif not pin and project and project not in queued:
+                    level.append((False, repository.latest(project, version)))
+                queued.add(pin or project)
+    return resolved
+
+
+def _read_manifest(plugins: Path) -> dict[str, str]:
+    try:
+        return loads((plugins / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def link_plugins(profile: Path, artifacts: dict[str, str]) -> dict[str, list[str]]:
+    """Make profile/plugins hold exactly the managed artifacts ({file name: digest}).
+
+    Jars put there by hand are never touched, a managed jar that would replace one
+    is reported as a conflict instead."""
+    plugins = profile / PLUGINS_DIR
+    plugins.mkdir(exist_ok=True)
+    previous = _read_manifest(plugins)
+    report: dict[str, list[str]] = {"linked": [], "removed": [], "conflicts": []}
+    managed = {}
+    for name, digest in artifacts.items():
+        target = plugins / name
+        if target.exists() and name not in previous:
+            report["conflicts"].append(name)
+            continue
+        if previous.get(name) != digest or not target.exists():
+            materialize(digest, target)
+            report["linked"].append(name)
+        managed[name] = digest
+    for name in previous.keys() - managed.keys():
+        (plugins / name).unlink(missing_ok=True)
+        report["removed"].append(name)
+    temp = plugins / f"{MANIFEST}.tmp"
+    temp.write_text(dumps(managed), encoding="utf-8")
+    os.replace(temp, plugins / MANIFEST)
+    return report
+
+
+def installed(profile: str) -> dict[str, str]:
+    """Managed plugin jars of a profile, {file name: digest}"""
+    return _read_manifest(get_paths().profiles / profile / PLUGINS_DIR)
+
+
+def requested(profile: str) -> list[str]:
+    """Projects a profile asks for"""
+    return list(load_settings(get_paths().profiles / profile)["plugins"])
+
+
+def set_requested(profile: str, projects: list[str]):
+    """Change the projects a profile asks for, takes effect on the next update"""
+    path = get_paths().profiles / profile
+    settings = load_settings(path)
+    settings["plugins"] = sorted(set(projects))
+    save_settings(path, settings)
+
+
+def update(profiles: list[str]) -> dict[str, dict]:
+    """Resolve and install the requested plugins of several profiles at once.
+
+    Metadata and artifacts are shared between profiles, so an artifact used by ten
+    profiles is fetched once (and not at all if the store already has it)."""
+    config = read_config()
+    results: dict[str, dict] = {}
+    with ThreadPoolExecutor(config.get("plugin_workers", DEFAULT_WORKERS)) as pool:
+        repository = Repository(
+            config.get("plugin_repository", DEFAULT_REPOSITORY),
+            config.get("plugin_loaders", DEFAULT_LOADERS),
+            pool,
+        )
+        # Resolution blocks on the pool, so it runs on threads of its own
+        with ThreadPoolExecutor(max(1, len(profiles)), thread_name_prefix="resolve") as resolver:
+            plans = {
+                profile: resolver.submit(_plan, repository, profile) for profile in profiles
+            }
+            for profile, plan in plans.items():
+                try:
+                    results[profile] = _install(repository, profile, plan.result())
+                except (RequestException, OSError, ValueError, KeyError) as exc:
+                    results[profile] = {"error": str(exc)}
+    return results
+
+
+def _plan(repository: Repository, profile: str) -> dict[str, Version]:
+    return resolve(repository, requested(profile), game_version(profile))
+
+
+def _install(repository: Repository, profile: str, versions: dict[str, Version]) -> dict:
+    # Start every download before waiting on any of them
+    artifacts = {project: repository.artifact(version) for project, version in versions.items()}
+    files = {}
+    for project, artifact in artifacts.items():
+        files[_primary(versions[project])["filename"]] = artifact.result()
+    report: dict = link_plugins(get_paths().profiles / profile, files)
+    report["versions"] = {
+        version["project_id"]: version["version_number"] for version in versions.values()
+    }
+    return report
@@ -0,0 +1,147 @@
+"""Run paperclip's patch step ahead of the first boot and share its output between profiles"""
+
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from subprocess import DEVNULL, STDOUT, Popen, TimeoutExpired
+from threading import Lock
+
+from .config import APP_CACHE_VAULT, get_paths, read_config
+from .data import status
+from .osutils import low_priority_command
+from .tasks import tasks
+
+PATCH_ROOT = APP_CACHE_VAULT / "paperclip"
+# What paperclip extracts next to the jar, identical for every profile on the same build
+SHARED = ("cache", "libraries", "versions")
+MARKER = ".patched"
+PATCH_TIMEOUT = 600
+
+
+def patch_dir(jar: str) -> Path:
+    """Where the patched output of a jar is kept"""
+    return PATCH_ROOT / jar.removesuffix(".jar")
+
+
+def _fingerprint(jar: Path) -> str:
+    stat = jar.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def is_patched(jar: str) -> bool:
+    """Whether the jar in SERVER_BIN was patched, and hasn't changed since"""
+    marker = patch_dir(jar) / MARKER
+    path = get_paths().bin / jar
+    try:
+        return marker.read_text(encoding="utf-8") == _fingerprint(path)
+    except OSError:
+        return False
+
+
+def link_patched(profile: Path, jar: str) -> bool:
+    """Point a profile's cache, libraries and versions at the shared patched output.
+
+    Directories paperclip already created in the profile are left alone."""
+    if not is_patched(jar):
+        return False
+    source = patch_dir(jar)
+    for name in SHARED:
+        target = profile / name
+        if not (source / name).exists():
+            continue
+        if target.is_symlink():
+            target.unlink()
+        elif target.exists():
+            continue
+        target.symlink_to(source / name, target_is_directory=True)
+    return True
+
+
+def sweep() -> int:
+    """Drop patched output of jars no longer in SERVER_BIN, return how many"""
+    if not PATCH_ROOT.is_dir():
+        return 0
+    binary = get_paths().bin
+    removed = 0
+    for directory in PATCH_ROOT.iterdir():
+        if not (binary / f"{directory.name}.jar").exists():
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class _Prepatcher:
+    """Patch freshly installed jars one at a time on a low priority background thread"""
+
+    def __init__(self) -> None:
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = Lock()
+        self._pending: dict[str, Future] = {}
+        self._process: Popen | None = None
+
+    def submit(self, jar: str) -> Future | None:
+        """Queue a jar for patching, None when disabled or already patched"""
+        if not read_config().get("prepatch", True) or is_patched(jar):
+            return None
+        with self._lock:
+            if jar in self._pending:
+                return self._pending[jar]
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(1, thread_name_prefix="prepatch")
+            future = self._pool.submit(self._run, jar)
+            self._pending[jar] = future
+        future.add_done_callback(lambda _: self._pending.pop(jar, None))
+        return future
+
+    def _run(self, jar: str):
+        try:
+            self.patch(jar)
+        except (OSError, ValueError) as exc:
+            tasks.post(lambda exc=exc: status.set(f"Pre-patching {jar} failed: {exc}"))
+            return
+        tasks.post(lambda: status.set(f"Pre-patched {jar}, its first boot skips patching"))
+
+    def patch(self, jar: str):
+        """Run paperclip in patch-only mode for a jar, blocking until it's done"""
+        path = get_paths().bin / jar
+        if not path.exists():
+            raise ValueError(f"'{jar}' is not installed")
+        directory = patch_dir(jar)
+        if directory.exists():
+            shutil.rmtree(directory)
+        directory.mkdir(parents=True)
+        args = [read_config()["java_path"], "-Dpaperclip.patchonly=true", "-jar", str(path)]
+        # Lowered before exec, so the JVM never competes with running servers
+        with open(directory / "patch.log", "wb") as log:
+            process = Popen(  # pylint: disable=consider-using-with
+                low_priority_command(args),
+                cwd=directory,
+                stdin=DEVNULL,
+                stdout=log,
+                stderr=STDOUT,
+            )
+            self._process = process
+            try:
+                returncode = process.wait(PATCH_TIMEOUT)
+            except TimeoutExpired:
+                process.kill()
+                process.wait()
+                raise OSError(f"paperclip did not finish within {PATCH_TIMEOUT}s") from None
+            finally:
+                self._process = None
+        if returncode != 0:
+            raise OSError(f"paperclip exited with {returncode}, see {directory / 'patch.log'}")
+        (directory / MARKER).write_text(_fingerprint(path), encoding="utf-8")
+
+    def shutdown(self, wait: bool = False):
+        """Stop patching, or with wait finish queued jars first"""
+        if self._pool is None:
+            return
+        if not wait:
+            process = self._process
+            if process is not None and process.poll() is None:
+                process.kill()
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+prepatcher = _Prepatcher()
@@ -0,0 +1,294 @@
+"""Supervised server processes"""
+
+from collections import deque
+import shutil
+from os import PathLike, sched_setaffinity
+from subprocess import PIPE, STDOUT, Popen, TimeoutExpired
+from threading import Lock, Thread
+from typing import Callable
+import time
+
+from .metrics import DEFAULT_INTERVAL, Sampler
+from .tasks import tasks
+
+DEFAULT_CONSOLE_LINES = 2000
+MAX_LINE_LENGTH = 1024
+STOP_TIMEOUT = 30
+SAVE_TIMEOUT = 60
+SAVED_MARKER = "Saved the game"
+READY_MARKERS = ("Done (", "For help")
+
+
+class ConsoleBuffer:
+    """Ring buffer of console lines that wakes the UI when lines arrive"""
+
+    def __init__(self, max_lines: int = DEFAULT_CONSOLE_LINES) -> None:
+        self.last_output = time.monotonic()
+        self._lines: deque[str] = deque(maxlen=max_lines)
+        self._lock = Lock()
+        self._seen = 0
+        self._wake_pending = False
+
+    def append(self, line: str):
+        """Add a line to the buffer and wake the UI"""
+        with self._lock:
+            self._lines.append(line)
+            self._seen += 1
+        self.wake()
+
+    def wake(self):
+        """Ask the UI to redraw, at most one request pending at a time"""
+        with self._lock:
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+        tasks.post(self._woken)
+
+    def _woken(self):
+        with self._lock:
+            self._wake_pending = False
+
+    def tail(self, count: int, skip: int = 0) -> list[str]:
+        """Return up to count lines, ending skip lines before the newest"""
+        with self._lock:
+            end = max(0, len(self._lines) - skip)
+            start = max(0, end - count)
+            return [self._lines[index] for index in range(start, end)]
+
+    @property
+    def seen(self) -> int:
+        """How many lines were ever written"""
+        return self._seen
+
+    @property
+    def buffered(self) -> int:
+        """How many lines are kept"""
+        return len(self._lines)
+
+
+class ServerProcess:  # pylint: disable=too-many-instance-attributes
+    """A server started with Popen, its output kept in a bounded ring buffer.
+
+    The console lives in a ConsoleBuffer, what's left is one launch: its settings,
+    readiness and process handles."""
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        args: list[str],
+        cwd: str | PathLike,
+        max_lines: int = DEFAULT_CONSOLE_LINES,
+        metrics_interval: float = DEFAULT_INTERVAL,
+        cpus: set[int] | None = None,
+    ) -> None:
+        self.args = args
+        self.cwd = cwd
+        self.cpus = cpus
+        self.port: int | None = None
+        self.stopping = False
+        self.console = ConsoleBuffer(max_lines)
+        self.started = 0.0
+        self.ready_after: float | None = None
+        self.on_ready: Callable[[float], None] | None = None
+        self.metrics: Sampler | None = None
+        self._metrics_interval = metrics_interval
+        self._process: Popen | None = None
+        self._reader: Thread | None = None
+
+    def _argv(self) -> list[str]:
+        """Command line to launch, behind taskset when pinned to CPUs.
+
+        taskset sets the affinity before exec, so every JVM thread inherits it. Doing
+        that with preexec_fn would run Python in the child of a threaded process."""
+        taskset = shutil.which("taskset")
+        if not self.cpus or taskset is None:
+            return self.args
+        return [taskset, "-c", ",".join(map(str, sorted(self.cpus))), *self.args]
+
+    def start(self):
+        """Launch the process and start pumping its output"""
+        self.started = time.monotonic()
+        argv = self._argv()
+        self._process = Popen(  # pylint: disable=consider-using-with
+            argv,
+            cwd=self.cwd,
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=STDOUT,
+        )
+        if self.cpus and argv is self.args:
+            # No taskset, pin from here. Only threads the JVM starts afterwards inherit it
+            try:
+                sched_setaffinity(self._process.pid, self.cpus)
+            except OSError:
+                pass
+        self._reader = Thread(target=self._pump, name=f"console-{self.pid}", daemon=True)
+        self._reader.start()
+        self.metrics = Sampler(self._process.pid, self._metrics_interval, self.console.wake)
+        self.metrics.start()
+
+    def _pump(self):
+        """Read output lines until the process closes stdout"""
+        assert self._process is not None and self._process.stdout is not None
+        stdout = self._process.stdout
+        # Reading with a limit keeps a runaway line from growing unbounded
+        for raw in iter(lambda: stdout.readline(MAX_LINE_LENGTH), b""):
+            self.console.last_output = time.monotonic()
+            line = raw.decode(errors="replace").rstrip()
+            self.append(line)
+            if self.ready_after is None and all(marker in line for marker in READY_MARKERS):
+                self._ready()
+        self._process.wait()
+        if self.metrics is not None:
+            self.metrics.stop()
+        self.append(f"[Process exited with code {self._process.returncode}]")
+
+    def _ready(self):
+        """The server finished starting, note how long it took from launch"""
+        self.ready_after = self.console.last_output - self.started
+        if self.on_ready is not None:
+            self.on_ready(self.ready_after)
+
+    def append(self, line: str):
+        """Add a line to the console"""
+        self.console.append(line)
+
+    def tail(self, count: int, skip: int = 0) -> list[str]:
+        """Return up to count console lines, ending skip lines before the newest"""
+        return self.console.tail(count, skip)
+
+    @property
+    def last_output(self) -> float:
+        """When the server last wrote a line, monotonic"""
+        return self.console.last_output
+
+    @property
+    def seen(self) -> int:
+        """How many lines were ever written"""
+        return self.console.seen
+
+    @property
+    def buffered(self) -> int:
+        """How many lines are kept"""
+        return self.console.buffered
+
+    @property
+    def pid(self) -> int | None:
+        """Process id, None before start"""
+        return None if self._process is None else self._process.pid
+
+    @property
+    def running(self) -> bool:
+        """Whether the process is alive"""
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def returncode(self) -> int | None:
+        """Exit code, None while running"""
+        return None if self._process is None else self._process.poll()
+
+    def send(self, command: str) -> bool:
+        """Write a command line to the server's stdin"""
+        if not self.running or self._process is None or self._process.stdin is None:
+            return False
+        try:
+            self._process.stdin.write(f"{command}\n".encode())
+            self._process.stdin.flush()
+        except OSError:
+            return False
+        self.append(f"> {command}")
+        return True
+
+    def pause_saving(self, timeout: float = SAVE_TIMEOUT) -> bool:
+        """Flush worlds to disk and turn autosave off so they can be copied consistently.
+
+        Returns whether saving was paused, resume_saving turns it back on."""
+        if not self.running:
+            return False
+        seen = self.seen
+        self.send("save-off")
+        self.send("save-all flush")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.running:
+            fresh = self.seen - seen
+            if fresh and any(SAVED_MARKER in line for line in self.tail(min(fresh, 50))):
+                break
+            time.sleep(0.2)
+        return True
+
+    def resume_saving(self):
+        """Turn autosave back on after pause_saving"""
+        self.send("save-on")
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        """Ask the server to stop, terminating (then killing) it if it does not"""
+        if self._process is None or not self.running:
+            return
+        self.stopping = True
+        self.send("stop")
+        try:
+            self._process.wait(timeout)
+            return
+        except TimeoutExpired:
+            self._process.terminate()
+        try:
+            self._process.wait(timeout)
+        except TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+    def kill(self):
+        """Kill the process right away, used on hung servers"""
+        if self._process is not None and self.running:
+            self._process.kill()
+            self._process.wait()
+
+
+class _Supervisor:
+    """Keep track of launched servers by profile name"""
+
+    def __init__(self) -> None:
+        self._servers: dict[str, ServerProcess] = {}
+        self._lock = Lock()
+
+    def launch(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        name: str,
+        args: list[str],
+        cwd: str | PathLike,
+        max_lines: int = DEFAULT_CONSOLE_LINES,
+        metrics_interval: float = DEFAULT_INTERVAL,
+        cpus: set[int] | None = None,
+    ) -> ServerProcess:
+        """Start a server for a profile, replacing a finished one"""
+        with self._lock:
+            current = self._servers.get(name)
+            if current is not None and current.running:
+                raise RuntimeError(f"{name} is already running")
+            server = ServerProcess(args, cwd, max_lines, metrics_interval, cpus)
+            server.start()
+            self._servers[name] = server
+        return server
+
+    def get(self, name: str) -> ServerProcess | None:
+        """Return the last server launched for a profile"""
+        with self._lock:
+            return self._servers.get(name)
+
+    def running(self) -> dict[str, ServerProcess]:
+        """Return servers that are alive"""
+        with self._lock:
+            return {name: server for name, server in self._servers.items() if server.running}
+
+    def shutdown(self):
+        """Stop every running server in parallel, used when the app exits"""
+        stopping = [
+            Thread(target=server.stop, name=f"stop-{name}")
+            for name, server in self.running().items()
+        ]
+        for thread in stopping:
+            thread.start()
+        for thread in stopping:
+            thread.join()
+
+
+supervisor = _Supervisor()
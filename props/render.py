@@ -0,0 +1,100 @@
+"""Damage-tracked rendering"""
+
+# pylint: disable=no-member
+
+import curses
+from typing import Any
+
+from .frame import frame
+
+Span = tuple[int, str, int]
+
+
+class Canvas:
+    """Window proxy that only repaints lines that changed since the last frame.
+
+    Components draw into it as if it were the curses window; `flush` compares
+    every line with the previous frame and rewrites changed lines only, then
+    pushes the result with noutrefresh/doupdate."""
+
+    def __init__(self, window: curses.window) -> None:
+        self._window = window
+        self._lines: dict[int, list[Span]] = {}
+        self._previous: dict[int, list[Span]] | None = None
+        self._cursor = (0, 0)
+        self._move: tuple[int, int] | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._window, name)
+
+    @property
+    def window(self) -> curses.window:
+        """The wrapped window"""
+        return self._window
+
+    def begin(self):
+        """Start recording a new frame"""
+        self._lines = {}
+        self._cursor = (0, 0)
+        self._move = None
+
+    def invalidate(self):
+        """Force a full repaint on next flush"""
+        self._previous = None
+
+    def addstr(self, *args):
+        """Record an addstr call, same signatures as curses"""
+        attr = 0
+        if isinstance(args[0], str):
+            (y, x), text = self._cursor, args[0]
+            if len(args) > 1:
+                attr = args[1]
+        else:
+            y, x, text = args[0], args[1], args[2]
+            if len(args) > 3:
+                attr = args[3]
+        text = text.split("\n", 1)[0]
+        columns = frame.size.columns
+        while x + len(text) > columns:  # curses wraps onto the next line
+            self._lines.setdefault(y, []).append((x, text[: columns - x], attr))
+            text = text[columns - x :]
+            y, x = y + 1, 0
+        self._lines.setdefault(y, []).append((x, text, attr))
+        self._cursor = (y, x + len(text))
+
+    def move(self, y: int, x: int):
+        """Move the cursor once the frame is flushed"""
+        self._move = (y, x)
+        self._cursor = (y, x)
+
+    def erase(self):
+        """Erase everything recorded so far"""
+        self._lines = {}
+
+    def flush(self):
+        """Write changed lines and update the terminal"""
+        window = self._window
+        previous = self._previous
+        if previous is None:
+            window.erase()
+            previous = {}
+        for y in sorted(previous.keys() | self._lines.keys()):
+            spans = self._lines.get(y)
+            if previous.get(y) == spans:
+                continue
+            window.move(y, 0)
+            window.clrtoeol()
+            for x, text, attr in spans or ():
+                window.addstr(y, x, text, attr)
+        self._previous = self._lines
+        self._lines = {}
+        if self._move is not None:
+            window.move(*self._move)
+        window.noutrefresh()
+        curses.doupdate()
+
+    def refresh(self):
+        """Flush recorded lines, then refresh"""
+        lines = {y: list(spans) for y, spans in self._lines.items()}
+        self.flush()
+        self._lines = lines
@@ -0,0 +1,77 @@
+"""Search index over cached versions and builds"""
+
+from json import loads
+from typing import NamedTuple
+
+from .cache import METADATA
+
+
+class SearchEntry(NamedTuple):
+    """A searchable version or build"""
+    version: str
+    build: int | None
+    key: str
+
+    @property
+    def label(self) -> str:
+        """Display text"""
+        if self.build is None:
+            return self.version
+        return f"{self.version} / {self.build}"
+
+
+def matches(key: str, query: str) -> bool:
+    """Each query token must be a prefix of a token of key"""
+    words = key.split()
+    return all(
+        any(word.startswith(token) for word in words) for token in query.split()
+    )
+
+
+class SearchIndex:
+    """Newest-first index with incremental narrowing.
+
+    Results of the current query's prefixes are kept, so typing one more
+    character only filters the previous result set."""
+
+    def __init__(self, entries: list[SearchEntry]) -> None:
+        self._entries = entries
+        self._memo: dict[str, list[SearchEntry]] = {"": entries}
+
+    @classmethod
+    def from_cache(cls) -> "SearchIndex":
+        """Build an index from cached repository and build lists"""
+        cached = METADATA.get("repo.cache")
+        versions: list[str] = []
+        if cached is not None:
+            versions = list(reversed(loads(cached.body)["versions"]))
+        builds = METADATA.builds()
+        for version in builds:
+            if version not in versions:
+                versions.append(version)
+        entries: list[SearchEntry] = []
+        for version in versions:
+            for build in sorted(builds.get(version, ()), reverse=True):
+                entries.append(SearchEntry(version, build, f"{version} {build}"))
+            entries.append(SearchEntry(version, None, version))
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(self, query: str) -> list[SearchEntry]:
+        """Return entries matching query, newest first"""
+        query = query.lower()
+        if query in self._memo:
+            return self._memo[query]
+        base = self._entries
+        for length in range(len(query) - 1, -1, -1):
+            if query[:length] in self._memo:
+                base = self._memo[query[:length]]
+                break
+        results = [entry for entry in base if matches(entry.key, query)]
+        self._memo = {
+            prefix: found for prefix, found in self._memo.items() if query.startswith(prefix)
+        }
+        self._memo[query] = results
+        return results
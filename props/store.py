@@ -0,0 +1,60 @@
+"""Content-addressed artifact store"""
+
+from errno import EXDEV
+from hashlib import sha256
+from os import link, remove, replace
+from os.path import exists, samefile
+from pathlib import Path
+from shutil import copy2
+
+from .config import APP_CACHE_VAULT
+
+STORE_DIR = APP_CACHE_VAULT / "store"
+STORE_TMP = STORE_DIR / "tmp"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+STORE_TMP.mkdir(parents=True, exist_ok=True)
+
+
+def sha256_file(path: Path | str) -> str:
+    """Compute SHA-256 of a file in chunks"""
+    digest = sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_path(digest: str, suffix: str = ".jar") -> Path:
+    """Return where an artifact with this digest lives in the store"""
+    return STORE_DIR / digest[:2] / f"{digest}{suffix}"
+
+
+def has_artifact(digest: str, suffix: str = ".jar") -> bool:
+    """Check if the store already holds an artifact"""
+    return store_path(digest, suffix).exists()
+
+
+def add_artifact(source: Path, digest: str, suffix: str = ".jar") -> Path:
+    """Move a verified file into the store"""
+    target = store_path(digest, suffix)
+    target.parent.mkdir(exist_ok=True)
+    replace(source, target)
+    return target
+
+
+def materialize(digest: str, destination: Path | str, suffix: str = ".jar"):
+    """Hardlink a stored artifact to destination, copying across filesystems"""
+    source = store_path(digest, suffix)
+    if exists(destination) and samefile(source, destination):
+        return
+    temp = Path(f"{destination}.link")
+    if exists(temp):
+        remove(temp)
+    try:
+        link(source, temp)
+    except OSError as exc:
+        if exc.errno != EXDEV:
+            raise
+        copy2(source, temp)
+    replace(temp, destination)
@@ -0,0 +1,128 @@
+"""Background tasks for the TUI"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Empty, SimpleQueue
+from threading import Event, Lock
+from typing import Any, Callable
+
+from .data import status
+
+SPINNER = "|/-\\"
+SPINNER_INTERVAL = 0.1
+DEFAULT_WORKERS = 4
+
+
+class Task:
+    """Handle to a background job"""
+
+    def __init__(self, description: str) -> None:
+        self.description = description
+        self.future: Future | None = None
+        self._cancelled = Event()
+
+    def cancel(self):
+        """Cancel this task, its result will be discarded"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        """Whether this task was cancelled"""
+        return self._cancelled.is_set()
+
+    @property
+    def done(self):
+        """Whether this task finished"""
+        return self.future is not None and self.future.done()
+
+
+class TaskRunner:
+    """Run jobs off the UI thread and hand results back through an event queue"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS) -> None:
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="task")
+        self._events: SimpleQueue[Callable[[], Any]] = SimpleQueue()
+        self._active: list[Task] = []
+        self._lock = Lock()
+
+    def submit(  # pylint: disable=too-many-arguments
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        description: str = "",
+        on_done: Callable[[Any], Any] | None = None,
+        on_error: Callable[[BaseException], Any] | None = None,
+    ) -> Task:
+        """Run fn(*args) in the background.
+
+        on_done/on_error are called on the UI thread by process_events, unless
+        the task was cancelled in the meantime."""
+        task = Task(description)
+
+        def run():
+            try:
+                result = fn(*args)
+            except BaseException as exc:  # pylint: disable=broad-exception-caught
+                if not task.cancelled:
+                    self.post(lambda exc=exc: self._report(exc, on_error))
+            else:
+                if not task.cancelled and on_done is not None:
+                    self.post(lambda: on_done(result))
+
+        with self._lock:
+            self._active.append(task)
+        task.future = self._pool.submit(run)
+        task.future.add_done_callback(lambda _: self._forget(task))
+        return task
+
+    def _forget(self, task: Task):
+        with self._lock:
+            if task in self._active:
+                self._active.remove(task)
+
+    def _report(self, exc: BaseException, on_error: Callable[[BaseException], Any] | None):
+        if on_error is not None:
+            on_error(exc)
+            return
+        status.set(f"{type(exc).__name__}: {exc!s}")
+
+    def post(self, callback: Callable[[], Any]):
+        """Queue a callback to run on the UI thread"""
+        self._events.put(callback)
+
+    def process_events(self) -> int:
+        """Run queued callbacks, return how many ran"""
+        count = 0
+        while True:
+            try:
+                callback = self._events.get_nowait()
+            except Empty:
+                return count
+            callback()
+            count += 1
+
+    def active(self) -> list[Task]:
+        """Return running tasks"""
+        with self._lock:
+            return [task for task in self._active if not task.cancelled]
+
+    @property
+    def busy(self):
+        """Whether any task is running"""
+        return bool(self.active())
+
+    def shutdown(self):
+        """Cancel pending work, used when the app exits"""
+        for task in self.active():
+            task.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def spinner() -> str:
+    """Return the current spinner frame"""
+    return SPINNER[int(time.monotonic() / SPINNER_INTERVAL) % len(SPINNER)]
+
+
+tasks = TaskRunner()
@@ -15,10 +15,33 @@ class VersionBuildRepo(TypedDict):
     version: str
     builds: list[int]
 
+class BuildDownload(TypedDict):
+    """Downloadable artifact of a build"""
+    name: str
+    sha256: str
+
+class BuildInfo(TypedDict):
+    """Build metadata"""
+    project_id: str
+    project_name: str
+    version: str
+    build: int
+    downloads: dict[str, BuildDownload]
+
 class Memory(TypedDict):
     """Memory configuration"""
     min: int
     max: int
+class ProfileSettings(TypedDict):
+    """Launch settings of a single profile"""
+    preset: str
+    memory: str | Memory
+    pretouch: bool
+    large_pages: str
+    appcds: bool
+    additional_args: list[str]
+    plugins: list[str]
+
 class Config(TypedDict):
     """System configuration"""
     path: str
@@ -26,3 +49,39 @@ class Config(TypedDict):
     memory: Memory
     gui: bool
     additional_args: list[str]
+    pool_size: int
+    download_workers: int
+    cache_max_stale: int
+    cache_max_size: int
+    max_concurrent_downloads: int
+    console_lines: int
+    metrics_interval: float
+    base_port: int
+    cpus_per_instance: int
+    auto_restart: bool
+    restart_backoff: float
+    restart_backoff_max: float
+    crash_loop_count: int
+    crash_loop_window: float
+    hang_timeout: float
+    liveness_command: str
+    log_max_size: int
+    log_max_age: float
+    log_retention_size: int
+    log_retention_days: float
+    log_maintenance_interval: float
+    log_compress_workers: int
+    backup_path: str
+    backup_interval: float
+    backup_keep: int
+    backup_workers: int
+    backup_exclude: list[str]
+    clone_workers: int
+    clone_exclude: list[str]
+    jar_keep_builds: int
+    jar_keep_days: float
+    jar_gc_auto: bool
+    prepatch: bool
+    plugin_repository: str
+    plugin_loaders: list[str]
+    plugin_workers: int
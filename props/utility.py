@@ -1,6 +1,6 @@
 """Utility"""
 
-from typing import Type, Callable, TypeVar
+from typing import Type, Callable, TypeVar, Sequence, overload
 from functools import wraps
 
 from .data import status, ReturnType
@@ -30,16 +30,33 @@ def supress(exclist: tuple[Type[BaseException], ...] | list[Type[BaseException]]
     return outer
 
 
-def windowed(data: list[T] | tuple[T, ...], start: int, end: int):
-    """Return an enumerated, windowed list based on start and end.
-    Start/end must incorporated values returned by prepare_windowed"""
-    return list(enumerate(data))[start:end]
-
-
-def prepare_windowed(index: int, visible_rows: int):
-    """Return min/max length for windowed function"""
-    minln = max(0, index - (visible_rows // 2))
-    maxln = (
-        visible_rows if index <= (visible_rows // 2) else (index + visible_rows // 2)
-    )
-    return minln, maxln
+class ReversedView(Sequence[T]):
+    """Reversed, read-only view over a sequence, without copying it"""
+
+    def __init__(self, data: Sequence[T]) -> None:
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[T]: ...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self._data)
+        if not 0 <= index < len(self._data):
+            raise IndexError(index)
+        return self._data[len(self._data) - 1 - index]
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count with a binary unit"""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} B"
+        size /= 1024
+    return f"{size:.1f} TiB"
@@ -0,0 +1,184 @@
+"""Restart crashed or hung servers"""
+
+import os
+import time
+from json import dumps, loads
+from threading import Event, Lock, Thread
+from typing import Callable
+
+from .config import APP_DIR
+from .data import status
+from .process import ServerProcess
+from .tasks import tasks
+from .typings import Config
+
+HISTORY_FILE = APP_DIR / "restarts.log"
+CHECK_INTERVAL = 1.0
+DEFAULT_BACKOFF = 5.0
+DEFAULT_BACKOFF_MAX = 300.0
+DEFAULT_CRASH_LOOP_COUNT = 5
+DEFAULT_CRASH_LOOP_WINDOW = 600.0
+DEFAULT_HANG_TIMEOUT = 120.0
+DEFAULT_LIVENESS_COMMAND = "list"
+
+HISTORY_MAX_SIZE = 1024 * 1024
+
+_HISTORY_LOCK = Lock()
+
+
+def record(profile: str, event: str, reason: str, **extra):
+    """Append an entry to the restart history, keeping its newest half past HISTORY_MAX_SIZE"""
+    entry = {"time": time.time(), "profile": profile, "event": event, "reason": reason, **extra}
+    with _HISTORY_LOCK:
+        with open(HISTORY_FILE, "a", encoding="utf-8") as file:
+            file.write(dumps(entry) + "\n")
+            size = file.tell()
+        if size > HISTORY_MAX_SIZE:
+            lines = HISTORY_FILE.read_text(encoding="utf-8").splitlines(keepends=True)
+            temp = HISTORY_FILE.with_name(f"{HISTORY_FILE.name}.tmp")
+            temp.write_text("".join(lines[len(lines) // 2:]), encoding="utf-8")
+            os.replace(temp, HISTORY_FILE)
+
+
+def history(limit: int = 200) -> list[dict]:
+    """Return the newest history entries, newest first"""
+    if not HISTORY_FILE.exists():
+        return []
+    with _HISTORY_LOCK:
+        lines = HISTORY_FILE.read_text(encoding="utf-8").splitlines()[-limit:]
+    entries = []
+    for line in reversed(lines):
+        try:
+            entries.append(loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+class Backoff:  # pylint: disable=too-few-public-methods
+    """Exponential restart delays, None once crash_loop_count crashes fall in one window"""
+
+    def __init__(self, config: Config) -> None:
+        self._base = config.get("restart_backoff", DEFAULT_BACKOFF)
+        self._max = config.get("restart_backoff_max", DEFAULT_BACKOFF_MAX)
+        self._loop_count = config.get("crash_loop_count", DEFAULT_CRASH_LOOP_COUNT)
+        self._loop_window = config.get("crash_loop_window", DEFAULT_CRASH_LOOP_WINDOW)
+        self._failures: list[float] = []
+
+    def failed(self) -> float | None:
+        """Count a crash, return how long to wait before restarting"""
+        now = time.monotonic()
+        self._failures = [when for when in self._failures if now - when < self._loop_window]
+        self._failures.append(now)
+        if len(self._failures) >= self._loop_count:
+            return None
+        return min(self._max, self._base * 2 ** (len(self._failures) - 1))
+
+
+class HangProbe:
+    """Send the liveness command to a quiet server, report it hung once it stays quiet"""
+
+    def __init__(self, config: Config) -> None:
+        self.timeout = config.get("hang_timeout", DEFAULT_HANG_TIMEOUT)
+        self._command = config.get("liveness_command", DEFAULT_LIVENESS_COMMAND)
+        self._probed = False
+
+    def hung(self, server: ServerProcess) -> bool:
+        """Whether server printed nothing for the hang timeout"""
+        if not self.timeout:
+            return False
+        idle = time.monotonic() - server.last_output
+        if idle < self.timeout / 2:
+            self._probed = False
+            return False
+        if not self._probed and self._command:
+            self._probed = server.send(self._command)
+        return idle >= self.timeout
+
+    def reset(self):
+        """Forget the probe sent to a server that was replaced"""
+        self._probed = False
+
+
+class Watchdog:
+    """Watch a server, restarting it with exponential backoff when it crashes or hangs.
+
+    A server is hung when it printed nothing for hang_timeout seconds, including
+    no answer to the liveness command sent halfway through. Crashing
+    crash_loop_count times within crash_loop_window seconds gives up."""
+
+    def __init__(
+        self, name: str, server: ServerProcess, restart: Callable[[], ServerProcess], config: Config
+    ) -> None:
+        self.name = name
+        self.server = server
+        self.state = "watching"
+        self._restart = restart
+        self._backoff = Backoff(config)
+        self._probe = HangProbe(config)
+        # Set by stop() and by the watching thread when it finishes
+        self._stop = Event()
+
+    def start(self):
+        """Start watching"""
+        Thread(target=self._run, name=f"watchdog-{self.name}", daemon=True).start()
+
+    def stop(self):
+        """Stop watching, the server keeps running"""
+        self._stop.set()
+
+    @property
+    def active(self) -> bool:
+        """Whether this watchdog still watches its server"""
+        return not self._stop.is_set()
+
+    def _run(self):
+        try:
+            self._watch()
+        finally:
+            self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(CHECK_INTERVAL):
+            server = self.server
+            if server.stopping:
+                return
+            if not server.running:
+                if server.returncode == 0:
+                    record(self.name, "exited", "clean shutdown", returncode=0)
+                    return
+                if not self._recover(f"crashed with code {server.returncode}"):
+                    return
+            elif self._probe.hung(server):
+                server.kill()
+                if not self._recover(f"no output for {self._probe.timeout:.0f}s"):
+                    return
+
+    def _recover(self, reason: str) -> bool:
+        """Restart after a backoff delay, False when giving up"""
+        returncode = self.server.returncode
+        delay = self._backoff.failed()
+        if delay is None:
+            self.state = "gave up"
+            record(self.name, "gave_up", f"crash loop, {reason}", returncode=returncode)
+            self._notify(f"{self.name} keeps crashing, auto-restart gave up")
+            return False
+
+        self.state = f"restarting in {delay:g}s"
+        record(self.name, "restart", reason, returncode=returncode, delay=delay)
+        self._notify(f"{self.name} {reason}, restarting in {delay:g}s")
+        if self._stop.wait(delay):
+            return False
+        try:
+            self.server = self._restart()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.state = "gave up"
+            record(self.name, "gave_up", f"restart failed: {exc}")
+            self._notify(f"{self.name} could not be restarted: {exc}")
+            return False
+        self.state = "watching"
+        self._probe.reset()
+        return True
+
+    def _notify(self, message: str):
+        tasks.post(lambda: status.set(message))
@@ -0,0 +1,7 @@
+"""Tests run against a throwaway home, props reads ~/.sheetstack as it's imported"""
+
+import os
+import tempfile
+
+HOME = tempfile.mkdtemp(prefix="sheetstack-home-")
+os.environ["HOME"] = HOME
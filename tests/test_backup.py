@@ -0,0 +1,56 @@
+"""Snapshots and restores of a profile"""
+
+import os
+import tempfile
+import unittest
+
+from props.backup import restore, snapshot
+from props.config import CONFIG_DUMMY, get_paths, write_config
+
+
+class BackupTest(unittest.TestCase):
+    """snapshot() and restore() on a scratch server directory"""
+
+    def setUp(self):
+        write_config({**CONFIG_DUMMY, "path": tempfile.mkdtemp(prefix="sheetstack-backup-")})
+        self.base = get_paths().profiles / "paper-1.20-10"
+        (self.base / "world").mkdir(parents=True)
+        (self.base / "world" / "level.dat").write_bytes(b"level")
+        (self.base / "server.properties").write_text("motd=hi\n", encoding="utf-8")
+        (self.base / "plugins").mkdir()
+        os.symlink("server.properties", self.base / "alias")
+
+    def test_restore_brings_back_changed_and_removed_files(self):
+        taken = snapshot("paper-1.20-10")
+        (self.base / "server.properties").write_text("motd=changed\n", encoding="utf-8")
+        (self.base / "world" / "level.dat").unlink()
+        (self.base / "extra.txt").write_text("new", encoding="utf-8")
+        self.assertEqual(restore("paper-1.20-10", taken["id"]), 2)
+        self.assertEqual((self.base / "server.properties").read_text(encoding="utf-8"), "motd=hi\n")
+        self.assertEqual((self.base / "world" / "level.dat").read_bytes(), b"level")
+        self.assertFalse((self.base / "extra.txt").exists())
+
+    def test_restore_replaces_paths_whose_type_changed(self):
+        taken = snapshot("paper-1.20-10")
+        # directory -> file, file -> directory, directory -> symlink, symlink -> directory
+        (self.base / "world" / "level.dat").unlink()
+        (self.base / "world").rmdir()
+        (self.base / "world").write_text("not a world", encoding="utf-8")
+        (self.base / "server.properties").unlink()
+        (self.base / "server.properties" / "nested").mkdir(parents=True)
+        (self.base / "plugins").rmdir()
+        os.symlink("world", self.base / "plugins")
+        (self.base / "alias").unlink()
+        (self.base / "alias").mkdir()
+        (self.base / "alias" / "file").write_text("inside", encoding="utf-8")
+
+        restore("paper-1.20-10", taken["id"])
+        self.assertEqual((self.base / "world" / "level.dat").read_bytes(), b"level")
+        self.assertEqual((self.base / "server.properties").read_text(encoding="utf-8"), "motd=hi\n")
+        self.assertTrue((self.base / "plugins").is_dir())
+        self.assertFalse((self.base / "plugins").is_symlink())
+        self.assertEqual(os.readlink(self.base / "alias"), "server.properties")
+
+
+if __name__ == "__main__":
+    unittest.main()
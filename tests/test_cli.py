@@ -0,0 +1,97 @@
+"""Headless command line"""
+
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from json import loads
+from pathlib import Path
+
+from props.cli import execute
+from props.config import CONFIG_DUMMY, config_service, get_paths, write_config
+
+MAIN = Path(__file__).resolve().parent.parent / "main.py"
+# Talks on stdout and reads a console command, like a server would
+FAKE_JAVA = """#!/bin/sh
+echo "[Server thread/INFO]: Done (1.0s)! For help, type help"
+read command
+echo "got $command"
+"""
+
+
+class BatchPathTest(unittest.TestCase):
+    """--path given to batch applies to its lines"""
+
+    def setUp(self):
+        self.configured = Path(tempfile.mkdtemp(prefix="sheetstack-configured-"))
+        self.other = Path(tempfile.mkdtemp(prefix="sheetstack-other-"))
+        write_config({**CONFIG_DUMMY, "path": str(self.configured)})
+        (self.other / "bin").mkdir()
+        (self.other / "bin" / "paper-1.21-1.jar").touch()
+        self.batch = self.other / "commands.txt"
+
+    def run_batch(self, lines: str) -> list[dict]:
+        self.batch.write_text(lines, encoding="utf-8")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            execute(["--path", str(self.other), "batch", str(self.batch)])
+        return [loads(line) for line in output.getvalue().splitlines()]
+
+    def test_lines_inherit_batch_path(self):
+        listing, batch = self.run_batch("list\n")
+        self.assertTrue(batch["ok"])
+        self.assertIn("paper-1.21-1.jar", listing["data"]["installed"])
+
+    def test_line_path_applies_to_that_line_only(self):
+        first, second, _ = self.run_batch(f"--path {self.configured} list\nlist\n")
+        self.assertNotIn("paper-1.21-1.jar", first["data"]["installed"])
+        self.assertIn("paper-1.21-1.jar", second["data"]["installed"])
+
+    def test_override_ends_with_the_command(self):
+        self.run_batch("list\n")
+        self.assertIsNone(config_service.path_override)
+        self.assertEqual(get_paths().root, self.configured)
+
+    def test_missing_path_is_created(self):
+        missing = self.other / "new" / "server"
+        output = io.StringIO()
+        with redirect_stdout(output):
+            execute(["--path", str(missing), "list"])
+        self.assertTrue(loads(output.getvalue())["ok"])
+        self.assertTrue((missing / "bin").is_dir())
+
+
+
+class BatchRunTest(unittest.TestCase):
+    """run inside a batch keeps stdout to JSON lines and leaves the script alone"""
+
+    def setUp(self):
+        root = Path(tempfile.mkdtemp(prefix="sheetstack-run-"))
+        java = root / "java"
+        java.write_text(FAKE_JAVA, encoding="utf-8")
+        java.chmod(0o755)
+        write_config({**CONFIG_DUMMY, "path": str(root), "java_path": str(java)})
+        (get_paths().bin / "paper-1.21-1.jar").touch()
+
+    def test_run_then_list(self):
+        script = "select paper-1.21-1.jar\nrun\nlist\n"
+        result = subprocess.run(
+            [sys.executable, str(MAIN), "batch"],
+            input=script,
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=False,
+        )
+        lines = [loads(line) for line in result.stdout.splitlines()]
+        commands = [line["command"] for line in lines]
+        self.assertEqual(commands, ["select paper-1.21-1.jar", "run", "list", "batch"])
+        self.assertTrue(all(line["ok"] for line in lines), lines)
+        self.assertIn("Done (1.0s)", result.stderr)
+        self.assertNotIn("got list", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
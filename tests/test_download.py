@@ -0,0 +1,117 @@
+"""Ranged, resumable downloads against a local HTTP server"""
+
+import hashlib
+import os
+import tempfile
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from unittest.mock import patch
+
+from requests import RequestException, Session
+
+from props.download import download, load_state, part_paths
+
+DATA = os.urandom(64 * 1024)
+
+
+class RangeServer(ThreadingHTTPServer):
+    """Serve DATA with range support, cutting chosen requests short"""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = Lock()
+        self.ranges: list[tuple[int, int]] = []
+        # {range start: bytes to send before dropping the connection}, used once each
+        self.cut: dict[int, int] = {}
+
+    @property
+    def url(self) -> str:
+        """URL of the served file"""
+        return f"http://127.0.0.1:{self.server_port}/server.jar"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: RangeServer
+
+    def do_HEAD(self):  # pylint: disable=invalid-name
+        """Announce the size and range support"""
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(DATA)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the requested range"""
+        start, end = (int(value) for value in self.headers["Range"][6:].split("-"))
+        with self.server.lock:
+            self.server.ranges.append((start, end))
+            cut = self.server.cut.pop(start, None)
+        body = DATA[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:cut])
+
+    def log_message(self, *_):  # pylint: disable=arguments-differ
+        pass
+
+
+class DownloadTest(unittest.TestCase):
+    """download() with small chunks and segments so a test covers many of them"""
+
+    def setUp(self):
+        self.server = RangeServer()
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.destination = Path(tempfile.mkdtemp(prefix="sheetstack-download-")) / "server.jar"
+        self.session = Session()
+        for name, value in (("DEFAULT_CHUNK_SIZE", 1000), ("MIN_SEGMENT_SIZE", 16 * 1024)):
+            patcher = patch(f"props.download.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_counted_bytes_are_on_disk(self):
+        part, _ = part_paths(self.destination)
+        seen = []
+
+        def on_progress(size: int, _total: int):
+            seen.append(size)
+            done = sum(seen)
+            with open(part, "rb") as file:
+                self.assertEqual(file.read(done), DATA[:done])
+
+        download(self.session, self.server.url, self.destination, workers=1,
+                 progress_bar=False, on_progress=on_progress)
+        self.assertEqual(self.destination.read_bytes(), DATA)
+
+    def test_interrupted_segment_resumes(self):
+        self.server.cut[16 * 1024] = 6000
+        with self.assertRaises(RequestException):
+            download(self.session, self.server.url, self.destination, progress_bar=False)
+        part, state = part_paths(self.destination)
+        segments = load_state(state, self.server.url, len(DATA))
+        self.assertIsNotNone(segments)
+        start, end, done = segments[1]
+        self.assertTrue(0 < done < end - start + 1)
+        with open(part, "rb") as file:
+            file.seek(start)
+            self.assertEqual(file.read(done), DATA[start:start + done])
+
+        digest = hashlib.sha256()
+        download(self.session, self.server.url, self.destination, progress_bar=False,
+                 digest=digest)
+        self.assertIn((start + done, end), self.server.ranges)
+        self.assertEqual(self.destination.read_bytes(), DATA)
+        self.assertEqual(digest.hexdigest(), hashlib.sha256(DATA).hexdigest())
+        self.assertFalse(state.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
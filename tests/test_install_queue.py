@@ -0,0 +1,63 @@
+"""Background download queue"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from threading import Event, Lock
+from unittest import mock
+
+from props.config import CONFIG_DUMMY, write_config
+from props.install_queue import QUEUED, DownloadQueue
+
+
+class DedupTest(unittest.TestCase):
+    """Requests resolving to the same jar download it once"""
+
+    def setUp(self):
+        write_config({**CONFIG_DUMMY, "path": tempfile.mkdtemp(), "prepatch": False})
+        self.queue = DownloadQueue(Path(tempfile.mkdtemp()) / "queue.json")
+        self.release = Event()
+        self.started = Event()
+        self.calls: list[tuple[str, int]] = []
+        self.calls_lock = Lock()
+
+    def fake_fetch(self, version, build, *_):
+        with self.calls_lock:
+            self.calls.append((version, build))
+        self.started.set()
+        self.release.wait(5)
+
+    def settle(self):
+        """Wait until the worker has picked up every queued item"""
+        deadline = time.monotonic() + 5
+        while any(item.state == QUEUED for item in self.queue.items()):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_latest_and_explicit_build_share_a_download(self):
+        with mock.patch("props.install_queue.fetch_version_info", return_value={"builds": [7]}), \
+                mock.patch("props.install_queue.fetch_minecraft", self.fake_fetch):
+            self.queue.start()
+            self.queue.add("1.21", 7)
+            self.assertTrue(self.started.wait(5))
+            self.queue.add("1.21")
+            self.settle()
+            self.release.set()
+            self.queue.shutdown()
+        self.assertEqual(self.calls, [("1.21", 7)])
+
+    def test_explicit_build_is_refused_while_latest_downloads_it(self):
+        with mock.patch("props.install_queue.fetch_version_info", return_value={"builds": [7]}), \
+                mock.patch("props.install_queue.fetch_minecraft", self.fake_fetch):
+            self.queue.start()
+            self.queue.add("1.21")
+            self.assertTrue(self.started.wait(5))
+            self.assertFalse(self.queue.add("1.21", 7))
+            self.release.set()
+            self.queue.shutdown()
+        self.assertEqual(self.calls, [("1.21", 7)])
+
+
+if __name__ == "__main__":
+    unittest.main()
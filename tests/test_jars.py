@@ -0,0 +1,69 @@
+"""Jar garbage collection"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from props.config import CONFIG_DUMMY, get_paths, write_config
+from props.jars import collect
+from props.store import STORE_DIR, add_artifact, materialize, sha256_file, store_path
+
+
+def disk_usage(*roots: Path) -> int:
+    """Bytes allocated under roots, every inode counted once like du"""
+    seen = set()
+    total = 0
+    for root in roots:
+        for directory, _, files in os.walk(root):
+            for name in files:
+                stat = os.lstat(os.path.join(directory, name))
+                if stat.st_ino not in seen:
+                    seen.add(stat.st_ino)
+                    total += stat.st_blocks * 512
+    return total
+
+
+class CollectTest(unittest.TestCase):
+    """collect() has to give back the space of jars shared with the store"""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="sheetstack-srv-"))
+        write_config({**CONFIG_DUMMY, "path": str(self.root)})
+        self.bin = get_paths().bin
+
+    def install(self, name: str, size: int = 1024 * 1024) -> Path:
+        """Put a jar in the store and hardlink it into bin like a download does"""
+        temp = self.root / f"{name}.part"
+        temp.write_bytes(os.urandom(size))
+        digest = sha256_file(temp)
+        add_artifact(temp, digest)
+        materialize(digest, self.bin / name)
+        return store_path(digest)
+
+    def test_frees_store_artifact(self):
+        stored = self.install("paper-1.20-1.jar")
+        before = disk_usage(self.bin, STORE_DIR)
+        result = collect(keep_builds=0, keep_days=0)
+        self.assertEqual(result["deleted"], ["paper-1.20-1.jar"])
+        self.assertFalse(stored.exists())
+        self.assertEqual(result["freed"], 1024 * 1024)
+        self.assertLessEqual(disk_usage(self.bin, STORE_DIR), before - 1024 * 1024)
+
+    def test_shared_artifact_frees_nothing(self):
+        stored = self.install("paper-1.20-2.jar")
+        os.link(stored, self.root / "elsewhere.jar")
+        result = collect(keep_builds=0, keep_days=0)
+        self.assertEqual(result["freed"], 0)
+        self.assertTrue(stored.exists())
+
+    def test_dry_run_reports_without_deleting(self):
+        stored = self.install("paper-1.20-3.jar")
+        result = collect(dry_run=True, keep_builds=0, keep_days=0)
+        self.assertEqual(result["freed"], 1024 * 1024)
+        self.assertTrue(stored.exists())
+        self.assertTrue((self.bin / "paper-1.20-3.jar").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""JVM flag presets"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from props.config import CONFIG_DUMMY
+from props.jvm import SETTINGS_DUMMY, ZGC_GENERATIONAL, java_version, jvm_flags
+
+
+def fake_java(version: str) -> str:
+    """A java that only knows -version, printing it to stderr like the real one"""
+    path = Path(tempfile.mkdtemp()) / "java"
+    path.write_text(
+        f"#!/bin/sh\necho 'openjdk version \"{version}\" 2024-01-16' >&2\n", encoding="utf-8"
+    )
+    os.chmod(path, 0o755)
+    return str(path)
+
+
+class ZgcTest(unittest.TestCase):
+    """-XX:+ZGenerational only where Java wants it"""
+
+    def flags(self, version: str) -> list[str]:
+        config = {**CONFIG_DUMMY, "java_path": fake_java(version)}
+        return jvm_flags({**SETTINGS_DUMMY, "preset": "zgc"}, config)  # type: ignore
+
+    def test_versions(self):
+        self.assertEqual(java_version(fake_java("1.8.0_402")), 8)
+        self.assertEqual(java_version(fake_java("21.0.2")), 21)
+        self.assertEqual(java_version(fake_java("24")), 24)
+        self.assertIsNone(java_version("/nonexistent/java"))
+
+    def test_opt_in_on_21_to_23(self):
+        for version in ("21.0.2", "23.0.1"):
+            self.assertIn(ZGC_GENERATIONAL, self.flags(version))
+
+    def test_obsolete_from_24(self):
+        self.assertNotIn(ZGC_GENERATIONAL, self.flags("24.0.1"))
+        self.assertNotIn(ZGC_GENERATIONAL, self.flags("17.0.10"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Metadata cache of the PaperMC API"""
+
+import tempfile
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from threading import Thread
+
+from props.config import CONFIG_DUMMY, write_config
+from props.paper import CACHE_TTL, METADATA, fetch
+
+
+class _Failing(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer like an API that's having a bad day"""
+        self.send_response(503)
+        self.end_headers()
+
+    def log_message(self, *_):  # pylint: disable=arguments-differ
+        pass
+
+
+class StaleFallbackTest(unittest.TestCase):
+    """A cached copy is served when the API answers with an error"""
+
+    def setUp(self):
+        write_config({**CONFIG_DUMMY, "path": tempfile.mkdtemp(), "cache_max_stale": 0})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Failing)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v2/projects/paper"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_error_response_serves_cached_copy(self):
+        body = dumps({"versions": ["1.21"]})
+        # Past CACHE_TTL and cache_max_stale, so fetch() has to ask the API
+        METADATA.put("test-stale.cache", self.url, body, fetched_at=time.time() - CACHE_TTL - 1)
+        self.assertEqual(fetch(self.url, "test-stale.cache"), {"versions": ["1.21"]})
+
+    def test_error_response_without_cache_raises(self):
+        with self.assertRaises(ValueError):
+            fetch(self.url, "test-missing.cache")
+
+
+if __name__ == "__main__":
+    unittest.main()
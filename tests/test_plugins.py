@@ -0,0 +1,189 @@
+"""Plugin resolution, shared cache and linking against a mock Modrinth API"""
+
+import hashlib
+import os
+import tempfile
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+from props.config import CONFIG_DUMMY, get_paths, write_config
+from props.plugins import installed, set_requested, update
+from props.store import store_path
+
+
+class MockRepository(ThreadingHTTPServer):
+    """The two Modrinth v2 endpoints the plugin manager uses, counting every request"""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.hits: Counter[str] = Counter()
+        self.lock = Lock()
+        # Fresh jar contents per test, so nothing is in the store already
+        self.salt = os.urandom(8).hex()
+        self.versions: dict[str, dict] = {}
+        self.projects: dict[str, list[str]] = {}
+
+    @property
+    def base(self) -> str:
+        """URL to put in plugin_repository"""
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def jar(self, version_id: str) -> bytes:
+        """Contents of a version's jar"""
+        return f"{self.salt}:{version_id}".encode() * 64
+
+    def add(self, project: str, version_id: str, games: list[str], date: str, *dependencies):
+        """Publish a version of project for the given Minecraft versions"""
+        digest = hashlib.sha512(self.jar(version_id)).hexdigest()
+        self.versions[version_id] = {
+            "id": version_id,
+            "project_id": project,
+            "version_number": version_id,
+            "date_published": date,
+            "game_versions": games,
+            "files": [{
+                "url": f"{self.base}/download/{version_id}",
+                "filename": f"{project}-{version_id}.jar",
+                "primary": True,
+                "hashes": {"sha512": digest},
+            }],
+            "dependencies": list(dependencies),
+        }
+        self.projects.setdefault(project, []).append(version_id)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockRepository
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve project versions, single versions and jars"""
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        with self.server.lock:
+            self.server.hits[url.path] += 1
+        if parts[0] == "project" and parts[1] in self.server.projects:
+            games = loads(parse_qs(url.query)["game_versions"][0])
+            versions = [self.server.versions[vid] for vid in self.server.projects[parts[1]]]
+            body = dumps([v for v in versions if set(games) & set(v["game_versions"])])
+            self._send(body.encode())
+        elif parts[0] == "version" and parts[1] in self.server.versions:
+            self._send(dumps(self.server.versions[parts[1]]).encode())
+        elif parts[0] == "download":
+            self._send(self.server.jar(parts[1]))
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def _send(self, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):  # pylint: disable=arguments-differ
+        pass
+
+
+def required(project: str | None = None, version_id: str | None = None) -> dict:
+    """A required dependency on a project, or on an exact version"""
+    return {"project_id": project, "version_id": version_id, "dependency_type": "required"}
+
+
+class PluginsTest(unittest.TestCase):
+    """update() against a mock repository"""
+
+    def setUp(self):
+        self.repository = MockRepository()
+        Thread(target=self.repository.serve_forever, daemon=True).start()
+        repository = self.repository
+        repository.add("lib", "lib-1", ["1.19", "1.20"], "2024-01-01")
+        repository.add("lib", "lib-2", ["1.20"], "2024-03-01")
+        repository.add("alpha", "alpha-1", ["1.19", "1.20"], "2024-01-01", required("lib"))
+        repository.add("alpha", "alpha-2", ["1.20"], "2024-02-01", required("lib"))
+        repository.add("beta", "beta-1", ["1.19", "1.20"], "2024-01-01", required(None, "lib-1"))
+        repository.add(
+            "gamma", "gamma-1", ["1.20"], "2024-01-01",
+            {"project_id": "missing", "dependency_type": "optional"},
+        )
+        write_config({
+            **CONFIG_DUMMY,
+            "path": tempfile.mkdtemp(prefix="sheetstack-plugins-"),
+            "plugin_repository": repository.base,
+        })
+
+    def tearDown(self):
+        self.repository.shutdown()
+        self.repository.server_close()
+
+    def profile(self, name: str, projects: list[str]) -> str:
+        """Create a profile asking for projects"""
+        (get_paths().profiles / name).mkdir()
+        set_requested(name, projects)
+        return name
+
+    def plugins(self, profile: str):
+        """The profile's plugins directory"""
+        return get_paths().profiles / profile / "plugins"
+
+    def test_resolves_for_the_profile_version(self):
+        old = self.profile("paper-1.19-100", ["alpha"])
+        new = self.profile("paper-1.20-10", ["alpha"])
+        results = update([old, new])
+        self.assertEqual(results[old]["versions"], {"alpha": "alpha-1", "lib": "lib-1"})
+        self.assertEqual(results[new]["versions"], {"alpha": "alpha-2", "lib": "lib-2"})
+
+    def test_pin_beats_newest_and_optional_is_skipped(self):
+        profile = self.profile("paper-1.20-10", ["alpha", "beta", "gamma"])
+        versions = update([profile])[profile]["versions"]
+        self.assertEqual(versions["lib"], "lib-1")
+        self.assertNotIn("missing", versions)
+        self.assertEqual(self.repository.hits["/project/missing/version"], 0)
+
+    def test_jars_are_hardlinks_into_the_store(self):
+        profile = self.profile("paper-1.20-10", ["alpha"])
+        update([profile])
+        for name, digest in installed(profile).items():
+            self.assertTrue(os.path.samefile(self.plugins(profile) / name, store_path(digest)))
+
+    def test_many_profiles_fetch_each_jar_once(self):
+        profiles = [self.profile(f"paper-1.20-{build}", ["alpha", "beta"]) for build in range(10)]
+        results = update(profiles)
+        self.assertTrue(all("error" not in result for result in results.values()))
+        hits = self.repository.hits
+        for version_id in ("alpha-2", "beta-1", "lib-1"):
+            self.assertEqual(hits[f"/download/{version_id}"], 1)
+        self.assertEqual(hits["/project/alpha/version"], 1)
+        self.assertEqual(hits["/version/lib-1"], 1)
+        for profile in profiles:
+            self.assertEqual(len(installed(profile)), 3)
+
+    def test_hand_placed_jars_are_left_alone(self):
+        profile = self.profile("paper-1.20-10", ["alpha"])
+        plugins = self.plugins(profile)
+        plugins.mkdir()
+        (plugins / "Manual.jar").write_bytes(b"mine")
+        (plugins / "lib-lib-2.jar").write_bytes(b"also mine")
+        report = update([profile])[profile]
+        self.assertEqual(report["conflicts"], ["lib-lib-2.jar"])
+        self.assertEqual((plugins / "lib-lib-2.jar").read_bytes(), b"also mine")
+
+        set_requested(profile, [])
+        report = update([profile])[profile]
+        self.assertEqual(report["removed"], ["alpha-alpha-2.jar"])
+        self.assertEqual(sorted(path.name for path in plugins.glob("*.jar")),
+                         ["Manual.jar", "lib-lib-2.jar"])
+
+    def test_unknown_project_fails_only_its_profile(self):
+        good = self.profile("paper-1.20-10", ["alpha"])
+        bad = self.profile("paper-1.20-11", ["nope"])
+        results = update([good, bad])
+        self.assertIn("error", results[bad])
+        self.assertNotIn("error", results[good])
+
+
+if __name__ == "__main__":
+    unittest.main()
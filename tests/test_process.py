@@ -0,0 +1,33 @@
+"""Supervised server processes"""
+
+import os
+import sys
+import time
+import unittest
+
+from props.process import ServerProcess
+
+
+class AffinityTest(unittest.TestCase):
+    """Pinned servers run on their CPUs"""
+
+    def test_pinned_to_cpus(self):
+        cpus = {min(os.sched_getaffinity(0))}
+        script = "import sys; sys.stdin.readline()"
+        server = ServerProcess([sys.executable, "-c", script], os.getcwd(), cpus=cpus)
+        server.start()
+        try:
+            assert server.pid is not None
+            deadline = time.monotonic() + 5
+            # taskset is replaced by the server in the same process
+            while os.path.basename(os.readlink(f"/proc/{server.pid}/exe")) == "taskset":
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            self.assertEqual(os.sched_getaffinity(server.pid), cpus)
+            self.assertEqual(server.args[0], sys.executable)
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""Restart history and backoff"""
+
+import unittest
+from unittest.mock import patch
+
+from props.watchdog import HISTORY_FILE, Backoff, history, record
+
+
+class HistoryTest(unittest.TestCase):
+    """restarts.log stays bounded"""
+
+    def setUp(self):
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        HISTORY_FILE.unlink(missing_ok=True)
+
+    def test_history_is_cut_back_past_its_cap(self):
+        with patch("props.watchdog.HISTORY_MAX_SIZE", 4096):
+            for count in range(200):
+                record("paper-1.20-10", "restart", "crashed", count=count)
+        self.assertLessEqual(HISTORY_FILE.stat().st_size, 4096)
+        entries = history()
+        self.assertEqual(entries[0]["count"], 199)
+        counts = [entry["count"] for entry in entries]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+
+
+class BackoffTest(unittest.TestCase):
+    """Delays double up to the maximum, a crash loop gives up"""
+
+    def test_delays_double_then_give_up(self):
+        backoff = Backoff({
+            "restart_backoff": 1.0, "restart_backoff_max": 3.0,
+            "crash_loop_count": 4, "crash_loop_window": 60.0,
+        })  # type: ignore
+        self.assertEqual([backoff.failed() for _ in range(4)], [1.0, 2.0, 3.0, None])
+
+
+if __name__ == "__main__":
+    unittest.main()